@@ -0,0 +1,88 @@
+import random
+
+from typing import Callable, Dict, List, Optional, Tuple
+
+from bitcoin_coin_selection.selection_types.change_constants import CENT, COIN
+from bitcoin_coin_selection.selection_types.sample_pools import hard_case_amounts
+
+"""
+Utxo value distributions for the benchmarks
+
+Each distribution draws a wallet of a given number of utxos and, optionally, a
+fixed target to pay (otherwise payments are drawn from the wallet, see
+payment_targets). The distributions in UNPRICED_DISTRIBUTIONS are selected
+from at no fee.
+"""
+
+# Smallest output the network relays
+DUST_LIMIT = 546
+# make_hard_case targets are close to 1 << utxo_count, past 50 utxos they are
+# more than MAX_MONEY and select_coins turns them down as invalid spends
+MAX_HARD_CASE_SIZE = 50
+# Fees would make the small hard case coins dust and break the exact subset
+# of the big ones, so hard cases are priced at no fee as make_hard_case is
+UNPRICED_DISTRIBUTIONS = frozenset(["hard_case"])
+
+# (utxo amounts, fixed target or None)
+Wallet = Tuple[List[int], Optional[int]]
+
+
+def uniform(rng: random.Random, size: int) -> Wallet:
+    return [rng.randint(DUST_LIMIT, COIN) for _ in range(size)], None
+
+
+def exponential(rng: random.Random, size: int) -> Wallet:
+    # Lots of small coins with a long tail of big ones, averaging 0.05 BTC
+    return [max(DUST_LIMIT, int(rng.expovariate(1 / (5 * CENT)))) for _ in range(size)], None
+
+
+def bimodal(rng: random.Random, size: int) -> Wallet:
+    # Change sized coins around 0.001 BTC and deposits around 1 BTC
+    amounts = []
+    for _ in range(size):
+        mean = COIN if rng.random() < 0.5 else CENT / 10
+        amounts.append(max(DUST_LIMIT, int(rng.gauss(mean, mean / 4))))
+    return amounts, None
+
+
+def dust_heavy(rng: random.Random, size: int) -> Wallet:
+    # 90% dust, much of it worth less than it costs to spend at benchmark fee rates
+    amounts = []
+    for _ in range(size):
+        if rng.random() < 0.9:
+            amounts.append(rng.randint(DUST_LIMIT, 5000))
+        else:
+            amounts.append(max(DUST_LIMIT, int(rng.expovariate(1 / (10 * CENT)))))
+    return amounts, None
+
+
+def hard_case(rng: random.Random, size: int) -> Wallet:
+    # make_hard_case: every pair of utxos differs by a bit only the exact subset
+    # can make up, so branch and bound has to search a large part of the tree
+    if size > MAX_HARD_CASE_SIZE:
+        raise ValueError("Hard cases are limited to {} utxos".format(MAX_HARD_CASE_SIZE))
+    target_value, amounts = hard_case_amounts(size // 2)
+    return amounts, target_value
+
+
+DISTRIBUTIONS: Dict[str, Callable[[random.Random, int], Wallet]] = {
+    "uniform": uniform,
+    "exponential": exponential,
+    "bimodal": bimodal,
+    "dust_heavy": dust_heavy,
+    "hard_case": hard_case,
+}
+# Largest wallet a distribution can draw, for those that have one
+MAX_SIZES: Dict[str, int] = {
+    "hard_case": MAX_HARD_CASE_SIZE,
+}
+
+
+def payment_targets(rng: random.Random, amounts: List[int], count: int) -> List[int]:
+    # Payments a wallet could plausibly be asked to make: the value of a few of
+    # its coins, less a random share so most payments don't match exactly
+    targets = []
+    for _ in range(count):
+        coins = rng.sample(amounts, min(len(amounts), rng.randint(1, 3)))
+        targets.append(max(1, int(sum(coins) * rng.uniform(0.5, 1))))
+    return targets
@@ -0,0 +1,245 @@
+import argparse
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from typing import Callable, Dict, List, Optional, Tuple
+
+from benchmarks.distributions import DISTRIBUTIONS, MAX_SIZES, UNPRICED_DISTRIBUTIONS, payment_targets
+from bitcoin_coin_selection.selection_algorithms.branch_and_bound import select_coins_branch_and_bound
+from bitcoin_coin_selection.selection_algorithms.knapsack_solver import select_coins_knapsack_solver
+from bitcoin_coin_selection.selection_algorithms.multiset_branch_and_bound import select_coins_multiset_branch_and_bound
+from bitcoin_coin_selection.selection_algorithms.select_coins import select_coins
+from bitcoin_coin_selection.selection_algorithms.single_random_draw import select_coins_single_random_draw
+from bitcoin_coin_selection.selection_algorithms.subset_sum import select_coins_subset_sum
+from bitcoin_coin_selection.selection_types.coin_selection import CoinSelection
+from bitcoin_coin_selection.selection_types.coin_selection_params import CoinSelectionParams
+from bitcoin_coin_selection.selection_types.sample_pools import FAKE_ADDRESS, INPUT_BYTES
+from bitcoin_coin_selection.selection_types.utxo_pool import UtxoPool
+
+"""
+Benchmarks for the selection algorithms
+
+For every algorithm, utxo value distribution and pool size, runs a number of
+payments against one wallet and records latency percentiles, the peak memory
+of a selection and the quality of the selections (success rate, waste, inputs
+spent). Results are written as JSON so runs can be compared:
+
+    python -m benchmarks.run_benchmarks --output before.json
+    python -m benchmarks.run_benchmarks --output after.json --compare before.json
+"""
+
+ALGORITHMS: Dict[str, Callable[[CoinSelectionParams], CoinSelection]] = {
+    "branch_and_bound": select_coins_branch_and_bound,
+    "multiset_branch_and_bound": select_coins_multiset_branch_and_bound,
+    "knapsack_solver": select_coins_knapsack_solver,
+    "single_random_draw": select_coins_single_random_draw,
+    "subset_sum": select_coins_subset_sum,
+    "select_coins": select_coins,
+}
+DEFAULT_SIZES = [10, 100, 1000, 10000, 100000, 1000000]
+DEFAULT_REPEATS = 50
+# Upper bound on repeats * pool size, so that big pools get fewer runs
+MAX_UTXOS_PER_CASE = 10000000
+
+# Fee parameters of a typical single output segwit spend
+SHORT_TERM_FEE_PER_BYTE = 10
+LONG_TERM_FEE_PER_BYTE = 5
+CHANGE_OUTPUT_SIZE_IN_BYTES = 31
+CHANGE_SPEND_SIZE_IN_BYTES = 68
+NOT_INPUT_SIZE_IN_BYTES = 41
+
+
+def make_pool(amounts: List[int], priced: bool = True) -> UtxoPool:
+    # Columnar counterpart of generate_utxo_pool, one coin per group. Building
+    # OutputGroup objects for a million coins would dwarf what is measured
+    utxo_pool = UtxoPool()
+    for i, amount in enumerate(amounts):
+        utxo_pool.append(FAKE_ADDRESS, [("", i, amount, INPUT_BYTES)])
+    utxo_pool.set_fee(*_fee_rates(priced))
+    return utxo_pool
+
+
+def make_params(utxo_pool: UtxoPool, target_value: int, priced: bool = True) -> CoinSelectionParams:
+    return CoinSelectionParams(
+        utxo_pool,
+        target_value,
+        *_fee_rates(priced),
+        CHANGE_OUTPUT_SIZE_IN_BYTES,
+        CHANGE_SPEND_SIZE_IN_BYTES,
+        NOT_INPUT_SIZE_IN_BYTES
+    )
+
+
+def percentile(sorted_values: List[float], share: float) -> float:
+    # Nearest rank
+    rank = max(0, min(len(sorted_values) - 1, int(round(share * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def run_case(algorithm: str, distribution: str, size: int, repeats: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    amounts, fixed_target = DISTRIBUTIONS[distribution](rng, size)
+    priced = distribution not in UNPRICED_DISTRIBUTIONS
+    repeats = max(1, min(repeats, MAX_UTXOS_PER_CASE // size))
+    if fixed_target is None:
+        targets = payment_targets(rng, amounts, repeats)
+    else:
+        targets = [fixed_target] * repeats
+    utxo_pool = make_pool(amounts, priced)
+    select = ALGORITHMS[algorithm]
+    # The algorithms themselves are random too
+    random.seed(seed)
+
+    latencies = []
+    selections = []
+    for target_value in targets:
+        params = make_params(utxo_pool, target_value, priced)
+        start = time.perf_counter()
+        selection = select(params)
+        latencies.append(time.perf_counter() - start)
+        selections.append(selection)
+
+    # Separate run, tracemalloc slows allocations down
+    tracemalloc.start()
+    select(make_params(utxo_pool, targets[0], priced))
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    successes = [s for s in selections if s.outcome == CoinSelection.Outcome.SUCCESS]
+    latencies.sort()
+    return {
+        "algorithm": algorithm,
+        "distribution": distribution,
+        "size": size,
+        "repeats": repeats,
+        "latency_p50": percentile(latencies, 0.5),
+        "latency_p90": percentile(latencies, 0.9),
+        "latency_p99": percentile(latencies, 0.99),
+        "latency_max": latencies[-1],
+        "latency_mean": statistics.mean(latencies),
+        "peak_memory_bytes": peak_memory,
+        "success_rate": len(successes) / repeats,
+        "mean_waste": statistics.mean(s.waste for s in successes) if successes else None,
+        "mean_inputs": statistics.mean(len(s.outputs) for s in successes) if successes else None,
+        "change_rate": (
+            sum(1 for s in successes if s.change_value > 0) / len(successes) if successes else None
+        ),
+        "budget_exhausted_rate": sum(1 for s in selections if s.budget_exhausted) / repeats,
+    }
+
+
+def run_benchmarks(
+    algorithms: List[str],
+    distributions: List[str],
+    sizes: List[int],
+    repeats: int = DEFAULT_REPEATS,
+    seed: int = 0,
+    progress: Optional[Callable[[dict], None]] = None
+) -> dict:
+    results = []
+    for distribution in distributions:
+        # Sizes past a distribution's largest are run once, at its largest
+        max_size = MAX_SIZES.get(distribution)
+        distribution_sizes = sizes if max_size is None else sorted({min(size, max_size) for size in sizes})
+        for size in distribution_sizes:
+            for algorithm in algorithms:
+                result = run_case(algorithm, distribution, size, repeats, seed)
+                results.append(result)
+                if progress:
+                    progress(result)
+    return {"metadata": _metadata(seed), "results": results}
+
+
+def compare(baseline: dict, current: dict) -> List[dict]:
+    # Cases present in both runs, with the ratio of current to baseline
+    # latency and peak memory (lower is better)
+    def key(result):
+        return (result["algorithm"], result["distribution"], result["size"])
+
+    baseline_results = {key(result): result for result in baseline["results"]}
+    comparisons = []
+    for result in current["results"]:
+        baseline_result = baseline_results.get(key(result))
+        if baseline_result is None:
+            continue
+        comparisons.append({
+            "algorithm": result["algorithm"],
+            "distribution": result["distribution"],
+            "size": result["size"],
+            "latency_p50_ratio": _ratio(result["latency_p50"], baseline_result["latency_p50"]),
+            "latency_p99_ratio": _ratio(result["latency_p99"], baseline_result["latency_p99"]),
+            "peak_memory_ratio": _ratio(result["peak_memory_bytes"], baseline_result["peak_memory_bytes"]),
+            "success_rate_change": result["success_rate"] - baseline_result["success_rate"],
+        })
+    return comparisons
+
+
+def _fee_rates(priced: bool) -> Tuple[int, int]:
+    return (SHORT_TERM_FEE_PER_BYTE, LONG_TERM_FEE_PER_BYTE) if priced else (0, 0)
+
+
+def _ratio(value: float, baseline_value: float) -> Optional[float]:
+    return value / baseline_value if baseline_value else None
+
+
+def _metadata(seed: int) -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": time.time(),
+        "commit": commit,
+        "python": sys.version,
+        "platform": platform.platform(),
+        "seed": seed,
+    }
+
+
+def _format_result(result: dict) -> str:
+    return "{algorithm:>18} {distribution:>11} {size:>8} p50 {latency_p50:.6f}s p99 {latency_p99:.6f}s peak {peak_memory_bytes:>11}B success {success_rate:.2f}".format(**result)
+
+
+def _format_ratio(ratio: Optional[float]) -> str:
+    return "-" if ratio is None else "{:.2f}".format(ratio)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmarks for the selection algorithms")
+    parser.add_argument("--algorithms", nargs="+", choices=list(ALGORITHMS), default=list(ALGORITHMS))
+    parser.add_argument("--distributions", nargs="+", choices=list(DISTRIBUTIONS), default=list(DISTRIBUTIONS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES)
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    args = parser.parse_args(argv)
+
+    run = run_benchmarks(
+        args.algorithms, args.distributions, args.sizes, args.repeats, args.seed,
+        progress=lambda result: print(_format_result(result), flush=True)
+    )
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(run, output_file, indent=2)
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        for comparison in compare(baseline, run):
+            print("{algorithm:>18} {distribution:>11} {size:>8} p50 x{p50} p99 x{p99}".format(
+                p50=_format_ratio(comparison["latency_p50_ratio"]),
+                p99=_format_ratio(comparison["latency_p99_ratio"]),
+                **comparison
+            ))
+
+
+if __name__ == "__main__":
+    main()
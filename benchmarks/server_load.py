@@ -0,0 +1,135 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+
+from typing import List, Optional
+
+from benchmarks.distributions import DISTRIBUTIONS, payment_targets
+from benchmarks.run_benchmarks import (
+    CHANGE_OUTPUT_SIZE_IN_BYTES,
+    CHANGE_SPEND_SIZE_IN_BYTES,
+    INPUT_BYTES,
+    LONG_TERM_FEE_PER_BYTE,
+    NOT_INPUT_SIZE_IN_BYTES,
+    SHORT_TERM_FEE_PER_BYTE,
+    percentile,
+)
+from bitcoin_coin_selection.selection_algorithms.selection_server import SelectionServer
+
+"""
+Load test for the selection server
+
+Loads a wallet into a server and has a number of concurrent clients send it
+selection requests back to back, then reports client side throughput and
+latency next to the server's own counters:
+
+    python -m benchmarks.server_load --clients 32 --requests 200 --size 1000
+
+Without --unix-socket a server is started in this process on a temporary
+socket; with it, an already running server is used.
+"""
+
+WALLET = "load_test"
+
+
+async def run_client(path: str, targets: List[int], time_budget: Optional[float], latencies: List[float]):
+    reader, writer = await asyncio.open_unix_connection(path)
+    try:
+        for target_value in targets:
+            request = {
+                "method": "select",
+                "wallet": WALLET,
+                "target_value": target_value,
+                "short_term_fee_per_byte": SHORT_TERM_FEE_PER_BYTE,
+                "long_term_fee_per_byte": LONG_TERM_FEE_PER_BYTE,
+                "change_output_size_in_bytes": CHANGE_OUTPUT_SIZE_IN_BYTES,
+                "change_spend_size_in_bytes": CHANGE_SPEND_SIZE_IN_BYTES,
+                "not_input_size_in_bytes": NOT_INPUT_SIZE_IN_BYTES,
+                "time_budget": time_budget,
+            }
+            start = time.perf_counter()
+            writer.write(json.dumps(request).encode("utf-8") + b"\n")
+            await writer.drain()
+            response = json.loads(await reader.readline())
+            latencies.append(time.perf_counter() - start)
+            if "error" in response:
+                raise RuntimeError(response["error"])
+    finally:
+        writer.close()
+
+
+async def request(path: str, message: dict) -> dict:
+    reader, writer = await asyncio.open_unix_connection(path)
+    try:
+        writer.write(json.dumps(message).encode("utf-8") + b"\n")
+        await writer.drain()
+        return json.loads(await reader.readline())
+    finally:
+        writer.close()
+
+
+async def run_load_test(args: argparse.Namespace) -> dict:
+    rng = random.Random(args.seed)
+    amounts, _ = DISTRIBUTIONS[args.distribution](rng, args.size)
+    records = [
+        ["{:064x}".format(i), 0, amount, INPUT_BYTES, "address_{}".format(i)]
+        for i, amount in enumerate(amounts)
+    ]
+
+    server = listener = None
+    path = args.unix_socket
+    if path is None:
+        server = SelectionServer(batch_window=args.batch_window, max_batch_size=args.max_batch_size)
+        path = os.path.join(tempfile.mkdtemp(), "selection.sock")
+        listener = await server.start_unix_server(path)
+    try:
+        await request(path, {"method": "load_wallet", "wallet": WALLET, "records": records})
+        latencies: List[float] = []
+        start = time.perf_counter()
+        await asyncio.gather(*[
+            run_client(path, payment_targets(rng, amounts, args.requests), args.time_budget, latencies)
+            for _ in range(args.clients)
+        ])
+        elapsed = time.perf_counter() - start
+        server_stats = (await request(path, {"method": "stats"}))["result"]
+    finally:
+        if listener is not None:
+            listener.close()
+            await server.close()
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "seconds": elapsed,
+        "requests_per_second": len(latencies) / elapsed,
+        "latency_p50": percentile(latencies, 0.5),
+        "latency_p99": percentile(latencies, 0.99),
+        "server": server_stats,
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Load test for the selection server")
+    parser.add_argument("--unix-socket", help="Socket of a running server, by default one is started here")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=100, help="Requests per client")
+    parser.add_argument("--distribution", choices=list(DISTRIBUTIONS), default="exponential")
+    parser.add_argument("--size", type=int, default=1000, help="Utxos in the wallet")
+    parser.add_argument("--time-budget", type=float, default=None, help="Seconds per selection")
+    parser.add_argument("--batch-window", type=float, default=0.002)
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run_load_test(args))
+    print("{requests} requests in {seconds:.2f}s, {requests_per_second:.0f}/s, "
+          "p50 {latency_p50:.4f}s p99 {latency_p99:.4f}s".format(**results))
+    print("server: {}".format(json.dumps(results["server"], sort_keys=True)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import atexit
+import random
+
+from concurrent.futures import FIRST_COMPLETED, Executor, ProcessPoolExecutor, wait
+from typing import Optional
+
+from bitcoin_coin_selection.selection_algorithms.branch_and_bound import select_coins_branch_and_bound
+from bitcoin_coin_selection.selection_algorithms.knapsack_solver import select_coins_knapsack_solver
+from bitcoin_coin_selection.selection_algorithms.select_coins import check_params
+from bitcoin_coin_selection.selection_algorithms.single_random_draw import select_coins_single_random_draw
+from bitcoin_coin_selection.selection_types.coin_selection import CoinSelection
+from bitcoin_coin_selection.selection_types.coin_selection_params import CoinSelectionParams
+
+
+# In order of preference when two selections are equally wasteful
+RACED_ALGORITHMS = [
+    select_coins_branch_and_bound,
+    select_coins_knapsack_solver,
+    select_coins_single_random_draw,
+]
+
+_default_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_default_executor() -> ProcessPoolExecutor:
+    # Shut down at exit, or earlier through shutdown_default_executor
+    global _default_executor
+    if _default_executor is None:
+        # Reseed in each worker, or forked workers would all share the parent's
+        # random sequence
+        _default_executor = ProcessPoolExecutor(
+            max_workers=len(RACED_ALGORITHMS), initializer=random.seed
+        )
+        atexit.register(shutdown_default_executor)
+    return _default_executor
+
+
+def shutdown_default_executor(wait: bool = True):
+    # Stops the default executor's workers; the next race starts new ones
+    global _default_executor
+    if _default_executor is not None:
+        executor, _default_executor = _default_executor, None
+        atexit.unregister(shutdown_default_executor)
+        executor.shutdown(wait=wait)
+
+
+def select_coins_race(
+    params: CoinSelectionParams,
+    executor: Optional[Executor] = None,
+    cancel_on_exact_match: bool = True
+) -> CoinSelection:
+    # Runs branch and bound, knapsack and single random draw concurrently and
+    # returns the successful selection with the least waste, rather than the
+    # first success of the select_coins cascade. Pass an executor of your own
+    # (with at least three workers, or the algorithms take turns) to control
+    # its lifetime; the default one lives until exit.
+    # With cancel_on_exact_match, a branch and bound selection with no waste is
+    # returned as soon as it arrives, without waiting on the other algorithms.
+    # Those still queued (on an executor without a free worker for each) are
+    # cancelled, but running workers can't be interrupted: they run to the end
+    # and their results are dropped, and the executor's next tasks wait for
+    # them. On the default executor all three always start, so an early return
+    # saves the caller's wait, not the workers' time
+    invalid_selection = check_params(params)
+    if invalid_selection:
+        return invalid_selection
+
+    if executor is None:
+        executor = get_default_executor()
+    futures = [executor.submit(algorithm, params) for algorithm in RACED_ALGORITHMS]
+    # Waste can only go negative when the long term fee rate is the higher one,
+    # otherwise no selection can beat one with zero waste
+    can_stop_early = (
+        cancel_on_exact_match
+        and params.short_term_fee_per_byte >= params.long_term_fee_per_byte
+    )
+
+    pending = set(futures)
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        if can_stop_early and futures[0] in done:
+            bnb_selection = futures[0].result()
+            if bnb_selection.outcome == CoinSelection.Outcome.SUCCESS and bnb_selection.waste == 0:
+                for future in pending:
+                    future.cancel()
+                return bnb_selection
+
+    best_selection = None
+    for future in futures:
+        selection = future.result()
+        if selection.outcome != CoinSelection.Outcome.SUCCESS:
+            continue
+        if best_selection is None or selection.waste < best_selection.waste:
+            best_selection = selection
+    if best_selection is None:
+        return CoinSelection.algorithm_failure(params)
+    return best_selection
@@ -0,0 +1,156 @@
+import asyncio
+import functools
+import os
+import time
+
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Optional
+
+from bitcoin_coin_selection.selection_algorithms.select_coins import select_coins
+from bitcoin_coin_selection.selection_types.coin_selection import CoinSelection
+from bitcoin_coin_selection.selection_types.coin_selection_params import CoinSelectionParams
+
+"""
+Coin selection from asyncio code
+
+select_coins is CPU bound and would block the event loop for as long as it
+runs, so these run it in an executor and await the result:
+
+    selector = AsyncCoinSelector(ProcessPoolExecutor(), max_concurrency=4)
+    selection = await selector.select_coins(params, timeout=0.5)
+
+The selections are select_coins' own. A timeout becomes select_coins'
+deadline, so a selection that runs out of time still returns the best it has
+(flagged with budget_exhausted) rather than raising. Time spent waiting for
+a free slot counts against it, and a selection still waiting when its time
+is up is not started at all: it comes back as an ALGORITHM_FAILURE flagged
+with budget_exhausted. Cancelling the awaiting task drops a selection
+that hasn't started, one already running in a worker finishes and is
+discarded (and keeps its slot until then).
+
+With a thread executor (the default), selections from one pool run
+concurrently must share a fee rate: params repricing the pool would do so
+under a running selection. A process executor works on pickled copies, at
+the cost of sending the pool with every call.
+"""
+
+DEFAULT_MAX_CONCURRENCY = os.cpu_count() or 1
+
+
+async def async_select_coins(
+    params: CoinSelectionParams,
+    executor: Optional[Executor] = None,
+    time_budget: Optional[float] = None,
+    deadline: Optional[float] = None
+) -> CoinSelection:
+    # select_coins in executor (the loop's default executor if None). The
+    # time_budget counts from this call, not from when a worker picks it up
+    if time_budget is not None:
+        budget_deadline = time.monotonic() + time_budget
+        deadline = budget_deadline if deadline is None else min(deadline, budget_deadline)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        executor,
+        functools.partial(select_coins, params, deadline=deadline)
+    )
+
+
+class AsyncCoinSelector():
+    # Most selections running at once, later ones wait for a free slot
+    max_concurrency: int
+    # Default timeout in seconds for each call, None for no timeout
+    timeout: Optional[float]
+    # Selections currently in a worker
+    running: int
+
+    def __init__(
+        self,
+        executor: Optional[Executor] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        timeout: Optional[float] = None
+    ):
+        # Without an executor the selector runs its own pool of
+        # max_concurrency threads, shut down by shutdown()
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1, got {}".format(max_concurrency))
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.running = 0
+        self._executor = executor
+        self._owns_executor = executor is None
+        # Created on first use, in the loop it is used from
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+        return self._executor
+
+    async def select_coins(
+        self,
+        params: CoinSelectionParams,
+        time_budget: Optional[float] = None,
+        deadline: Optional[float] = None,
+        timeout: Optional[float] = None
+    ) -> CoinSelection:
+        # time_budget and deadline as for select_coins, and timeout (or the
+        # selector's default) in seconds; whichever ends first applies. All
+        # of them count from this call, not from when a worker is free
+        if timeout is None:
+            timeout = self.timeout
+        now = time.monotonic()
+        for budget in [time_budget, timeout]:
+            if budget is not None:
+                deadline = now + budget if deadline is None else min(deadline, now + budget)
+
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        semaphore = self._semaphore
+        if deadline is None:
+            await semaphore.acquire()
+        else:
+            # The wait for a slot comes out of the same time, and a selection
+            # whose time ran out in the queue fails without being started
+            try:
+                await asyncio.wait_for(semaphore.acquire(), max(deadline - time.monotonic(), 0))
+            except asyncio.TimeoutError:
+                return self._out_of_time(params)
+            if time.monotonic() >= deadline:
+                semaphore.release()
+                return self._out_of_time(params)
+        try:
+            concurrent_future = self.executor.submit(select_coins, params, deadline=deadline)
+        except BaseException:
+            semaphore.release()
+            raise
+        self.running += 1
+
+        def release():
+            self.running -= 1
+            semaphore.release()
+
+        def on_done(_):
+            try:
+                loop.call_soon_threadsafe(release)
+            except RuntimeError:
+                # The loop has been closed, and its slots with it
+                pass
+
+        # The slot is held until the worker is done with the selection, even
+        # if the awaiting task was cancelled before then
+        concurrent_future.add_done_callback(on_done)
+        return await asyncio.wrap_future(concurrent_future, loop=loop)
+
+    @staticmethod
+    def _out_of_time(params: CoinSelectionParams) -> CoinSelection:
+        selection = CoinSelection.algorithm_failure(params)
+        selection.budget_exhausted = True
+        return selection
+
+    def shutdown(self, wait: bool = True):
+        # Shuts down the selector's own thread pool, not one it was given
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
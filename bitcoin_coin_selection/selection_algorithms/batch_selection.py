@@ -0,0 +1,130 @@
+import random
+
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from bitcoin_coin_selection.selection_algorithms.select_coins import select_coins
+from bitcoin_coin_selection.selection_types.coin_selection import CoinSelection
+from bitcoin_coin_selection.selection_types.coin_selection_params import CoinSelectionParams
+from bitcoin_coin_selection.selection_types.output_group import OutputGroup
+from bitcoin_coin_selection.selection_types.utxo_pool import UtxoPool
+from bitcoin_coin_selection.selection_types.wallet_pool import WalletPool
+
+
+# Most jobs sent to a worker in one task. Jobs of a task share a pool and fee
+# rate, so the pool is pickled and repriced once per task rather than per job
+DEFAULT_CHUNK_SIZE = 64
+
+
+class SelectionJob(NamedTuple):
+    # Same arguments as CoinSelectionParams
+    utxo_pool: Union[List[OutputGroup], UtxoPool, WalletPool]
+    target_value: int
+    short_term_fee_per_byte: int
+    long_term_fee_per_byte: int
+    change_output_size_in_bytes: int
+    change_spend_size_in_bytes: int
+    not_input_size_in_bytes: int
+
+
+# (job index, target_value, change_output_size_in_bytes,
+#  change_spend_size_in_bytes, not_input_size_in_bytes)
+_ChunkJob = Tuple[int, int, int, int, int]
+
+_default_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_default_executor() -> ProcessPoolExecutor:
+    global _default_executor
+    if _default_executor is None:
+        # One worker per core; reseeded so workers don't share a random sequence
+        _default_executor = ProcessPoolExecutor(initializer=random.seed)
+    return _default_executor
+
+
+def select_coins_batch(
+    jobs: Iterable[SelectionJob],
+    executor: Optional[Executor] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> List[CoinSelection]:
+    # Runs select_coins for every job and returns the selections in job order
+    jobs = list(jobs)
+    selections: List[Optional[CoinSelection]] = [None] * len(jobs)
+    for index, selection in select_coins_batch_as_completed(jobs, executor, chunk_size):
+        selections[index] = selection
+    return selections
+
+
+def select_coins_batch_as_completed(
+    jobs: Iterable[SelectionJob],
+    executor: Optional[Executor] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[Tuple[int, CoinSelection]]:
+    # Yields (job index, selection) pairs as the workers finish them.
+    # Every task works on its own (pickled) copy of a pool, so the executor
+    # should be process based: on a thread pool, a pool shared by jobs at
+    # different fee rates would be repriced under another thread's feet
+    if executor is None:
+        executor = get_default_executor()
+    futures = [
+        executor.submit(_select_coins_chunk, utxo_pool, short_term_fee, long_term_fee, chunk)
+        for utxo_pool, short_term_fee, long_term_fee, chunk in _chunk_jobs(jobs, chunk_size)
+    ]
+    for future in as_completed(futures):
+        yield from future.result()
+
+
+def _chunk_jobs(
+    jobs: Iterable[SelectionJob],
+    chunk_size: int
+) -> Iterator[Tuple[Union[UtxoPool, WalletPool], int, int, List[_ChunkJob]]]:
+    # Groups the jobs by pool (by identity) and fee rate
+    pools: Dict[int, Union[UtxoPool, WalletPool]] = {}
+    # The jobs' own pools, kept alive so that their ids aren't reused
+    job_pools = []
+    groups: Dict[Tuple[int, int, int], List[_ChunkJob]] = {}
+    for index, job in enumerate(jobs):
+        job = SelectionJob(*job)
+        pool_id = id(job.utxo_pool)
+        if pool_id not in pools:
+            job_pools.append(job.utxo_pool)
+            # Lists of OutputGroups are converted once, not once per job, and
+            # without their objects: the chunks are pickled to the workers
+            if isinstance(job.utxo_pool, (UtxoPool, WalletPool)):
+                pools[pool_id] = job.utxo_pool
+            else:
+                pools[pool_id] = UtxoPool.from_output_groups(job.utxo_pool, keep_objects=False)
+        key = (pool_id, job.short_term_fee_per_byte, job.long_term_fee_per_byte)
+        groups.setdefault(key, []).append((
+            index,
+            job.target_value,
+            job.change_output_size_in_bytes,
+            job.change_spend_size_in_bytes,
+            job.not_input_size_in_bytes,
+        ))
+    for (pool_id, short_term_fee, long_term_fee), group in groups.items():
+        for start in range(0, len(group), chunk_size):
+            yield pools[pool_id], short_term_fee, long_term_fee, group[start:start + chunk_size]
+
+
+def _select_coins_chunk(
+    utxo_pool: Union[UtxoPool, WalletPool],
+    short_term_fee_per_byte: int,
+    long_term_fee_per_byte: int,
+    jobs: List[_ChunkJob]
+) -> List[Tuple[int, CoinSelection]]:
+    # The pool is priced by the first job's params; it is already at the
+    # right fee rate for the rest, so their set_fee calls are no-ops
+    selections = []
+    for index, target_value, change_output_size, change_spend_size, not_input_size in jobs:
+        params = CoinSelectionParams(
+            utxo_pool,
+            target_value,
+            short_term_fee_per_byte,
+            long_term_fee_per_byte,
+            change_output_size,
+            change_spend_size,
+            not_input_size
+        )
+        selections.append((index, select_coins(params)))
+    return selections
@@ -1,37 +1,213 @@
-from typing import List
+import time
 
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from bitcoin_coin_selection.selection_algorithms.instrumentation import current_stats, instrumented
 from bitcoin_coin_selection.selection_types.change_constants import MAX_MONEY
-from bitcoin_coin_selection.selection_types.output_group import OutputGroup
 from bitcoin_coin_selection.selection_types.coin_selection import CoinSelection
 from bitcoin_coin_selection.selection_types.coin_selection_params import CoinSelectionParams
 
 
 TOTAL_TRIES = 100000
+# How many tries to go between looking at the clock when given a deadline
+DEADLINE_CHECK_INTERVAL = 256
+# Past selections a BranchAndBoundSession tries as starting points
+MAX_REMEMBERED_SELECTIONS = 16
+
+# (selection bitset, depth, value, waste) of a point on the search path
+_Branch = Tuple[int, int, int, int]
 
 
+@instrumented("branch_and_bound")
 def select_coins_branch_and_bound(
-    params: CoinSelectionParams
+    params: CoinSelectionParams,
+    total_tries: int = TOTAL_TRIES,
+    deadline: Optional[float] = None,
+    warm_start: Optional[Sequence[int]] = None
+) -> CoinSelection:
+    # deadline is a time.monotonic() timestamp after which the search stops
+    # and returns the best selection found so far.
+    # warm_start is a selection (indices into params.pool) to start from, e.g.
+    # the solution for a nearby fee rate: if it is in range its waste bounds
+    # the search from the start, and it is returned unless something better is found
+    return _search(
+        params, _SortedPool(params.pool), total_tries, deadline, [warm_start] if warm_start else []
+    )
+
+
+class BranchAndBoundSession():
+    # Branch and bound for a run of searches on one pool at one fee rate, e.g.
+    # re-quoting a payment as its amount is typed. The sorted pool and its
+    # bounds are kept between searches, and the selections found so far seed
+    # the next search: the best of them still in range bounds it from the start.
+    # Searches on another pool or fee rate, or after the pool changed, start over
+    max_remembered: int
+
+    def __init__(self, max_remembered: int = MAX_REMEMBERED_SELECTIONS):
+        self.max_remembered = max_remembered
+        self._key: Optional[Tuple[int, int, int]] = None
+        self._utxo_pool = None
+        self._sorted_pool: Optional[_SortedPool] = None
+        # Pool indices of past selections, most recent last
+        self._selections: Deque[List[int]] = deque(maxlen=max_remembered)
+
+    @instrumented("branch_and_bound")
+    def select_coins(
+        self,
+        params: CoinSelectionParams,
+        total_tries: int = TOTAL_TRIES,
+        deadline: Optional[float] = None
+    ) -> CoinSelection:
+        key = (params.short_term_fee_per_byte, params.long_term_fee_per_byte, params.pool.fingerprint)
+        # The caller's pool object: a list of OutputGroups is converted anew
+        # for every CoinSelectionParams, into a pool with the same indices
+        if params.utxo_pool is not self._utxo_pool or key != self._key:
+            self._utxo_pool = params.utxo_pool
+            self._key = key
+            self._sorted_pool = _SortedPool(params.pool)
+            self._selections.clear()
+        selection = _search(params, self._sorted_pool, total_tries, deadline, self._selections)
+        if selection.outcome == CoinSelection.Outcome.SUCCESS and selection.pool_indices not in self._selections:
+            self._selections.append(selection.pool_indices)
+        return selection
+
+
+class _SortedPool():
+    # What branch and bound needs of a pool at a fee rate, in search order
+    def __init__(self, pool):
+        # Indices into the pool, sorted by descending effective value
+        self.utxo_pool = pool.sorted_by_effective_value()
+        self.effective_values = [pool.group_effective_values[i] for i in self.utxo_pool]
+        self.fees = [pool.group_fees[i] for i in self.utxo_pool]
+        # Waste of each utxo, i.e. fee - long_term_fee
+        self.wastes = [self.fees[k] - pool.group_long_term_fees[i] for k, i in enumerate(self.utxo_pool)]
+        self.available_values = _suffix_sums(self.effective_values)
+        self.waste_lower_bounds = _waste_lower_bounds(self.wastes)
+        self.next_distinct = _next_distinct(self.effective_values, self.fees)
+        # Position of each pool index in utxo_pool, built for warm starts
+        self._positions: Optional[Dict[int, int]] = None
+
+    def positions(self) -> Dict[int, int]:
+        if self._positions is None:
+            self._positions = {i: k for k, i in enumerate(self.utxo_pool)}
+        return self._positions
+
+    def pool_indices(self, selection: int) -> List[int]:
+        # Pool indices of the utxos in a search path bitset
+        return [self.utxo_pool[k] for k in range(selection.bit_length()) if selection >> k & 1]
+
+
+def _search(
+    params: CoinSelectionParams,
+    sorted_pool: _SortedPool,
+    total_tries: int,
+    deadline: Optional[float],
+    warm_starts: Iterable[Sequence[int]]
 ) -> CoinSelection:
-    utxo_pool = params.utxo_pool
     target_after_fixed_fees = params.target_value + params.fixed_fee
-    current_value = 0
-    current_selection: List[bool] = []
-    current_available_value = params.total_effective_value
-    current_waste = 0
+    upper_bound = target_after_fixed_fees + params.cost_of_change
     best_waste = MAX_MONEY
-    best_selection: List[bool] = []
-    utxo_pool.sort(reverse=True)
+    best_selection = None
+    for warm_start in warm_starts:
+        waste, selection = _warm_start_bound(
+            params.pool, sorted_pool, warm_start, target_after_fixed_fees, upper_bound
+        )
+        if waste < best_waste:
+            best_waste, best_selection = waste, selection
+
+    result = _branch_and_bound(
+        sorted_pool, target_after_fixed_fees, upper_bound, total_tries, deadline, best_waste, best_selection
+    )
+
+    # Check for solution
+    if result.best_selection is None:
+        selection = CoinSelection.algorithm_failure(params)
+    else:
+        selection = CoinSelection.from_pool_indices(params, sorted_pool.pool_indices(result.best_selection))
+    selection.budget_exhausted = result.budget_exhausted
+    selection.search_incomplete = result.budget_exhausted or result.tries_exhausted
+    stats = current_stats()
+    if stats is not None:
+        stats.iterations = result.tries
+        stats.backtracks = result.backtracks
+        stats.equal_value_skips = result.equal_value_skips
+        stats.tries_exhausted = result.tries_exhausted
+    return selection
+
 
-    for i in range(TOTAL_TRIES):
+class _SearchResult(NamedTuple):
+    best_waste: int
+    # Bitset over the sorted pool, None if nothing was found
+    best_selection: Optional[int]
+    tries: int
+    backtracks: int
+    equal_value_skips: int
+    budget_exhausted: bool
+    tries_exhausted: bool
+
+
+def _branch_and_bound(
+    sorted_pool: _SortedPool,
+    target_after_fixed_fees: int,
+    upper_bound: int,
+    total_tries: int,
+    deadline: Optional[float],
+    best_waste: int = MAX_MONEY,
+    best_selection: Optional[int] = None,
+    start: _Branch = (0, 0, 0, 0),
+    share_bound: Optional[Callable[[int], Optional[int]]] = None,
+    stop_at_zero_waste: bool = True
+) -> _SearchResult:
+    # Searches the subtree below start, a (selection, depth, value, waste)
+    # state of the search path: the utxos before depth stay as they are.
+    # share_bound is called with the best waste every DEADLINE_CHECK_INTERVAL
+    # tries and returns a (lower) bound found elsewhere to prune with, or None
+    # to stop searching.
+    # The search stops at the first selection with no waste unless told not
+    # to; waste can still go down from there when the long term fee rate is
+    # the higher one
+    effective_values = sorted_pool.effective_values
+    fees = sorted_pool.fees
+    wastes = sorted_pool.wastes
+    available_values = sorted_pool.available_values
+    waste_lower_bounds = sorted_pool.waste_lower_bounds
+    next_distinct = sorted_pool.next_distinct
+
+    # The search path is an integer bitset: bit k is set if utxo_pool[k] is
+    # included, and depth is the number of utxos decided on so far
+    current_selection, depth, current_value, current_waste = start
+    start_depth = depth
+    checks_due = deadline is not None or share_bound is not None
+    budget_exhausted = False
+    tries_exhausted = False
+    backtracks = 0
+    equal_value_skips = 0
+
+    # Index of the last try, i + 1 tries are used in the end
+    i = -1
+    # Nothing beats a warm start with no waste, so there is no need to search
+    if stop_at_zero_waste and best_waste == 0:
+        total_tries = 0
+    for i in range(total_tries):
+        if checks_due and i % DEADLINE_CHECK_INTERVAL == 0:
+            if deadline is not None and time.monotonic() > deadline:
+                budget_exhausted = True
+                break
+            if share_bound is not None:
+                bound = share_bound(best_waste)
+                if bound is None:
+                    break
+                if bound < best_waste:
+                    best_waste = bound
+                    best_selection = None
         should_backtrack = False
 
         if (
-            # Cannot possibly reach target with the amount remaining in the curr_available_value
-            (current_value + current_available_value < target_after_fixed_fees)
+            # Cannot possibly reach target with the amount remaining in the pool
+            (current_value + available_values[depth] < target_after_fixed_fees)
             # Selected value is out of range, go back and try other branch
-            or (current_value > target_after_fixed_fees + params.cost_of_change)
-            # Don't select things which we know will be more wasteful if the waste is increasing
-            or (current_waste > best_waste and utxo_pool[0].fee - utxo_pool[0].long_term_fee > 0)
+            or (current_value > upper_bound)
         ):
             should_backtrack = True
         # Selected value is within range
@@ -41,58 +217,123 @@ def select_coins_branch_and_bound(
             # However we are not going to explore that because this optimization for the waste is only done when we have hit our target
             # value. Adding any more UTXOs will be just burning the UTXO; it will go entirely to fees. Thus we aren't going to
             # explore any more UTXOs to avoid burning money like that.
-
-            current_waste += (current_value - target_after_fixed_fees)
-            if current_waste <= best_waste:
-                best_selection = current_selection.copy()
-                best_waste = current_waste
-                if (best_waste == 0):
-                    return CoinSelection.from_utxo_pool(params, params.utxo_pool, best_selection)
-            # Remove the excess value as we will be selecting different coins now
-            current_waste -= (current_value - target_after_fixed_fees)
+            waste = current_waste + (current_value - target_after_fixed_fees)
+            if waste <= best_waste:
+                best_selection = current_selection
+                best_waste = waste
+                if (best_waste == 0 and stop_at_zero_waste):
+                    break
+            should_backtrack = True
+        # Don't explore a branch if every way of completing it is more wasteful
+        # than the best selection so far
+        elif current_waste + waste_lower_bounds[depth] > best_waste:
             should_backtrack = True
+
         # Backtracking, moving backwards
         if should_backtrack:
-            # Walk backwards to find the last included UTXO
-            # that still needs to have its omission branch traversed
-            while len(current_selection) > 0 and current_selection[-1] == False:
-                current_selection.pop()
-                current_available_value += utxo_pool[len(
-                    current_selection)].effective_value
-            if len(current_selection) == 0:
+            backtracks += 1
+            # Walk backwards to the last included UTXO, which still needs to
+            # have its omission branch traversed
+            depth = current_selection.bit_length()
+            if depth <= start_depth:
                 # We have walked back to the first utxo and no branch is untraversed.
                 # All solutions searched
                 break
 
             # Output was included on previous iterations, try excluding now
-            current_selection[-1] = False
-            utxo: OutputGroup = utxo_pool[len(current_selection)-1]
-            current_value -= utxo.effective_value
-            current_waste -= (utxo.fee - utxo.long_term_fee)
+            current_selection ^= 1 << (depth - 1)
+            current_value -= effective_values[depth - 1]
+            current_waste -= wastes[depth - 1]
         # Moving forwards, continuing down this branch
         else:
-            utxo = utxo_pool[len(current_selection)]
-            current_available_value -= utxo.effective_value
             # Avoid searching a branch if the previous UTXO has the same value and
             # same waste and was excluded. Since the ratio of fee to long term fee
             # is the same, we only need to check if one of those values match in
-            # order to know that the waste is the same
+            # order to know that the waste is the same. The same then holds for
+            # the whole run of such UTXOs, so they are all skipped at once
             if (
-                len(current_selection) > 0
-                and current_selection[-1] == False
-                and utxo.effective_value == utxo_pool[len(current_selection) - 1].effective_value
-                and utxo.fee == utxo_pool[len(current_selection) - 1].fee
+                depth > 0
+                and not current_selection >> (depth - 1) & 1
+                and effective_values[depth] == effective_values[depth - 1]
+                and fees[depth] == fees[depth - 1]
             ):
-                current_selection.append(False)
+                depth = next_distinct[depth]
+                equal_value_skips += 1
+            # Including this UTXO overshoots the target range, so its inclusion
+            # branch would be backtracked out of straight away
+            elif current_value + effective_values[depth] > upper_bound:
+                depth += 1
             else:
                 # Inclusion branch first (Largest First Exploration)
-                current_selection.append(True)
-                current_value += utxo.effective_value
-                current_waste += (utxo.fee - utxo.long_term_fee)
+                current_selection |= 1 << depth
+                current_value += effective_values[depth]
+                current_waste += wastes[depth]
+                depth += 1
+    else:
+        # A bound taken from share_bound isn't a selection of this search
+        tries_exhausted = not (stop_at_zero_waste and best_waste == 0 and best_selection is not None)
 
-    # Check for solution
-    if len(best_selection) == 0:
-        return CoinSelection.algorithm_failure(params)
+    return _SearchResult(
+        best_waste, best_selection, i + 1, backtracks, equal_value_skips, budget_exhausted, tries_exhausted
+    )
 
-    # Set output set
-    return CoinSelection.from_utxo_pool(params, params.utxo_pool, best_selection)
+
+def _warm_start_bound(
+    pool,
+    sorted_pool: _SortedPool,
+    warm_start: Sequence[int],
+    target_after_fixed_fees: int,
+    upper_bound: int
+) -> Tuple[int, int]:
+    # (waste, selection bitset) of warm_start, or (MAX_MONEY, 0) if it doesn't
+    # make a valid selection at the current fee rate and target
+    positions = sorted_pool.positions()
+    value = 0
+    waste = 0
+    selection = 0
+    for i in warm_start:
+        if pool.group_effective_values[i] <= 0:
+            return MAX_MONEY, 0
+        k = positions[i]
+        selection |= 1 << k
+        value += pool.group_effective_values[i]
+        waste += sorted_pool.wastes[k]
+    if not target_after_fixed_fees <= value <= upper_bound:
+        return MAX_MONEY, 0
+    return waste + value - target_after_fixed_fees, selection
+
+
+def _suffix_sums(values: List[int]) -> List[int]:
+    # suffix_sums[k] is the sum of values[k:]
+    suffix_sums = [0] * (len(values) + 1)
+    for k in range(len(values) - 1, -1, -1):
+        suffix_sums[k] = suffix_sums[k + 1] + values[k]
+    return suffix_sums
+
+
+def _waste_lower_bounds(wastes: List[int]) -> List[int]:
+    # Lower bound on the waste that must still be added to a selection
+    # which hasn't reached the target after deciding on wastes[:k]:
+    # at least one more UTXO is needed, so if no remaining waste is
+    # negative that is the smallest remaining waste, otherwise the
+    # most the remaining UTXOs could take off is all their negative wastes
+    lower_bounds = [0] * (len(wastes) + 1)
+    smallest_waste = MAX_MONEY
+    negative_wastes = 0
+    for k in range(len(wastes) - 1, -1, -1):
+        smallest_waste = min(smallest_waste, wastes[k])
+        negative_wastes += min(wastes[k], 0)
+        lower_bounds[k] = smallest_waste if smallest_waste >= 0 else negative_wastes
+    return lower_bounds
+
+
+def _next_distinct(effective_values: List[int], fees: List[int]) -> List[int]:
+    # next_distinct[k] is the first index after k whose UTXO differs from
+    # utxo k in effective value or fee
+    next_distinct = [len(effective_values)] * len(effective_values)
+    for k in range(len(effective_values) - 2, -1, -1):
+        if effective_values[k + 1] == effective_values[k] and fees[k + 1] == fees[k]:
+            next_distinct[k] = next_distinct[k + 1]
+        else:
+            next_distinct[k] = k + 1
+    return next_distinct
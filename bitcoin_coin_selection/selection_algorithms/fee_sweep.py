@@ -0,0 +1,49 @@
+from typing import Dict, Iterable, List, Optional, Union
+
+from bitcoin_coin_selection.selection_algorithms.select_coins import select_coins
+from bitcoin_coin_selection.selection_types.coin_selection import CoinSelection
+from bitcoin_coin_selection.selection_types.coin_selection_params import CoinSelectionParams
+from bitcoin_coin_selection.selection_types.output_group import OutputGroup
+from bitcoin_coin_selection.selection_types.utxo_pool import UtxoPool
+from bitcoin_coin_selection.selection_types.wallet_pool import WalletPool
+
+
+def select_coins_fee_sweep(
+    utxo_pool: Union[List[OutputGroup], UtxoPool, WalletPool],
+    target_value: int,
+    short_term_fee_rates: Iterable[int],
+    long_term_fee_per_byte: int,
+    change_output_size_in_bytes: int,
+    change_spend_size_in_bytes: int,
+    not_input_size_in_bytes: int
+) -> Dict[int, CoinSelection]:
+    # select_coins at each short term fee rate, e.g. for a fee slider.
+    # One pool serves every rate: a list of OutputGroups is converted once
+    # and each rate only reprices it (once per input size class). Rates are
+    # swept in increasing order, each warm starting branch and bound with the
+    # previous rate's selection, whose waste often bounds the search straight
+    # away since nearby fee rates tend to have similar solutions
+    if not isinstance(utxo_pool, (UtxoPool, WalletPool)):
+        # Fresh objects, as the caller's would be repriced by every selection
+        utxo_pool = UtxoPool.from_output_groups(utxo_pool, keep_objects=False)
+
+    selections: Dict[int, CoinSelection] = {}
+    warm_start: Optional[List[int]] = None
+    for fee_rate in sorted(set(short_term_fee_rates)):
+        params = CoinSelectionParams(
+            utxo_pool,
+            target_value,
+            fee_rate,
+            long_term_fee_per_byte,
+            change_output_size_in_bytes,
+            change_spend_size_in_bytes,
+            not_input_size_in_bytes
+        )
+        selection = select_coins(params, warm_start=warm_start)
+        # The next rate reprices the pool, and a WalletPool may change
+        # before the caller reads the outputs
+        selection.materialize()
+        if selection.outcome == CoinSelection.Outcome.SUCCESS and selection.pool_indices is not None:
+            warm_start = selection.pool_indices
+        selections[fee_rate] = selection
+    return selections
@@ -0,0 +1,88 @@
+import functools
+import time
+
+from contextvars import ContextVar
+from typing import Callable, List, Optional
+
+from bitcoin_coin_selection.selection_types.coin_selection import CoinSelection
+from bitcoin_coin_selection.selection_types.selection_stats import SelectionStats
+
+"""
+Opt-in statistics for the selection algorithms
+
+While stats are being collected (collect_stats(True), or while any hook is
+registered) every selection returned by an algorithm carries a SelectionStats
+in its stats attribute, and every registered hook is called with it, e.g. to
+feed a metrics pipeline:
+
+    register_hook(lambda stats, selection: histogram.observe(stats.wall_time))
+
+Otherwise selection.stats is None and the algorithms only pay for a flag check.
+Collection is per process: algorithms run in worker processes (see
+select_coins_race and select_coins_batch) only collect if the workers enable it.
+"""
+
+StatsHook = Callable[[SelectionStats, CoinSelection], None]
+
+_hooks: List[StatsHook] = []
+_collect_stats = False
+# Stats of the innermost instrumented algorithm currently running
+_current_stats: ContextVar = ContextVar("current_stats", default=None)
+
+
+def collect_stats(enabled: bool = True):
+    global _collect_stats
+    _collect_stats = enabled
+
+
+def is_collecting_stats() -> bool:
+    return _collect_stats or bool(_hooks)
+
+
+def register_hook(hook: StatsHook) -> StatsHook:
+    _hooks.append(hook)
+    return hook
+
+
+def unregister_hook(hook: StatsHook):
+    _hooks.remove(hook)
+
+
+def current_stats() -> Optional[SelectionStats]:
+    # For the algorithms to fill in their counters, None when not collecting
+    return _current_stats.get()
+
+
+def instrumented(algorithm: str):
+    # Decorates a selection algorithm so that the selections it returns are
+    # named after it and, while collecting, it is timed and its stats are
+    # attached to the selection and passed to the hooks
+    def decorator(select: Callable[..., CoinSelection]) -> Callable[..., CoinSelection]:
+        @functools.wraps(select)
+        def instrumented_select(*args, **kwargs) -> CoinSelection:
+            if not is_collecting_stats():
+                selection = select(*args, **kwargs)
+                _set_algorithm(selection, algorithm)
+                return selection
+            stats = SelectionStats(algorithm)
+            token = _current_stats.set(stats)
+            start = time.perf_counter()
+            try:
+                selection = select(*args, **kwargs)
+            finally:
+                stats.wall_time = time.perf_counter() - start
+                _current_stats.reset(token)
+            _set_algorithm(selection, algorithm)
+            selection.stats = stats
+            for hook in list(_hooks):
+                hook(stats, selection)
+            return selection
+        return instrumented_select
+    return decorator
+
+
+def _set_algorithm(selection: CoinSelection, algorithm: str):
+    # Innermost algorithm wins: select_coins only names the selections it
+    # made itself (i.e. failed parameter checks)
+    if selection.algorithm is None:
+        selection.algorithm = algorithm
@@ -1,125 +1,251 @@
 import random
+import time
 
-from typing import List, Optional
+from bisect import bisect_left
+from itertools import accumulate, compress, count, islice
+from typing import Iterator, List, Optional, Tuple
 
+from bitcoin_coin_selection.selection_algorithms.instrumentation import current_stats, instrumented
 from bitcoin_coin_selection.selection_types.change_constants import MIN_CHANGE
 from bitcoin_coin_selection.selection_types.coin_selection import CoinSelection
 
-from bitcoin_coin_selection.selection_types.output_group import OutputGroup
 from bitcoin_coin_selection.selection_types.coin_selection_params import CoinSelectionParams
 
 
 DEFAULT_ITERATIONS = 1000
 
+# A candidate subset found by _walk_pass, kept in compact form and only expanded
+# into indices once it turns out to be the final answer:
+# (inclusion mask, pass number, rank of the output group that reached the target
+#  among those walked in that pass, [start, end) rank ranges taken back out before it)
+_Subset = Tuple[bytes, int, int, List[Tuple[int, int]]]
+
+# Iterations whose coin flips are drawn at once, bounded by the block size in bytes
+ITERATION_BLOCK = 64
+RANDOM_BLOCK_BYTES = 1 << 20
+# Maps a random byte to a fair coin flip (its lowest bit)
+_LOW_BIT = bytes(byte & 1 for byte in range(256))
+# Flips a 0/1 byte
+_INVERT_BYTE = bytes([1, 0]) + bytes(254)
+
 
 def approximate_best_subset(params: CoinSelectionParams,
-                            utxo_pool: List[OutputGroup],
+                            utxo_pool: List[int],
                             total_lower: int,
                             iterations: int,
-                            adjust_for_min_change: int = False
+                            adjust_for_min_change: int = False,
+                            deadline: Optional[float] = None
     ) -> CoinSelection:
+    # utxo_pool holds indices into params.pool
+    effective_values = [params.pool.group_effective_values[i] for i in utxo_pool]
     target_after_fixed_fee = params.target_value + params.fixed_fee
     if adjust_for_min_change:
         target_after_fixed_fee += MIN_CHANGE
 
-    best_selection = [True for output_group in utxo_pool]
+    # None stands for every output group being selected
+    best_selection: Optional[_Subset] = None
     best_value = total_lower
+    budget_exhausted = False
+    reached_target = False
+    inclusion_masks = _random_inclusion_masks(len(utxo_pool), iterations)
+    iterations_run = iterations
 
     for iteration_number in range(iterations):
         if best_value == target_after_fixed_fee:
+            iterations_run = iteration_number
+            break
+        if deadline is not None and time.monotonic() > deadline:
+            budget_exhausted = True
+            iterations_run = iteration_number
             break
-        included = [False for output_group in utxo_pool]
-        total_value = 0
-        reached_target = False
-        number_of_passes = 2
-        for pass_number in range(number_of_passes):
-            if reached_target:
-                break
-            for i in range(len(utxo_pool)):
-                # The solver here uses a randomized algorithm,
-                # the randomness serves no real security purpose but is just
-                # needed to prevent degenerate behavior and it is important
-                # that the rng is fast. We do not use a constant random sequence,
-                # because there may be some privacy improvement by making
-                # the selection random.
-                if (random.choice([True, False]) if pass_number == 0 else not included[i]):
-                    total_value += utxo_pool[i].effective_value
-                    included[i] = True
-                    if total_value >= target_after_fixed_fee:
-                        reached_target = True
-                        if total_value < best_value:
-                            best_value = total_value
-                            best_selection = included.copy()
-                        total_value -= utxo_pool[i].effective_value
-                        included[i] = False
+        # The solver here uses a randomized algorithm,
+        # the randomness serves no real security purpose but is just
+        # needed to prevent degenerate behavior and it is important
+        # that the rng is fast. We do not use a constant random sequence,
+        # because there may be some privacy improvement by making
+        # the selection random.
+        included = next(inclusion_masks)
+        # First pass: output groups are added in order as their coin flip says,
+        # except that an output group which takes the total to the target is
+        # recorded as a candidate and then taken back out again
+        reached_target, best_value, best_selection = _walk_pass(
+            effective_values, included, 0, target_after_fixed_fee,
+            best_value, best_selection, (included, 0)
+        )
+        if not reached_target:
+            # Second pass: no flip reached the target, so go through the output
+            # groups left out by the first pass, on top of the ones it included
+            reached_target, best_value, best_selection = _walk_pass(
+                effective_values, included.translate(_INVERT_BYTE),
+                sum(compress(effective_values, included)), target_after_fixed_fee,
+                best_value, best_selection, (included, 1)
+            )
 
     if reached_target:
-        return CoinSelection.from_utxo_pool(
-            params, utxo_pool, best_selection
-        )
+        if best_selection is None:
+            selected = utxo_pool
+        else:
+            selected = [utxo_pool[i] for i in _subset_indices(best_selection, len(utxo_pool))]
+        selection = CoinSelection.from_pool_indices(params, selected)
     else:
-        return CoinSelection.algorithm_failure(params)
+        selection = CoinSelection.algorithm_failure(params)
+    selection.budget_exhausted = budget_exhausted
+    stats = current_stats()
+    if stats is not None:
+        stats.iterations += iterations_run
+    return selection
 
 
+@instrumented("knapsack_solver")
 def select_coins_knapsack_solver(
         params: CoinSelectionParams,
-        iterations=DEFAULT_ITERATIONS
+        iterations=DEFAULT_ITERATIONS,
+        deadline: Optional[float] = None
 ) -> CoinSelection:
-    utxo_pool = params.utxo_pool
+    # deadline is a time.monotonic() timestamp after which the stochastic
+    # approximation stops and the best subset found so far is used
+    pool = params.pool
+    effective_values = pool.group_effective_values
     target_after_fixed_fee = params.target_value + params.fixed_fee
 
     # lowest output group larger than target_value
-    lowest_larger: Optional[OutputGroup] = None
-    applicable_groups: List[OutputGroup] = []
+    lowest_larger: Optional[int] = None
+    applicable_groups: List[int] = []
     total_lower = 0
 
+    utxo_pool = list(range(len(pool)))
     random.shuffle(utxo_pool)
 
-    for output_group in utxo_pool:
-        if output_group.effective_value == target_after_fixed_fee:
-            return CoinSelection(params, [output_group])
+    for i in utxo_pool:
+        effective_value = effective_values[i]
+        if effective_value == target_after_fixed_fee:
+            return CoinSelection.from_pool_indices(params, [i])
 
-        elif output_group.effective_value < target_after_fixed_fee + MIN_CHANGE:
-            applicable_groups.append(output_group)
-            total_lower += output_group.effective_value
+        elif effective_value < target_after_fixed_fee + MIN_CHANGE:
+            applicable_groups.append(i)
+            total_lower += effective_value
 
-        elif not lowest_larger or output_group.effective_value < lowest_larger.effective_value:
-            lowest_larger = output_group
+        elif lowest_larger is None or effective_value < effective_values[lowest_larger]:
+            lowest_larger = i
 
     if total_lower == target_after_fixed_fee:
-        return CoinSelection(params, applicable_groups)
+        return CoinSelection.from_pool_indices(params, applicable_groups)
 
-    if total_lower < target_after_fixed_fee and lowest_larger:
-        return CoinSelection(params, [lowest_larger])
+    if total_lower < target_after_fixed_fee and lowest_larger is not None:
+        return CoinSelection.from_pool_indices(params, [lowest_larger])
 
     # Solve subset sum by stochastic approximation
-    utxo_pool.sort(reverse=True)
     best_selection = approximate_best_subset(
-        params, applicable_groups, total_lower, iterations
+        params, applicable_groups, total_lower, iterations, deadline=deadline
     )
+    budget_exhausted = best_selection.budget_exhausted
     if (
         best_selection.effective_value != target_after_fixed_fee
         and total_lower >= target_after_fixed_fee + MIN_CHANGE
+        and not budget_exhausted
     ):
         best_selection = approximate_best_subset(
             params,
             applicable_groups,
             total_lower,
             iterations,
-            adjust_for_min_change=True
+            adjust_for_min_change=True,
+            deadline=deadline
         )
+        budget_exhausted = best_selection.budget_exhausted
     # If we have a bigger coin and (either the stochastic approximation didn't find
     # a good solution, or the next bigger coin is closer), return the bigger coin
-    if lowest_larger and (
+    if lowest_larger is not None and (
         (
             best_selection.effective_value != target_after_fixed_fee
             and best_selection.effective_value < target_after_fixed_fee + MIN_CHANGE
         )
         or
         (
-            lowest_larger.effective_value <= best_selection.effective_value
+            effective_values[lowest_larger] <= best_selection.effective_value
         )
     ):
-        best_selection = CoinSelection(params, [lowest_larger])
+        best_selection = CoinSelection.from_pool_indices(params, [lowest_larger])
 
+    best_selection.budget_exhausted = budget_exhausted
     return best_selection
+
+
+def _random_inclusion_masks(length: int, iterations: int) -> Iterator[bytes]:
+    # Yields one inclusion mask per iteration, a row of 0/1 bytes with a fair
+    # coin flip per output group. The rows are drawn a block at a time as one
+    # random bit matrix, rather than with one rng call per flip
+    if length == 0:
+        while True:
+            yield b""
+    rows_per_block = max(1, min(iterations, ITERATION_BLOCK, RANDOM_BLOCK_BYTES // length))
+    while True:
+        block = random.getrandbits(8 * length * rows_per_block).to_bytes(
+            length * rows_per_block, "little"
+        ).translate(_LOW_BIT)
+        for row in range(rows_per_block):
+            yield block[row * length:(row + 1) * length]
+
+
+def _walk_pass(
+    effective_values: List[int],
+    walked: bytes,
+    total_value: int,
+    target_after_fixed_fee: int,
+    best_value: int,
+    best_selection: Optional[_Subset],
+    subset_key: Tuple[bytes, int]
+) -> Tuple[bool, int, Optional[_Subset]]:
+    # Adds the output groups flagged in walked, in order, on top of total_value;
+    # an output group which takes the total to the target is a candidate and is
+    # taken back out again. Running totals come from a cumulative sum, and since
+    # effective values are never negative the first crossing can be found by
+    # bisection. After a crossing the total stays put, and every following output
+    # group crosses too until one smaller than the remaining gap comes along, so
+    # that whole run is found, scored by its smallest value and taken out at once
+    walked_values = list(compress(effective_values, walked))
+    running_totals = list(accumulate(walked_values))
+    reached_target = False
+    taken_out_value = 0
+    taken_out: List[Tuple[int, int]] = []
+    rank = 0
+    while True:
+        rank = bisect_left(
+            running_totals,
+            target_after_fixed_fee - total_value + taken_out_value,
+            rank
+        )
+        if rank == len(running_totals):
+            break
+        reached_target = True
+        total_before = total_value - taken_out_value + (running_totals[rank - 1] if rank > 0 else 0)
+        gap = target_after_fixed_fee - total_before
+        run_end = next(
+            compress(count(rank), map(gap.__gt__, islice(walked_values, rank, None))),
+            len(walked_values)
+        )
+        smallest_value = min(walked_values[rank:run_end])
+        if total_before + smallest_value < best_value:
+            best_value = total_before + smallest_value
+            smallest_rank = walked_values.index(smallest_value, rank, run_end)
+            best_selection = subset_key + (smallest_rank, taken_out + [(rank, smallest_rank)])
+        taken_out_value += sum(walked_values[rank:run_end])
+        taken_out.append((rank, run_end))
+        rank = run_end
+    return reached_target, best_value, best_selection
+
+
+def _subset_indices(subset: _Subset, length: int) -> List[int]:
+    included, pass_number, last_rank, taken_out = subset
+    first_pass = list(compress(range(length), included))
+    if pass_number == 0:
+        walked = first_pass
+        kept = []
+    else:
+        walked = list(compress(range(length), included.translate(_INVERT_BYTE)))
+        kept = first_pass
+    walked_kept = bytearray([1]) * (last_rank + 1)
+    for start, end in taken_out:
+        walked_kept[start:end] = bytes(end - start)
+    kept += compress(walked, walked_kept)
+    return sorted(kept)
@@ -0,0 +1,168 @@
+import time
+
+from typing import Dict, List, Optional, Tuple
+
+from bitcoin_coin_selection.selection_algorithms.branch_and_bound import DEADLINE_CHECK_INTERVAL, TOTAL_TRIES
+from bitcoin_coin_selection.selection_algorithms.instrumentation import current_stats, instrumented
+from bitcoin_coin_selection.selection_types.change_constants import MAX_MONEY
+from bitcoin_coin_selection.selection_types.coin_selection import CoinSelection
+from bitcoin_coin_selection.selection_types.coin_selection_params import CoinSelectionParams
+
+"""
+Branch and bound over a multiset of utxos
+
+Pools with many identical groups (e.g. fixed denomination deposits) make
+select_coins_branch_and_bound explore a binary branch per group. Here groups
+with the same effective value, fee and long term fee are first collapsed into
+classes, and the search branches on how many groups to take from each class:
+a class of n identical groups has n + 1 branches instead of 2^n paths.
+
+An exhaustive search finds a selection with the same waste as
+select_coins_branch_and_bound (which groups of a class are used may differ).
+Groups with no positive effective value are never selected.
+"""
+
+
+@instrumented("multiset_branch_and_bound")
+def select_coins_multiset_branch_and_bound(
+    params: CoinSelectionParams,
+    total_tries: int = TOTAL_TRIES,
+    deadline: Optional[float] = None
+) -> CoinSelection:
+    # total_tries and deadline as for select_coins_branch_and_bound
+    pool = params.pool
+    classes = _utxo_classes(pool)
+    effective_values = [effective_value for effective_value, _, _ in classes]
+    wastes = [waste for _, waste, _ in classes]
+    sizes = [len(group_indices) for _, _, group_indices in classes]
+    available_values = _suffix_sums(effective_values, sizes)
+    waste_lower_bounds = _waste_lower_bounds(wastes, sizes)
+    target_after_fixed_fees = params.target_value + params.fixed_fee
+    upper_bound = target_after_fixed_fees + params.cost_of_change
+
+    # counts[c] groups are taken from class c, taken holds the classes with
+    # a non zero count in order, and depth is the number of classes decided on
+    counts = [0] * len(classes)
+    taken: List[int] = []
+    depth = 0
+    current_value = 0
+    current_waste = 0
+    best_waste = MAX_MONEY
+    best_counts: List[int] = []
+    budget_exhausted = False
+    tries_exhausted = False
+    backtracks = 0
+
+    i = -1
+    for i in range(total_tries):
+        if (
+            deadline is not None
+            and i % DEADLINE_CHECK_INTERVAL == 0
+            and time.monotonic() > deadline
+        ):
+            budget_exhausted = True
+            break
+        should_backtrack = False
+
+        if (
+            (current_value + available_values[depth] < target_after_fixed_fees)
+            or (current_value > upper_bound)
+        ):
+            should_backtrack = True
+        elif current_value >= target_after_fixed_fees:
+            waste = current_waste + (current_value - target_after_fixed_fees)
+            if waste <= best_waste:
+                best_counts = counts[:]
+                best_waste = waste
+                if (best_waste == 0):
+                    break
+            should_backtrack = True
+        elif current_waste + waste_lower_bounds[depth] > best_waste:
+            should_backtrack = True
+
+        if should_backtrack:
+            backtracks += 1
+            if not taken:
+                # Every count of every class has been tried
+                break
+            # Take one fewer from the last class anything was taken from,
+            # and carry on with the classes after it
+            last = taken[-1]
+            counts[last] -= 1
+            if counts[last] == 0:
+                taken.pop()
+            current_value -= effective_values[last]
+            current_waste -= wastes[last]
+            depth = last + 1
+        else:
+            # As many as fit under the upper bound first (Largest First
+            # Exploration), taking more would overshoot the target range
+            count = min(sizes[depth], int((upper_bound - current_value) // effective_values[depth]))
+            if count > 0:
+                counts[depth] = count
+                taken.append(depth)
+                current_value += count * effective_values[depth]
+                current_waste += count * wastes[depth]
+            depth += 1
+    else:
+        tries_exhausted = best_waste != 0
+
+    if best_waste == MAX_MONEY:
+        selection = CoinSelection.algorithm_failure(params)
+    else:
+        selection = CoinSelection.from_pool_indices(
+            params,
+            [
+                group_index
+                for (_, _, group_indices), count in zip(classes, best_counts)
+                for group_index in group_indices[:count]
+            ]
+        )
+    selection.budget_exhausted = budget_exhausted
+    selection.search_incomplete = budget_exhausted or tries_exhausted
+    stats = current_stats()
+    if stats is not None:
+        stats.iterations = i + 1
+        stats.backtracks = backtracks
+        stats.tries_exhausted = tries_exhausted
+    return selection
+
+
+def _utxo_classes(pool) -> List[Tuple[int, int, List[int]]]:
+    # (effective value, waste, group indices) of each class of identical
+    # groups, by descending effective value
+    classes: Dict[Tuple[int, int, int], List[int]] = {}
+    for i in pool.sorted_by_effective_value():
+        effective_value = pool.group_effective_values[i]
+        if effective_value <= 0:
+            break
+        key = (effective_value, pool.group_fees[i], pool.group_long_term_fees[i])
+        group_indices = classes.get(key)
+        if group_indices is None:
+            group_indices = classes[key] = []
+        group_indices.append(i)
+    return [
+        (effective_value, fee - long_term_fee, group_indices)
+        for (effective_value, fee, long_term_fee), group_indices in classes.items()
+    ]
+
+
+def _suffix_sums(effective_values: List[int], sizes: List[int]) -> List[int]:
+    # suffix_sums[c] is the value of all groups in classes c onwards
+    suffix_sums = [0] * (len(effective_values) + 1)
+    for c in range(len(effective_values) - 1, -1, -1):
+        suffix_sums[c] = suffix_sums[c + 1] + sizes[c] * effective_values[c]
+    return suffix_sums
+
+
+def _waste_lower_bounds(wastes: List[int], sizes: List[int]) -> List[int]:
+    # As branch_and_bound._waste_lower_bounds, per class: at least one more
+    # group is needed, and all the negative wastes left could be taken
+    lower_bounds = [0] * (len(wastes) + 1)
+    smallest_waste = MAX_MONEY
+    negative_wastes = 0
+    for c in range(len(wastes) - 1, -1, -1):
+        smallest_waste = min(smallest_waste, wastes[c])
+        negative_wastes += sizes[c] * min(wastes[c], 0)
+        lower_bounds[c] = smallest_waste if smallest_waste >= 0 else negative_wastes
+    return lower_bounds
@@ -0,0 +1,267 @@
+import multiprocessing
+import os
+import threading
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+from bitcoin_coin_selection.selection_algorithms.branch_and_bound import (
+    TOTAL_TRIES,
+    _Branch,
+    _branch_and_bound,
+    _SearchResult,
+    _SortedPool,
+)
+from bitcoin_coin_selection.selection_algorithms.instrumentation import current_stats, instrumented
+from bitcoin_coin_selection.selection_types.change_constants import MAX_MONEY
+from bitcoin_coin_selection.selection_types.coin_selection import CoinSelection
+from bitcoin_coin_selection.selection_types.coin_selection_params import CoinSelectionParams
+
+"""
+Branch and bound across processes
+
+select_coins_branch_and_bound is one thread working through at most
+total_tries tries. Here the search tree is split instead: the decisions on
+the first split_depth utxos of the sorted pool are enumerated in the order
+the serial search would make them, and the subtrees below them are searched
+by worker processes, each taking the next subtree whenever it is free and
+each with total_tries tries of its own. The workers share the least waste
+found so far and all prune with it.
+
+Ties are broken the way the serial search breaks them (the last selection
+found with the least waste, but the first one found with no waste), so a
+search that runs to completion returns the same selection as
+select_coins_branch_and_bound with unlimited tries. That is when the short
+term fee rate is at least the long term one. Otherwise waste can go below
+zero, where the serial search stops at the first selection with no waste it
+finds; the parallel one searches on for the least waste, never doing worse.
+
+The shared bound lives in memory handed to the workers when they start, so
+searches run on a BranchAndBoundExecutor, one search at a time. Starting the
+workers costs far more than a small search: this is for searches that would
+otherwise run out of tries.
+"""
+
+# Subtrees to split the search into per worker, so that workers finishing
+# early have more to take
+SUBTREES_PER_WORKER = 4
+# Deepest the tree is split without a split_depth, for pools where few
+# branches survive each level
+MAX_SPLIT_DEPTH = 32
+
+# Slots of the shared array
+_BEST_WASTE = 0
+_NEXT_SUBTREE = 1
+# Index of the first subtree with a selection with no waste: no later
+# subtree can beat it, as ties go to the first one
+_FIRST_ZERO_WASTE_SUBTREE = 2
+
+# The shared array, in worker processes
+_shared = None
+
+_default_executor: Optional["BranchAndBoundExecutor"] = None
+
+
+class BranchAndBoundExecutor(ProcessPoolExecutor):
+    max_workers: int
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._shared = multiprocessing.Array("q", 3)
+        self._search_lock = threading.Lock()
+        super().__init__(max_workers=self.max_workers, initializer=_init_worker, initargs=(self._shared,))
+
+
+def get_default_executor() -> BranchAndBoundExecutor:
+    global _default_executor
+    if _default_executor is None:
+        _default_executor = BranchAndBoundExecutor()
+    return _default_executor
+
+
+@instrumented("parallel_branch_and_bound")
+def select_coins_parallel_branch_and_bound(
+    params: CoinSelectionParams,
+    executor: Optional[BranchAndBoundExecutor] = None,
+    split_depth: Optional[int] = None,
+    total_tries: int = TOTAL_TRIES,
+    deadline: Optional[float] = None
+) -> CoinSelection:
+    # total_tries is per worker, deadline as for select_coins_branch_and_bound.
+    # Without split_depth the tree is split deep enough to give each worker
+    # SUBTREES_PER_WORKER subtrees, or MAX_SPLIT_DEPTH deep
+    if executor is None:
+        executor = get_default_executor()
+    sorted_pool = _SortedPool(params.pool)
+    # Wastes go through the shared array, so keep them ints
+    target_after_fixed_fees = int(params.target_value + params.fixed_fee)
+    upper_bound = int(target_after_fixed_fees + params.cost_of_change)
+    if split_depth is None:
+        split_depth = 0
+        subtrees = _subtrees(sorted_pool, target_after_fixed_fees, upper_bound, split_depth)
+        max_split_depth = min(MAX_SPLIT_DEPTH, len(sorted_pool.utxo_pool))
+        while len(subtrees) < SUBTREES_PER_WORKER * executor.max_workers and split_depth < max_split_depth:
+            # One level further down from the points already found
+            split_depth += 1
+            subtrees = _subtrees(sorted_pool, target_after_fixed_fees, upper_bound, split_depth, subtrees)
+    else:
+        subtrees = _subtrees(sorted_pool, target_after_fixed_fees, upper_bound, split_depth)
+
+    # Past a selection with no waste, only a negative one could do better
+    stop_at_zero_waste = params.short_term_fee_per_byte >= params.long_term_fee_per_byte
+
+    shared = executor._shared
+    with executor._search_lock:
+        with shared.get_lock():
+            shared[_BEST_WASTE] = MAX_MONEY
+            shared[_NEXT_SUBTREE] = 0
+            shared[_FIRST_ZERO_WASTE_SUBTREE] = len(subtrees)
+        futures = [
+            executor.submit(
+                _search_subtrees,
+                sorted_pool,
+                target_after_fixed_fees,
+                upper_bound,
+                subtrees,
+                total_tries,
+                deadline,
+                stop_at_zero_waste
+            )
+            for _ in range(executor.max_workers)
+        ]
+        results = dict(result for future in futures for result in future.result())
+        first_zero_waste_subtree = shared[_FIRST_ZERO_WASTE_SUBTREE]
+
+    best_subtree = None
+    for k in sorted(results):
+        result = results[k]
+        if result.best_selection is None:
+            continue
+        if best_subtree is None or result.best_waste <= results[best_subtree].best_waste:
+            best_subtree = k
+    if stop_at_zero_waste and best_subtree is not None and results[best_subtree].best_waste == 0:
+        best_subtree = first_zero_waste_subtree
+
+    # Subtrees after the first one with no waste can't change the outcome
+    search_incomplete = any(
+        k not in results or results[k].budget_exhausted or results[k].tries_exhausted
+        for k in range(first_zero_waste_subtree)
+    )
+    budget_exhausted = search_incomplete and deadline is not None and time.monotonic() > deadline
+
+    if best_subtree is None:
+        selection = CoinSelection.algorithm_failure(params)
+    else:
+        selection = CoinSelection.from_pool_indices(
+            params, sorted_pool.pool_indices(results[best_subtree].best_selection)
+        )
+    selection.budget_exhausted = budget_exhausted
+    selection.search_incomplete = search_incomplete
+    stats = current_stats()
+    if stats is not None:
+        stats.iterations = sum(result.tries for result in results.values())
+        stats.backtracks = sum(result.backtracks for result in results.values())
+        stats.equal_value_skips = sum(result.equal_value_skips for result in results.values())
+        stats.tries_exhausted = any(result.tries_exhausted for result in results.values())
+    return selection
+
+
+def _subtrees(
+    sorted_pool: _SortedPool,
+    target_after_fixed_fees: int,
+    upper_bound: int,
+    split_depth: int,
+    branches: Optional[List[_Branch]] = None
+) -> List[_Branch]:
+    # The points of the search path at split_depth, or where the path ends
+    # before it, in the order the serial search reaches them. Moves forward
+    # the way the serial search does, equal value skips included, so that
+    # the subtrees hold the selections it would visit and no others.
+    # Starts from the given branches, in order, rather than the root: the
+    # points at a shallower depth extend to those at split_depth
+    effective_values = sorted_pool.effective_values
+    fees = sorted_pool.fees
+    wastes = sorted_pool.wastes
+    available_values = sorted_pool.available_values
+    next_distinct = sorted_pool.next_distinct
+    subtrees = []
+    stack = list(reversed(branches)) if branches is not None else [(0, 0, 0, 0)]
+    while stack:
+        branch = stack.pop()
+        selection, depth, value, waste = branch
+        if (
+            depth >= split_depth
+            or value + available_values[depth] < target_after_fixed_fees
+            or value >= target_after_fixed_fees
+        ):
+            subtrees.append(branch)
+        elif (
+            depth > 0
+            and not selection >> (depth - 1) & 1
+            and effective_values[depth] == effective_values[depth - 1]
+            and fees[depth] == fees[depth - 1]
+        ):
+            stack.append((selection, next_distinct[depth], value, waste))
+        elif value + effective_values[depth] > upper_bound:
+            stack.append((selection, depth + 1, value, waste))
+        else:
+            # Inclusion branch first, then exclusion
+            stack.append((selection, depth + 1, value, waste))
+            stack.append((selection | 1 << depth, depth + 1, value + effective_values[depth], waste + wastes[depth]))
+    return subtrees
+
+
+def _init_worker(shared):
+    global _shared
+    _shared = shared
+
+
+def _search_subtrees(
+    sorted_pool: _SortedPool,
+    target_after_fixed_fees: int,
+    upper_bound: int,
+    subtrees: List[_Branch],
+    total_tries: int,
+    deadline: Optional[float],
+    stop_at_zero_waste: bool
+) -> List[Tuple[int, _SearchResult]]:
+    # Searches subtrees not yet taken by another worker until there are none
+    # left or its tries run out
+    shared = _shared
+    results = []
+    tries_left = total_tries
+    while tries_left > 0 and (deadline is None or time.monotonic() <= deadline):
+        with shared.get_lock():
+            k = shared[_NEXT_SUBTREE]
+            if k >= len(subtrees):
+                break
+            shared[_NEXT_SUBTREE] = k + 1
+
+        def share_bound(best_waste: int) -> Optional[int]:
+            with shared.get_lock():
+                if shared[_FIRST_ZERO_WASTE_SUBTREE] < k:
+                    return None
+                if best_waste < shared[_BEST_WASTE]:
+                    shared[_BEST_WASTE] = best_waste
+                return shared[_BEST_WASTE]
+
+        result = _branch_and_bound(
+            sorted_pool,
+            target_after_fixed_fees,
+            upper_bound,
+            tries_left,
+            deadline,
+            start=subtrees[k],
+            share_bound=share_bound,
+            stop_at_zero_waste=stop_at_zero_waste
+        )
+        if result.best_selection is not None:
+            with shared.get_lock():
+                if result.best_waste < shared[_BEST_WASTE]:
+                    shared[_BEST_WASTE] = result.best_waste
+                if stop_at_zero_waste and result.best_waste == 0 and k < shared[_FIRST_ZERO_WASTE_SUBTREE]:
+                    shared[_FIRST_ZERO_WASTE_SUBTREE] = k
+        results.append((k, result))
+        tries_left -= result.tries
+    return results
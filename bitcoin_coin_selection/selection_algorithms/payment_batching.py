@@ -0,0 +1,182 @@
+from typing import Hashable, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Union
+
+from bitcoin_coin_selection.selection_algorithms.select_coins import select_coins
+from bitcoin_coin_selection.selection_types.coin_selection import CoinSelection
+from bitcoin_coin_selection.selection_types.coin_selection_params import CoinSelectionParams
+from bitcoin_coin_selection.selection_types.output_group import OutputGroup
+from bitcoin_coin_selection.selection_types.utxo_pool import UtxoPool
+from bitcoin_coin_selection.selection_types.wallet_pool import WalletPool
+
+"""
+Payment batching
+
+Pays a queue of payouts (e.g. exchange withdrawals) with a few transactions
+rather than one each. Payouts are taken in queue order into batches of at
+most max_payouts_per_batch outputs and max_output_bytes of outputs, and
+select_coins runs once per batch for the batch's combined value. Every
+payout's output bytes go into the batch's not_input_size_in_bytes, so the
+fixed fee is the transaction's, and the batch shares one change output and
+one transaction overhead between all its payouts.
+
+Batches are selected one after another, each from the groups left over by
+the batches before it, so no coin is spent twice. The leftover groups are a
+view of the group columns of one pool priced once, not a new pool per batch.
+The caller's pool is left as it was (a UtxoPool passed in is priced through a
+copy sharing its coin columns), and the selections' pool_indices are indices
+into it (slots, for a WalletPool).
+
+The selection algorithms don't bound how many inputs they pick. With
+max_input_bytes set, a batch whose selection spends more than that many
+bytes of inputs (e.g. to stay under the standard transaction weight) fails
+instead, leaving its coins to the later batches; a smaller
+max_payouts_per_batch or a consolidation is then the way to pay it.
+"""
+
+# Size of a P2WPKH output
+DEFAULT_OUTPUT_SIZE_IN_BYTES = 31
+DEFAULT_MAX_PAYOUTS_PER_BATCH = 100
+
+
+class Payout(NamedTuple):
+    payout_id: Hashable
+    value: int
+    output_size_in_bytes: int = DEFAULT_OUTPUT_SIZE_IN_BYTES
+
+
+class PayoutBatch(NamedTuple):
+    payouts: List[Payout]
+    # Failed (e.g. insufficient funds, or ALGORITHM_FAILURE for too many
+    # input bytes) if the batch couldn't be paid for
+    selection: CoinSelection
+
+
+def select_coins_for_payouts(
+    utxo_pool: Union[List[OutputGroup], UtxoPool, WalletPool],
+    payouts: Iterable[Payout],
+    short_term_fee_per_byte: int,
+    long_term_fee_per_byte: int,
+    change_output_size_in_bytes: int,
+    change_spend_size_in_bytes: int,
+    tx_overhead_in_bytes: int,
+    max_payouts_per_batch: int = DEFAULT_MAX_PAYOUTS_PER_BATCH,
+    max_output_bytes: Optional[int] = None,
+    max_input_bytes: Optional[int] = None
+) -> List[PayoutBatch]:
+    # tx_overhead_in_bytes is the size of a transaction with neither inputs
+    # nor outputs (version, locktime, counts). Batches that can't be paid for
+    # are returned with their failed selection, their payouts unpaid, and the
+    # later batches still try with the coins left
+    if isinstance(utxo_pool, WalletPool):
+        pool = UtxoPool.from_records(utxo_pool.utxo_records())
+    elif isinstance(utxo_pool, UtxoPool):
+        pool = _copy(utxo_pool)
+    else:
+        pool = UtxoPool.from_output_groups(utxo_pool, keep_objects=False)
+    pool.set_fee(short_term_fee_per_byte, long_term_fee_per_byte)
+    # Groups of pool not yet spent by a batch
+    remaining = list(range(len(pool)))
+    payout_batches = []
+    for payouts_in_batch in _batch_payouts(payouts, max_payouts_per_batch, max_output_bytes):
+        remaining_pool = pool if len(remaining) == len(pool) else _RemainingPool(pool, remaining)
+        params = CoinSelectionParams(
+            remaining_pool,
+            sum(payout.value for payout in payouts_in_batch),
+            short_term_fee_per_byte,
+            long_term_fee_per_byte,
+            change_output_size_in_bytes,
+            change_spend_size_in_bytes,
+            tx_overhead_in_bytes + sum(payout.output_size_in_bytes for payout in payouts_in_batch)
+        )
+        selection = select_coins(params)
+        if selection.outcome == CoinSelection.Outcome.SUCCESS:
+            # Built from remaining_pool, before its indices are mapped back
+            selection.materialize()
+            if max_input_bytes is not None and sum(output.input_bytes for output in selection.outputs) > max_input_bytes:
+                selection = CoinSelection.algorithm_failure(params)
+            else:
+                spent = set(selection.pool_indices)
+                selection.pool_indices = [remaining[k] for k in selection.pool_indices]
+                remaining = [i for k, i in enumerate(remaining) if k not in spent]
+        payout_batches.append(PayoutBatch(payouts_in_batch, selection))
+    return payout_batches
+
+
+def _batch_payouts(
+    payouts: Iterable[Payout],
+    max_payouts_per_batch: int,
+    max_output_bytes: Optional[int]
+) -> Iterator[List[Payout]]:
+    batch: List[Payout] = []
+    output_bytes = 0
+    for payout in payouts:
+        payout = Payout(*payout)
+        if batch and (
+            len(batch) == max_payouts_per_batch
+            or (max_output_bytes is not None and output_bytes + payout.output_size_in_bytes > max_output_bytes)
+        ):
+            yield batch
+            batch = []
+            output_bytes = 0
+        batch.append(payout)
+        output_bytes += payout.output_size_in_bytes
+    if batch:
+        yield batch
+
+
+def _copy(pool: UtxoPool) -> UtxoPool:
+    # Shares the coin columns, which set_fee only reads, and not the caller's
+    # OutputGroup objects, which it would reprice
+    copy = UtxoPool()
+    copy.tx_hashes = pool.tx_hashes
+    copy.vouts = pool.vouts
+    copy.values = pool.values
+    copy.input_bytes = pool.input_bytes
+    copy.group_offsets = pool.group_offsets
+    copy.addresses = pool.addresses
+    copy.group_values = pool.group_values
+    return copy
+
+
+class _RemainingPool():
+    # The given groups of a priced pool, in order, as a pool of their own:
+    # the group columns are gathered, the coins stay in the pool
+    def __init__(self, pool: UtxoPool, group_indices: Sequence[int]):
+        self._pool = pool
+        self._group_indices = group_indices
+        self.short_term_fee_per_byte = pool.short_term_fee_per_byte
+        self.long_term_fee_per_byte = pool.long_term_fee_per_byte
+        self.group_values = list(map(pool.group_values.__getitem__, group_indices))
+        self.group_fees = list(map(pool.group_fees.__getitem__, group_indices))
+        self.group_long_term_fees = list(map(pool.group_long_term_fees.__getitem__, group_indices))
+        self.group_effective_values = list(map(pool.group_effective_values.__getitem__, group_indices))
+        self.total_value = sum(self.group_values)
+        self.total_effective_value = sum(self.group_effective_values)
+        self._sorted_by_effective_value = None
+
+    def __len__(self):
+        return len(self._group_indices)
+
+    @property
+    def fingerprint(self) -> int:
+        return hash((self._pool.fingerprint, tuple(self._group_indices)))
+
+    def set_fee(self, short_term_fee_per_byte: int, long_term_fee_per_byte: int):
+        if (short_term_fee_per_byte, long_term_fee_per_byte) != (self.short_term_fee_per_byte, self.long_term_fee_per_byte):
+            raise ValueError("Leftover groups are priced at the batches' fee rate")
+
+    def sorted_by_effective_value(self) -> Sequence[int]:
+        if self._sorted_by_effective_value is None:
+            self._sorted_by_effective_value = tuple(sorted(
+                range(len(self)), key=self.group_effective_values.__getitem__, reverse=True
+            ))
+        return self._sorted_by_effective_value
+
+    def output_groups(
+        self,
+        indices: Iterable[int],
+        short_term_fee_per_byte: Optional[int] = None,
+        long_term_fee_per_byte: Optional[int] = None
+    ) -> List[OutputGroup]:
+        return self._pool.output_groups(
+            [self._group_indices[k] for k in indices], short_term_fee_per_byte, long_term_fee_per_byte
+        )
@@ -1,8 +1,12 @@
-from typing import List
+import time
+
+from typing import Optional, Sequence
 
 from bitcoin_coin_selection.selection_algorithms.branch_and_bound import select_coins_branch_and_bound
+from bitcoin_coin_selection.selection_algorithms.instrumentation import current_stats, instrumented
 from bitcoin_coin_selection.selection_algorithms.knapsack_solver import select_coins_knapsack_solver
 from bitcoin_coin_selection.selection_algorithms.single_random_draw import select_coins_single_random_draw
+from bitcoin_coin_selection.selection_algorithms.subset_sum import select_coins_subset_sum
 from bitcoin_coin_selection.selection_types.change_constants import MAX_MONEY
 from bitcoin_coin_selection.selection_types.coin_selection import (
     CoinSelection
@@ -12,7 +16,15 @@ from bitcoin_coin_selection.selection_types.coin_selection_params import (
 )
 
 
-def select_coins(params: CoinSelectionParams) -> CoinSelection:
+# Shares of a time budget given to each step of the cascade. Branch and bound
+# gets its share of the whole budget; knapsack gets whatever is then left,
+# less the share held back for single random draw (which is a single pass)
+BNB_BUDGET_SHARE = 0.5
+SRD_BUDGET_SHARE = 0.1
+
+
+def check_params(params: CoinSelectionParams) -> Optional[CoinSelection]:
+    # Returns the failed selection if no algorithm could possibly succeed
 
     # Validate target value isn't something silly
     if params.target_value == 0 or params.target_value > MAX_MONEY:
@@ -25,15 +37,69 @@ def select_coins(params: CoinSelectionParams) -> CoinSelection:
     if params.total_effective_value < params.target_value + params.fixed_fee:
         return CoinSelection.insufficient_funds_after_fees(params)
 
+    return None
+
+
+@instrumented("select_coins")
+def select_coins(
+    params: CoinSelectionParams,
+    time_budget: Optional[float] = None,
+    deadline: Optional[float] = None,
+    warm_start: Optional[Sequence[int]] = None
+) -> CoinSelection:
+    # time_budget is in seconds from now, deadline a time.monotonic() timestamp;
+    # if both are given the earlier one applies. Algorithms that run out of time
+    # return the best they have so far and the returned selection is flagged
+    # with budget_exhausted.
+    # warm_start is passed on to branch and bound
+    if time_budget is not None:
+        budget_deadline = time.monotonic() + time_budget
+        deadline = budget_deadline if deadline is None else min(deadline, budget_deadline)
+    bnb_deadline = knapsack_deadline = None
+    if deadline is not None:
+        start = time.monotonic()
+        time_budget = max(deadline - start, 0)
+        bnb_deadline = start + time_budget * BNB_BUDGET_SHARE
+        knapsack_deadline = deadline - time_budget * SRD_BUDGET_SHARE
+
+    invalid_selection = check_params(params)
+    if invalid_selection:
+        return invalid_selection
+
     # Return branch and bound selection (more optimized) if possible
-    bnb_selection = select_coins_branch_and_bound(params)
+    bnb_selection = select_coins_branch_and_bound(
+        params, deadline=bnb_deadline, warm_start=warm_start
+    )
+    _record_cascade_step(bnb_selection)
     if bnb_selection.outcome == CoinSelection.Outcome.SUCCESS:
         return bnb_selection
+    budget_exhausted = bnb_selection.budget_exhausted
+    # Branch and bound gave up before ruling out a changeless selection, so
+    # look for one by subset sum, if the pool is within its limits
+    if bnb_selection.search_incomplete:
+        subset_sum_selection = select_coins_subset_sum(params, deadline=knapsack_deadline)
+        _record_cascade_step(subset_sum_selection)
+        subset_sum_selection.budget_exhausted |= budget_exhausted
+        if subset_sum_selection.outcome == CoinSelection.Outcome.SUCCESS:
+            return subset_sum_selection
+        budget_exhausted = subset_sum_selection.budget_exhausted
     # Otherwise return knapsack_selection (less optimized) if possible
+    knapsack_selection = select_coins_knapsack_solver(params, deadline=knapsack_deadline)
+    _record_cascade_step(knapsack_selection)
+    knapsack_selection.budget_exhausted |= budget_exhausted
+    if knapsack_selection.outcome == CoinSelection.Outcome.SUCCESS:
+        return knapsack_selection
     else:
-        knapsack_selection = select_coins_knapsack_solver(params)
-        if knapsack_selection.outcome == CoinSelection.Outcome.SUCCESS:
-            return knapsack_selection
-        else:
-            # If all else fails, return single random draw selection (not optomized) as a fallback
-            return select_coins_single_random_draw(params)
+        # If all else fails, return single random draw selection (not optomized) as a fallback
+        srd_selection = select_coins_single_random_draw(params)
+        _record_cascade_step(srd_selection)
+        srd_selection.budget_exhausted = knapsack_selection.budget_exhausted
+        return srd_selection
+
+
+def _record_cascade_step(selection: CoinSelection):
+    # The last step recorded is the one whose selection select_coins returns
+    stats = current_stats()
+    if stats is not None:
+        stats.cascade.append(selection.stats)
+        stats.selected_by = selection.stats.algorithm
@@ -0,0 +1,141 @@
+import threading
+import time
+
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional, Tuple
+
+from bitcoin_coin_selection.selection_algorithms.select_coins import select_coins
+from bitcoin_coin_selection.selection_types.coin_selection import CoinSelection
+from bitcoin_coin_selection.selection_types.coin_selection_params import CoinSelectionParams
+
+"""
+Memoized select_coins
+
+Repeated requests for the same wallet, amount and fee parameters (e.g. fee
+previews while a payment is being edited) are answered from an LRU cache
+rather than by re-running the cascade. Entries are keyed on the pool's
+fingerprint, so a pool that changes simply stops matching its old entries;
+invalidate() drops them eagerly.
+
+What a hit costs depends on the pool passed to CoinSelectionParams. A
+WalletPool keeps its fingerprint up to date as it changes, a UtxoPool
+hashes its coins once and keeps the hash until it grows, and a snapshot pool
+hashes its mapped file once without decoding it, so hits on any of them are
+O(1). A list
+of OutputGroups is converted into a new UtxoPool by every CoinSelectionParams
+and hashed afresh, so a hit on one still costs O(coins) and only saves the
+search: build the UtxoPool once and pass that instead.
+
+Only selections that select_coins would make again are reused by default:
+branch and bound's and subset sum's (they are deterministic for a given pool)
+and failed parameter checks. Knapsack and single random draw selections are random, and
+are only cached with reuse_randomized=True. Selections cut short by a time
+budget are never cached.
+"""
+
+DEFAULT_MAX_SIZE = 1024
+
+# Selections made again identically by select_coins for the same key
+_DETERMINISTIC_OUTCOMES = (
+    CoinSelection.Outcome.INSUFFICIENT_FUNDS,
+    CoinSelection.Outcome.INSUFFICIENT_FUNDS_AFTER_FEES,
+    CoinSelection.Outcome.INVALID_SPEND,
+)
+_DETERMINISTIC_ALGORITHMS = ("branch_and_bound", "subset_sum")
+
+
+class SelectionCache():
+    max_size: int
+    # Seconds an entry stays valid, None for no expiry
+    ttl: Optional[float]
+    reuse_randomized: bool
+    hits: int
+    misses: int
+
+    def __init__(
+        self,
+        max_size: int = DEFAULT_MAX_SIZE,
+        ttl: Optional[float] = None,
+        reuse_randomized: bool = False,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.reuse_randomized = reuse_randomized
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        # key -> (expiry time or None, selection, the caller's pool), least
+        # recently used first. Holding the pool keeps its id, part of the key,
+        # from being reused by another object while the entry is there
+        self._entries: "OrderedDict[Hashable, Tuple[Optional[float], CoinSelection, object]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def select_coins(
+        self,
+        params: CoinSelectionParams,
+        time_budget: Optional[float] = None,
+        deadline: Optional[float] = None
+    ) -> CoinSelection:
+        # Cached selections are shared between callers and shouldn't be modified
+        key = self.key(params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expiry, selection, _ = entry
+                if expiry is None or self._clock() < expiry:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return selection
+                del self._entries[key]
+            self.misses += 1
+
+        selection = select_coins(params, time_budget=time_budget, deadline=deadline)
+        if self._is_reusable(selection):
+            expiry = None if self.ttl is None else self._clock() + self.ttl
+            with self._lock:
+                self._entries[key] = (expiry, selection, params.utxo_pool)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return selection
+
+    def invalidate(self, utxo_pool=None):
+        # Drops every entry for utxo_pool (as passed to CoinSelectionParams),
+        # or everything when no pool is given
+        with self._lock:
+            if utxo_pool is None:
+                self._entries.clear()
+                return
+            pool_id = id(utxo_pool)
+            for key in [key for key in self._entries if key[0] == pool_id]:
+                del self._entries[key]
+
+    @staticmethod
+    def key(params: CoinSelectionParams) -> Hashable:
+        return (
+            # The caller's pool object, so invalidate() can find its entries
+            id(params.utxo_pool),
+            type(params.pool).__name__,
+            params.pool.fingerprint,
+            params.target_value,
+            params.short_term_fee_per_byte,
+            params.long_term_fee_per_byte,
+            params.change_output_size_in_bytes,
+            params.change_spend_size_in_bytes,
+            params.not_input_size_in_bytes,
+            # Overridable (see TestParams)
+            params.cost_of_change,
+        )
+
+    def _is_reusable(self, selection: CoinSelection) -> bool:
+        if selection.budget_exhausted:
+            return False
+        return (
+            self.reuse_randomized
+            or selection.outcome in _DETERMINISTIC_OUTCOMES
+            or selection.algorithm in _DETERMINISTIC_ALGORITHMS
+        )
@@ -0,0 +1,392 @@
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from bitcoin_coin_selection.selection_algorithms.select_coins import select_coins
+from bitcoin_coin_selection.selection_types.coin_selection import CoinSelection
+from bitcoin_coin_selection.selection_types.coin_selection_params import CoinSelectionParams
+from bitcoin_coin_selection.selection_types.utxo_records import load_wallet_pool, read_utxo_records
+from bitcoin_coin_selection.selection_types.wallet_pool import WalletPool
+
+"""
+Coin selection server
+
+A sidecar process that keeps wallet pools resident and makes selections
+from them for any number of local clients, so every application instance
+doesn't have to import the library and hold every wallet itself:
+
+    python -m bitcoin_coin_selection.selection_algorithms.selection_server \\
+        --unix-socket /tmp/coin_selection.sock --load hot=hot_wallet.csv
+
+The protocol is one JSON object per line each way, over a Unix socket or
+local TCP. Requests have a "method" and an optional "id", which is echoed in
+the response; responses hold either "result" or "error" and come back in the
+order they are ready, so a client can pipeline requests.
+
+    {"id": 1, "method": "load_wallet", "wallet": "hot", "path": "hot_wallet.csv"}
+    {"id": 2, "method": "load_wallet", "wallet": "cold", "records": [[tx_hash, vout, value, input_bytes, address], ...]}
+    {"id": 3, "method": "update_wallet", "wallet": "hot", "created": [[...], ...], "spent": [[tx_hash, vout], ...]}
+    {"id": 4, "method": "select", "wallet": "hot", "target_value": 100000,
+     "short_term_fee_per_byte": 5, "long_term_fee_per_byte": 10,
+     "change_output_size_in_bytes": 31, "change_spend_size_in_bytes": 68,
+     "not_input_size_in_bytes": 41, "time_budget": 0.1}
+    {"id": 5, "method": "stats"}
+
+Selections arriving within batch_window of each other (up to
+max_batch_size) are dispatched to the worker pool together: one task per
+wallet in the batch, so a wallet is priced once per fee rate per batch
+rather than per request. A wallet's selections and updates never overlap.
+The default worker pool is threads, so selections from different wallets
+interleave under the GIL rather than run in parallel; what they don't do is
+block the event loop, which keeps reading and answering other requests.
+"""
+
+DEFAULT_BATCH_WINDOW = 0.002
+DEFAULT_MAX_BATCH_SIZE = 64
+# Most recent selection latencies kept for the stats
+LATENCY_WINDOW = 10000
+
+SELECTION_FIELDS = [
+    "target_value",
+    "short_term_fee_per_byte",
+    "long_term_fee_per_byte",
+    "change_output_size_in_bytes",
+    "change_spend_size_in_bytes",
+    "not_input_size_in_bytes",
+]
+
+# (request, future for its result, time received)
+_QueuedSelection = Tuple[Dict[str, Any], asyncio.Future, float]
+
+
+class ServerStats():
+    requests: int
+    selections: int
+    batches: int
+    errors: int
+    # Seconds from receiving a selection request to its result
+    latencies: Deque[float]
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.requests = 0
+        self.selections = 0
+        self.batches = 0
+        self.errors = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def snapshot(self) -> Dict[str, Any]:
+        uptime = time.monotonic() - self.started
+        latencies = sorted(self.latencies)
+        snapshot = {
+            "uptime": uptime,
+            "requests": self.requests,
+            "selections": self.selections,
+            "batches": self.batches,
+            "errors": self.errors,
+            "selections_per_second": self.selections / uptime if uptime else 0.0,
+            "mean_batch_size": self.selections / self.batches if self.batches else 0.0,
+        }
+        if latencies:
+            snapshot["latency_mean"] = statistics.mean(latencies)
+            for percentile in [50, 90, 99]:
+                index = min(len(latencies) - 1, len(latencies) * percentile // 100)
+                snapshot["latency_p{}".format(percentile)] = latencies[index]
+        return snapshot
+
+
+class SelectionServer():
+    wallets: Dict[str, WalletPool]
+    batch_window: float
+    max_batch_size: int
+    stats: ServerStats
+
+    def __init__(
+        self,
+        executor: Optional[Executor] = None,
+        batch_window: float = DEFAULT_BATCH_WINDOW,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE
+    ):
+        # The default executor is a thread pool, which works on the resident
+        # pools directly; a process pool would be sent a copy with every batch
+        self.executor = executor if executor is not None else ThreadPoolExecutor()
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.wallets = {}
+        self.stats = ServerStats()
+        # Created in the loop the server runs in
+        self._queue: Optional["asyncio.Queue[_QueuedSelection]"] = None
+        self._wallet_locks: Dict[str, asyncio.Lock] = {}
+        self._batcher: Optional[asyncio.Task] = None
+
+    async def start_unix_server(self, path: str) -> asyncio.AbstractServer:
+        self._start_batcher()
+        return await asyncio.start_unix_server(self._handle_connection, path=path)
+
+    async def start_tcp_server(self, host: str = "127.0.0.1", port: int = 0) -> asyncio.AbstractServer:
+        self._start_batcher()
+        return await asyncio.start_server(self._handle_connection, host=host, port=port)
+
+    def load_wallet(self, wallet: str, records) -> WalletPool:
+        # Replaces any wallet of the same name
+        self.wallets[wallet] = load_wallet_pool(records)
+        return self.wallets[wallet]
+
+    async def handle_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        self.stats.requests += 1
+        response: Dict[str, Any] = {}
+        if "id" in request:
+            response["id"] = request["id"]
+        try:
+            response["result"] = await self._dispatch(request)
+        except Exception as error:
+            self.stats.errors += 1
+            response["error"] = "{}: {}".format(type(error).__name__, error)
+        return response
+
+    async def close(self):
+        if self._batcher is not None:
+            self._batcher.cancel()
+            try:
+                await self._batcher
+            except asyncio.CancelledError:
+                pass
+            self._batcher = None
+        self.executor.shutdown(wait=False)
+
+    async def _dispatch(self, request: Dict[str, Any]) -> Any:
+        method = request.get("method")
+        if method == "select":
+            return await self._select(request)
+        if method == "stats":
+            return self.stats.snapshot()
+        if method == "load_wallet":
+            wallet = _field(request, "wallet")
+            if "path" in request:
+                records = read_utxo_records(request["path"])
+            else:
+                records = [tuple(record) for record in _field(request, "records")]
+            async with self._wallet_lock(wallet):
+                wallet_pool = await asyncio.get_running_loop().run_in_executor(
+                    self.executor, self.load_wallet, wallet, records
+                )
+            return {"utxo_count": wallet_pool.utxo_count}
+        if method == "update_wallet":
+            self._wallet(request)
+            async with self._wallet_lock(request["wallet"]):
+                wallet_pool = self._wallet(request)
+                wallet_pool.apply_block_delta(
+                    created=[tuple(record) for record in request.get("created", [])],
+                    spent=[tuple(outpoint) for outpoint in request.get("spent", [])]
+                )
+            return {"utxo_count": wallet_pool.utxo_count}
+        if method == "drop_wallet":
+            async with self._wallet_lock(_field(request, "wallet")):
+                self._wallet(request)
+                del self.wallets[request["wallet"]]
+            return {}
+        raise ValueError("Unknown method {!r}".format(method))
+
+    async def _select(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        # Checked here, so a bad request fails alone rather than with its batch
+        self._wallet(request)
+        for name in SELECTION_FIELDS:
+            if not isinstance(_field(request, name), int):
+                raise ValueError("{} must be an integer".format(name))
+        received = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        self._start_batcher()
+        self._queue.put_nowait((request, future, received))
+        result = await future
+        self.stats.latencies.append(time.monotonic() - received)
+        return result
+
+    def _start_batcher(self):
+        if self._batcher is None:
+            self._queue = asyncio.Queue()
+            self._batcher = asyncio.ensure_future(self._run_batcher())
+
+    async def _run_batcher(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            window_end = loop.time() + self.batch_window
+            while len(batch) < self.max_batch_size:
+                timeout = window_end - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            self.stats.batches += 1
+            by_wallet: Dict[str, List[_QueuedSelection]] = {}
+            for queued in batch:
+                by_wallet.setdefault(queued[0]["wallet"], []).append(queued)
+            for wallet, selections in by_wallet.items():
+                asyncio.ensure_future(self._run_wallet_batch(wallet, selections))
+
+    async def _run_wallet_batch(self, wallet: str, selections: List[_QueuedSelection]):
+        async with self._wallet_lock(wallet):
+            wallet_pool = self.wallets.get(wallet)
+            if wallet_pool is None:
+                for _, future, _ in selections:
+                    if not future.done():
+                        future.set_exception(ValueError("Unknown wallet {!r}".format(wallet)))
+                return
+            requests = [request for request, _, _ in selections]
+            try:
+                results = await asyncio.get_running_loop().run_in_executor(
+                    self.executor, _select_coins_batch, wallet_pool, requests
+                )
+            except Exception as error:
+                results = [error] * len(selections)
+        for (_, future, _), result in zip(selections, results):
+            # Callers may have gone away
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                self.stats.selections += 1
+                future.set_result(result)
+
+    def _wallet(self, request: Dict[str, Any]) -> WalletPool:
+        wallet = _field(request, "wallet")
+        if wallet not in self.wallets:
+            raise ValueError("Unknown wallet {!r}".format(wallet))
+        return self.wallets[wallet]
+
+    def _wallet_lock(self, wallet: str) -> asyncio.Lock:
+        lock = self._wallet_locks.get(wallet)
+        if lock is None:
+            lock = self._wallet_locks[wallet] = asyncio.Lock()
+        return lock
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        tasks = set()
+
+        async def respond(line: bytes):
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("Requests must be JSON objects")
+            except ValueError as error:
+                self.stats.requests += 1
+                self.stats.errors += 1
+                response = {"error": "{}: {}".format(type(error).__name__, error)}
+            else:
+                response = await self.handle_request(request)
+            writer.write(json.dumps(response).encode("utf-8") + b"\n")
+            await writer.drain()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.strip():
+                    task = asyncio.ensure_future(respond(line))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.wait(tasks)
+        finally:
+            writer.close()
+
+
+def _select_coins_batch(wallet_pool: WalletPool, requests: List[Dict[str, Any]]) -> List[Any]:
+    # Runs in a worker. Sorted by fee rate, so the pool is repriced once per
+    # fee rate in the batch; each result is a selection or the error making it
+    results: List[Any] = [None] * len(requests)
+    order = sorted(
+        range(len(requests)),
+        key=lambda k: (requests[k]["short_term_fee_per_byte"], requests[k]["long_term_fee_per_byte"])
+    )
+    for k in order:
+        request = requests[k]
+        try:
+            params = CoinSelectionParams(wallet_pool, *[request[name] for name in SELECTION_FIELDS])
+            results[k] = selection_to_json(select_coins(params, time_budget=request.get("time_budget")))
+        except Exception as error:
+            results[k] = error
+    return results
+
+
+def selection_to_json(selection: CoinSelection) -> Dict[str, Any]:
+    return {
+        "outcome": selection.outcome.name,
+        "outputs": [
+            {
+                "tx_hash": output.tx_hash,
+                "vout": output.vout,
+                "value": output.value,
+                "input_bytes": output.input_bytes,
+            }
+            for output in selection.outputs
+        ],
+        "target_value": selection.target_value,
+        "value": selection.value,
+        "effective_value": selection.effective_value,
+        "fee": selection.fee,
+        "change_value": selection.change_value,
+        "waste": selection.waste,
+        "algorithm": selection.algorithm,
+        "budget_exhausted": selection.budget_exhausted,
+    }
+
+
+def _field(request: Dict[str, Any], name: str) -> Any:
+    if name not in request:
+        raise ValueError("Request is missing {!r}".format(name))
+    return request[name]
+
+
+async def serve(args: argparse.Namespace):
+    server = SelectionServer(
+        ThreadPoolExecutor(max_workers=args.workers),
+        batch_window=args.batch_window,
+        max_batch_size=args.max_batch_size
+    )
+    for wallet_path in args.load:
+        wallet, path = wallet_path.split("=", 1)
+        server.load_wallet(wallet, read_utxo_records(path))
+    if args.unix_socket:
+        listener = await server.start_unix_server(args.unix_socket)
+    else:
+        listener = await server.start_tcp_server(args.host, args.port)
+    print("Serving on {}".format(", ".join(str(socket.getsockname()) for socket in listener.sockets)))
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        await server.close()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Coin selection server")
+    parser.add_argument("--unix-socket", help="Listen on this Unix socket instead of TCP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8335)
+    parser.add_argument("--workers", type=int, default=None, help="Worker threads, one per core by default")
+    parser.add_argument("--batch-window", type=float, default=DEFAULT_BATCH_WINDOW)
+    parser.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE)
+    parser.add_argument(
+        "--load", action="append", default=[], metavar="WALLET=PATH",
+        help="Load a wallet from a CSV or JSONL utxo file at startup"
+    )
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
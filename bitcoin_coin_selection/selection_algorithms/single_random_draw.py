@@ -1,20 +1,29 @@
 import random
-from typing import List
 
+from bitcoin_coin_selection.selection_algorithms.instrumentation import current_stats, instrumented
 from bitcoin_coin_selection.selection_types.coin_selection import CoinSelection
 from bitcoin_coin_selection.selection_types.coin_selection_params import CoinSelectionParams
-from bitcoin_coin_selection.selection_types.output_group import OutputGroup
 
 
+@instrumented("single_random_draw")
 def select_coins_single_random_draw(params: CoinSelectionParams) -> CoinSelection:
     target_after_fixed_fee = params.target_value + params.fixed_fee
-    random.shuffle(params.utxo_pool)
+    effective_values = params.pool.group_effective_values
+    utxo_pool = list(range(len(params.pool)))
+    random.shuffle(utxo_pool)
     selected_output_groups = []
     selected_value = 0
-    for output_group in params.utxo_pool:
-        selected_value += output_group.effective_value
-        selected_output_groups.append(output_group)
+    selection = None
+    for i in utxo_pool:
+        selected_value += effective_values[i]
+        selected_output_groups.append(i)
         if selected_value >= target_after_fixed_fee:
-            return CoinSelection(params, selected_output_groups)
+            selection = CoinSelection.from_pool_indices(params, selected_output_groups)
+            break
 
-    return CoinSelection.algorithm_failure(params)
+    stats = current_stats()
+    if stats is not None:
+        stats.iterations = len(selected_output_groups)
+    if selection is None:
+        selection = CoinSelection.algorithm_failure(params)
+    return selection
@@ -0,0 +1,87 @@
+import time
+
+from math import gcd
+from typing import List, Optional
+
+from bitcoin_coin_selection.selection_algorithms.instrumentation import current_stats, instrumented
+from bitcoin_coin_selection.selection_types.coin_selection import CoinSelection
+from bitcoin_coin_selection.selection_types.coin_selection_params import CoinSelectionParams
+
+"""
+Exact subset sum by dynamic programming
+
+Finds a changeless selection, i.e. one whose effective value is within
+target_value + fixed_fee and cost_of_change above it, whenever one exists.
+The sums reachable from the first k groups are the set bits of an integer,
+and adding a group with effective value v is reachable | reachable << v, so
+the whole search is one big-int shift per group. Of the sums in range the
+smallest is selected (the least excess), and its groups are recovered from
+the reachable sums kept for each k.
+
+Time and memory are proportional to the number of groups times the size of
+the range of sums, in units of the gcd of the effective values; pools above
+max_bits of that fail straight away. Unlike branch and bound the waste of the
+groups themselves isn't minimized, only the excess.
+"""
+
+# Bits of reachable sums kept for reconstruction, 8 MiB
+MAX_DP_BITS = 1 << 26
+
+
+@instrumented("subset_sum")
+def select_coins_subset_sum(
+    params: CoinSelectionParams,
+    max_bits: int = MAX_DP_BITS,
+    deadline: Optional[float] = None
+) -> CoinSelection:
+    pool = params.pool
+    target_after_fixed_fees = int(params.target_value + params.fixed_fee)
+    upper_bound = int(target_after_fixed_fees + params.cost_of_change)
+    # Groups that fit in the range on their own
+    group_indices = [
+        i for i in range(len(pool))
+        if 0 < pool.group_effective_values[i] <= upper_bound
+    ]
+    scale = 0
+    for i in group_indices:
+        scale = gcd(scale, pool.group_effective_values[i])
+    values: List[int] = []
+    if scale:
+        values = [pool.group_effective_values[i] // scale for i in group_indices]
+        # Sums in [lower, upper] (in units of scale) are in range
+        lower = -(-target_after_fixed_fees // scale)
+        upper = upper_bound // scale
+
+    budget_exhausted = False
+    selected: Optional[List[int]] = None
+    # Reachable sums before each group is added
+    reachable_before: List[int] = []
+    if values and lower <= upper and (upper + 1) * len(values) <= max_bits:
+        mask = (1 << (upper + 1)) - 1
+        reachable = 1
+        for value in values:
+            if deadline is not None and time.monotonic() > deadline:
+                budget_exhausted = True
+                break
+            reachable_before.append(reachable)
+            reachable |= (reachable << value) & mask
+        else:
+            in_range = reachable >> lower
+            if in_range:
+                total = lower + (in_range & -in_range).bit_length() - 1
+                selected = []
+                for k in range(len(values) - 1, -1, -1):
+                    # Needed unless the sum can be made without it
+                    if not reachable_before[k] >> total & 1:
+                        selected.append(group_indices[k])
+                        total -= values[k]
+
+    if selected is None:
+        selection = CoinSelection.algorithm_failure(params)
+    else:
+        selection = CoinSelection.from_pool_indices(params, selected[::-1])
+    selection.budget_exhausted = budget_exhausted
+    stats = current_stats()
+    if stats is not None:
+        stats.iterations = len(reachable_before)
+    return selection
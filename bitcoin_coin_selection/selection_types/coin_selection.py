@@ -1,10 +1,12 @@
 from enum import Enum
-from typing import List
+from typing import List, Optional
 
 
 from bitcoin_coin_selection.selection_types.input_coin import InputCoin
 from bitcoin_coin_selection.selection_types.output_group import OutputGroup
 from bitcoin_coin_selection.selection_types.coin_selection_params import CoinSelectionParams
+from bitcoin_coin_selection.selection_types.selection_stats import SelectionStats
+from bitcoin_coin_selection.selection_types.wallet_pool import WalletPool
 
 
 
@@ -18,12 +20,25 @@ class CoinSelection():
         INVALID_SPEND = 4
 
     outcome: Outcome
-    outputs: List[InputCoin]
     target_value: int
     effective_value: int
     value: int
     fee: int
+    long_term_fee: int
     change_value: int
+    waste: int
+    # Whether the algorithm ran out of its time budget and returned early
+    budget_exhausted: bool
+    # Whether a search stopped (out of time or tries) before it had covered
+    # every selection, so a failure doesn't rule out a changeless selection
+    search_incomplete: bool
+    # Indices into params.pool of the selected groups, for selections made
+    # through from_pool_indices
+    pool_indices: Optional[List[int]]
+    # Name of the algorithm that made the selection, e.g. "branch_and_bound"
+    algorithm: Optional[str]
+    # Only set while stats are being collected, see selection_algorithms.instrumentation
+    stats: Optional[SelectionStats]
 
     def __init__(self,
                  params: CoinSelectionParams,
@@ -31,10 +46,18 @@ class CoinSelection():
                  outcome=Outcome.SUCCESS
         ):
         self.target_value = params.target_value
-        self.outputs = []
+        self._outputs = []
+        # For selections from from_pool_indices, until outputs is first read
+        self._pool = None
         self.effective_value = 0
         self.value = 0
+        self.long_term_fee = 0
         self.outcome = outcome
+        self.budget_exhausted = False
+        self.search_incomplete = False
+        self.pool_indices = None
+        self.algorithm = None
+        self.stats = None
         if selected_output_groups:
             for output_group in selected_output_groups:
                 for output in output_group.outputs:
@@ -42,6 +65,7 @@ class CoinSelection():
 
         self.fee = self.calculate_fee(params.fixed_fee)
         self.change_value = self.calculate_change_value(params.cost_of_change)
+        self.waste = self.calculate_waste(params.fixed_fee, params.cost_of_change)
 
     @classmethod
     def insufficient_funds(cls, target_value: int):
@@ -75,10 +99,74 @@ class CoinSelection():
 
         return cls(params, selected_groups)
 
+    @classmethod
+    def from_pool_indices(
+        cls,
+        params: CoinSelectionParams,
+        selected_indices: List[int],
+    ):
+        # The totals are summed from the pool's group columns, and the selected
+        # groups are only materialized as OutputGroups if outputs is read, so
+        # candidate selections that get thrown away never build any objects
+        pool = params.pool
+        selection = cls(params)
+        for i in selected_indices:
+            selection.effective_value += pool.group_effective_values[i]
+            # Coins left out of their group for negative effective values
+            # don't count towards the selection's value either
+            selection.value += pool.group_effective_values[i] + pool.group_fees[i]
+            selection.long_term_fee += pool.group_long_term_fees[i]
+        selection.fee = selection.calculate_fee(params.fixed_fee)
+        selection.change_value = selection.calculate_change_value(params.cost_of_change)
+        selection.waste = selection.calculate_waste(params.fixed_fee, params.cost_of_change)
+        selection.pool_indices = list(selected_indices)
+        selection._outputs = None
+        selection._pool = pool
+        selection._fee_rates = (params.short_term_fee_per_byte, params.long_term_fee_per_byte)
+        # WalletPool slots move as coins come and go, UtxoPool groups stay put
+        selection._pool_fingerprint = pool.fingerprint if isinstance(pool, WalletPool) else None
+        return selection
+
+    @property
+    def outputs(self) -> List[InputCoin]:
+        if self._outputs is None:
+            self._outputs = self._materialize_outputs()
+        return self._outputs
+
+    @outputs.setter
+    def outputs(self, outputs: List[InputCoin]):
+        self._outputs = outputs
+        self._pool = None
+
+    def materialize(self):
+        # Builds the outputs now rather than when first read, e.g. before the
+        # pool changes, and lets go of the pool
+        if self._outputs is None:
+            self._outputs = self._materialize_outputs()
+
+    def _materialize_outputs(self) -> List[InputCoin]:
+        pool = self._pool
+        if self._pool_fingerprint is not None and pool.fingerprint != self._pool_fingerprint:
+            raise ValueError("The pool has changed since the selection was made, its outputs are gone")
+        outputs = []
+        # At the selection's fee rates: the pool may have been repriced for
+        # another selection since, and the coins left out at that rate
+        # needn't be those left out at this one
+        for output_group in pool.output_groups(self.pool_indices, *self._fee_rates):
+            outputs.extend(output_group.outputs)
+        self._pool = None
+        return outputs
+
+    def __getstate__(self):
+        # Selections sent between processes take their outputs, not the pool
+        self.materialize()
+        return self.__dict__
+
     def insert(self, output: InputCoin):
         self.outputs.append(output)
         self.effective_value += output.effective_value
         self.value += output.value
+        self.long_term_fee += output.long_term_fee
 
     def calculate_change_value(self, cost_of_change: int):
         if self.outcome != self.Outcome.SUCCESS:
@@ -93,4 +181,17 @@ class CoinSelection():
             return 0
         return fixed_fee + self.value - self.effective_value
 
+    # Waste metric per Bitcoin Core's GetSelectionWaste: what spending the inputs
+    # now costs over spending them at the long term fee rate, plus either the
+    # cost of making and later spending change, or the excess given up to fees
+    def calculate_waste(self, fixed_fee: int, cost_of_change: int):
+        if self.outcome != self.Outcome.SUCCESS:
+            return 0
+        waste = self.fee - fixed_fee - self.long_term_fee
+        if self.change_value > 0:
+            waste += cost_of_change
+        else:
+            waste += self.effective_value - self.target_value - fixed_fee
+        return waste
+
 
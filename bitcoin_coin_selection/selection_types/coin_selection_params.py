@@ -1,11 +1,13 @@
-from typing import List
+from typing import List, Union
 
 from bitcoin_coin_selection.selection_types.output_group import OutputGroup
+from bitcoin_coin_selection.selection_types.utxo_pool import UtxoPool
+from bitcoin_coin_selection.selection_types.wallet_pool import WalletPool
 
 class CoinSelectionParams:
     def __init__(
       self,
-      utxo_pool: List[OutputGroup],
+      utxo_pool: Union[List[OutputGroup], UtxoPool, WalletPool],
       target_value: int,
       short_term_fee_per_byte : int,
       long_term_fee_per_byte: int,
@@ -13,9 +15,18 @@ class CoinSelectionParams:
       change_spend_size_in_bytes: int,
       not_input_size_in_bytes: int
     ):
-        for outut_group in utxo_pool:
-            outut_group.set_fee(short_term_fee_per_byte, long_term_fee_per_byte)
+        # Columnar pools (UtxoPool, WalletPool, or a view exposing their
+        # group columns) are used as they are
+        if isinstance(utxo_pool, (UtxoPool, WalletPool)) or hasattr(utxo_pool, "group_effective_values"):
+            pool = utxo_pool
+        else:
+            pool = UtxoPool.from_output_groups(utxo_pool)
+        # Batched repricing of the whole pool; the OutputGroup objects themselves
+        # are only repriced if they end up being selected
+        pool.set_fee(short_term_fee_per_byte, long_term_fee_per_byte)
         self.utxo_pool = utxo_pool
+        # Columnar view of utxo_pool which the selection algorithms work from
+        self.pool = pool
         self.target_value = target_value
         self.short_term_fee_per_byte = short_term_fee_per_byte
         self.long_term_fee_per_byte = long_term_fee_per_byte
@@ -25,13 +36,11 @@ class CoinSelectionParams:
 
     @property
     def total_value(self):
-        return int(sum(output_group.value for output_group in self.utxo_pool))
+        return int(self.pool.total_value)
 
     @property
     def total_effective_value(self):
-        return int(
-          sum(output_group.effective_value for output_group in self.utxo_pool)
-        )
+        return int(self.pool.total_effective_value)
 
     @property
     def fixed_fee(self):
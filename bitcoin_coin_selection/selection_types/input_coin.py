@@ -1,4 +1,13 @@
+from typing import Union
+
+
 class InputCoin():
+    # Slotted, wallets can hold millions of these
+    __slots__ = (
+        "_tx_hash", "vout", "value", "input_bytes",
+        "effective_value", "fee", "long_term_fee", "address"
+    )
+
     tx_hash: str
     vout: int
     value: int
@@ -14,7 +23,35 @@ class InputCoin():
         self.value = value
         self.input_bytes = input_bytes
 
+    # Hex txids are kept as their 32 bytes and only turned back into hex when read
+    @property
+    def tx_hash(self) -> str:
+        return unpack_tx_hash(self._tx_hash)
+
+    @tx_hash.setter
+    def tx_hash(self, tx_hash: str):
+        self._tx_hash = pack_tx_hash(tx_hash)
+
     def set_fee(self, short_term_fee_per_byte: int, long_term_fee_per_byte: int):
         self.fee = self.input_bytes * short_term_fee_per_byte
         self.long_term_fee = self.input_bytes * long_term_fee_per_byte
         self.effective_value = self.value - self.fee
+
+
+def pack_tx_hash(tx_hash: str) -> Union[bytes, str]:
+    # Lowercase 64 character hex strings become 32 bytes, anything else that
+    # wouldn't read back the same (e.g. test placeholders) is kept as is
+    if isinstance(tx_hash, str) and len(tx_hash) == 64:
+        try:
+            packed = bytes.fromhex(tx_hash)
+        except ValueError:
+            return tx_hash
+        if packed.hex() == tx_hash:
+            return packed
+    return tx_hash
+
+
+def unpack_tx_hash(tx_hash: Union[bytes, str]) -> str:
+    if isinstance(tx_hash, bytes):
+        return tx_hash.hex()
+    return tx_hash
@@ -1,3 +1,5 @@
+import sys
+
 from typing import List
 from bitcoin_coin_selection.selection_types.input_coin import InputCoin
 
@@ -12,6 +14,8 @@ select without group restriction would find a more optimal set of coins
 
 
 class OutputGroup():
+    __slots__ = ("outputs", "value", "effective_value", "fee", "long_term_fee", "address")
+
     outputs: List[InputCoin]
     value: int
     effective_value: int
@@ -21,7 +25,9 @@ class OutputGroup():
 
     def __init__(self, address: str, outputs: List[InputCoin]):
         self.value = 0
-        self.address = address
+        # Interned, every coin of the group (and every group of the address
+        # across pools) refers to the one string
+        self.address = sys.intern(address)
         self.outputs = []
         for output in outputs:
             self.insert(output)
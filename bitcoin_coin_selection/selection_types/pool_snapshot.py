@@ -0,0 +1,194 @@
+import mmap
+import os
+import struct
+import sys
+
+from array import array
+from collections.abc import Sequence
+from typing import List, Optional, Tuple, Union
+
+from bitcoin_coin_selection.selection_types.input_coin import pack_tx_hash
+from bitcoin_coin_selection.selection_types.utxo_pool import UtxoPool
+from bitcoin_coin_selection.selection_types.wallet_pool import WalletPool
+
+"""
+Binary on-disk snapshot of a utxo pool
+
+Layout (little endian, every section 8 byte aligned):
+
+    header           magic, version, coin count, group count, address bytes
+    values           int64 per coin
+    vouts            int64 per coin
+    input_bytes      int64 per coin
+    group_offsets    int64 per group + 1
+    group_values     int64 per group
+    address_offsets  int64 per group + 1, into the address bytes
+    tx_hashes        32 bytes per coin
+    addresses        utf-8, back to back
+
+open_pool_snapshot maps the file instead of reading it: the int64 columns of
+the returned UtxoPool are views straight into the mapping, and tx hashes and
+addresses are only decoded for the coins a selection hands out. The pool is
+read-only (it can be repriced, but not appended to).
+
+Snapshot pools pickle as their path and fee rates, and are opened again from
+the file on the other side, so they can be handed to process pools. The file
+mustn't change in the meantime; if its size or modification time did, the
+reopening fails.
+"""
+
+MAGIC = b"UTXOPOOL"
+VERSION = 1
+_HEADER = struct.Struct("<8s4Q")
+_TX_HASH_SIZE = 32
+
+
+def write_pool_snapshot(pool: Union[UtxoPool, WalletPool], path: str):
+    if isinstance(pool, WalletPool):
+        pool = UtxoPool.from_records(pool.utxo_records())
+    tx_hashes = bytearray()
+    for tx_hash in pool.tx_hashes:
+        packed = pack_tx_hash(tx_hash)
+        if not isinstance(packed, bytes):
+            raise ValueError("Snapshots need 64 character lowercase hex tx hashes, got {!r}".format(tx_hash))
+        tx_hashes += packed
+    encoded_addresses = [address.encode("utf-8") for address in pool.addresses]
+    address_offsets = array("q", [0])
+    for encoded_address in encoded_addresses:
+        address_offsets.append(address_offsets[-1] + len(encoded_address))
+
+    with open(path, "wb") as file:
+        file.write(_HEADER.pack(MAGIC, VERSION, len(pool.values), len(pool), address_offsets[-1]))
+        for column in [
+            pool.values, pool.vouts, pool.input_bytes,
+            pool.group_offsets, pool.group_values, address_offsets
+        ]:
+            file.write(_little_endian(array("q", column)))
+        file.write(tx_hashes)
+        file.write(b"".join(encoded_addresses))
+
+
+def open_pool_snapshot(path: str) -> UtxoPool:
+    with open(path, "rb") as file:
+        mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    data = memoryview(mapping)
+    if len(data) < _HEADER.size:
+        raise ValueError("{} is not a utxo pool snapshot".format(path))
+    magic, version, coin_count, group_count, address_size = _HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("{} is not a version {} utxo pool snapshot".format(path, VERSION))
+    expected_size = (
+        _HEADER.size + 8 * (3 * coin_count + 3 * group_count + 2)
+        + _TX_HASH_SIZE * coin_count + address_size
+    )
+    if len(data) != expected_size:
+        raise ValueError("{} is truncated or corrupt".format(path))
+
+    offset = _HEADER.size
+    columns = []
+    for count in [coin_count, coin_count, coin_count, group_count + 1, group_count, group_count + 1]:
+        columns.append(_int64_column(data[offset:offset + 8 * count]))
+        offset += 8 * count
+    values, vouts, input_bytes, group_offsets, group_values, address_offsets = columns
+    tx_hashes = data[offset:offset + _TX_HASH_SIZE * coin_count]
+    offset += _TX_HASH_SIZE * coin_count
+    addresses = data[offset:offset + address_size]
+
+    pool = _SnapshotPool(path, os.stat(path), data)
+    pool.tx_hashes = _TxHashColumn(tx_hashes)
+    pool.vouts = vouts
+    pool.values = values
+    pool.input_bytes = input_bytes
+    pool.group_offsets = group_offsets
+    pool.addresses = _AddressTable(address_offsets, addresses)
+    pool.group_values = group_values
+    return pool
+
+
+def _reopen_pool_snapshot(
+    path: str,
+    stat_key: Tuple[int, int],
+    fee_rates: Optional[Tuple[int, int]]
+) -> UtxoPool:
+    pool = open_pool_snapshot(path)
+    if pool._stat_key != stat_key:
+        raise ValueError("{} has changed since the pool was sent".format(path))
+    if fee_rates is not None:
+        pool.set_fee(*fee_rates)
+    return pool
+
+
+class _SnapshotPool(UtxoPool):
+    # UtxoPool over a mapped snapshot file
+    def __init__(self, path: str, stat: os.stat_result, data: memoryview):
+        super().__init__()
+        self.path = path
+        self._stat_key = (stat.st_size, stat.st_mtime_ns)
+        self._data = data
+
+    def append(self, address, utxos):
+        raise ValueError("Snapshot pools are read-only")
+
+    @property
+    def fingerprint(self) -> int:
+        # The pool is the file's bytes and can't change, so they are hashed
+        # once as they are mapped rather than decoding every tx hash
+        if self._fingerprint is None:
+            self._fingerprint = hash(self._data)
+        return self._fingerprint
+
+    def __reduce__(self):
+        fee_rates = None if self._fees_stale else (self.short_term_fee_per_byte, self.long_term_fee_per_byte)
+        return _reopen_pool_snapshot, (self.path, self._stat_key, fee_rates)
+
+
+class _TxHashColumn(Sequence):
+    # Hex tx hashes decoded on access from 32 byte records
+    def __init__(self, data: memoryview):
+        self._data = data
+
+    def __len__(self):
+        return len(self._data) // _TX_HASH_SIZE
+
+    def __getitem__(self, i: Union[int, slice]) -> Union[str, List[str]]:
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("tx hash index out of range")
+        return self._data[i * _TX_HASH_SIZE:(i + 1) * _TX_HASH_SIZE].hex()
+
+
+class _AddressTable(Sequence):
+    # Addresses decoded (and interned) on access
+    def __init__(self, offsets: Sequence, data: memoryview):
+        self._offsets = offsets
+        self._data = data
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i: Union[int, slice]) -> Union[str, List[str]]:
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("address index out of range")
+        return sys.intern(str(self._data[self._offsets[i]:self._offsets[i + 1]], "utf-8"))
+
+
+def _int64_column(data: memoryview) -> Sequence:
+    if sys.byteorder == "little":
+        return data.cast("q")
+    column = array("q")
+    column.frombytes(data)
+    column.byteswap()
+    return column
+
+
+def _little_endian(column: array) -> bytes:
+    if sys.byteorder != "little":
+        column.byteswap()
+    return column.tobytes()
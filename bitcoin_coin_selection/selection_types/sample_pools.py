@@ -0,0 +1,52 @@
+from typing import List, Tuple
+
+from bitcoin_coin_selection.selection_types.input_coin import InputCoin
+from bitcoin_coin_selection.selection_types.output_group import OutputGroup
+
+"""
+Sample pools
+
+The pools the tests' fixtures are made of, as plain functions so that code
+outside of pytest (such as the benchmarks) can build the same pools without
+depending on it.
+"""
+
+# Address and input size of every generated coin
+FAKE_ADDRESS = "1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa"
+INPUT_BYTES = 100
+
+
+def generate_utxo_pool_from_amounts(
+    amounts: List[int],
+    short_term_fee_per_byte: int = 0,
+    long_term_fee_per_byte: int = 0
+) -> List[OutputGroup]:
+    utxo_pool: List[OutputGroup] = []
+    for amount in amounts:
+        input_coin = InputCoin(
+            tx_hash="",
+            vout=0,
+            value=int(amount),
+            input_bytes=INPUT_BYTES
+        )
+        output_group = OutputGroup(FAKE_ADDRESS, [input_coin])
+        output_group.set_fee(short_term_fee_per_byte,
+                             long_term_fee_per_byte)
+        utxo_pool.append(output_group)
+    return utxo_pool
+
+
+def hard_case_amounts(utxo_count: int) -> Tuple[int, List[int]]:
+    # 2 * utxo_count coins, where every pair differs by a bit only the exact
+    # subset can make up. Values go up to 1 << (2 * utxo_count)
+    target_value = 0
+    utxo_amounts: List[int] = []
+
+    for i in range(utxo_count):
+        target_value += 1 << (utxo_count + i)
+        utxo_amount_1 = 1 << (utxo_count + i)
+        utxo_amount_2 = (1 << (utxo_count + i)) + (1 << (utxo_count-1-i))
+        utxo_amounts.append(utxo_amount_1)
+        utxo_amounts.append(utxo_amount_2)
+
+    return (target_value, utxo_amounts)
@@ -0,0 +1,30 @@
+from typing import List, Optional
+
+
+class SelectionStats():
+    # Name of the algorithm, e.g. "branch_and_bound" or "select_coins"
+    algorithm: str
+    # Seconds spent in the algorithm
+    wall_time: float
+    # Branch and bound: tries used; knapsack: stochastic approximation
+    # iterations; single random draw: output groups drawn
+    iterations: int
+    # Branch and bound only
+    backtracks: int
+    equal_value_skips: int
+    # Whether branch and bound used up all of its tries
+    tries_exhausted: bool
+    # select_coins only: stats of each algorithm run by the cascade, in order,
+    # and the name of the one whose selection was returned
+    cascade: List["SelectionStats"]
+    selected_by: Optional[str]
+
+    def __init__(self, algorithm: str):
+        self.algorithm = algorithm
+        self.wall_time = 0.0
+        self.iterations = 0
+        self.backtracks = 0
+        self.equal_value_skips = 0
+        self.tries_exhausted = False
+        self.cascade = []
+        self.selected_by = None
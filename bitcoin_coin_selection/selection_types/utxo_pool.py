@@ -0,0 +1,274 @@
+import operator
+import sys
+
+from array import array
+from collections import Counter
+from itertools import accumulate
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from bitcoin_coin_selection.selection_types.input_coin import InputCoin
+from bitcoin_coin_selection.selection_types.output_group import OutputGroup
+
+"""
+Columnar alternative to List[OutputGroup]
+
+Coins are stored in contiguous int64 arrays (one entry per coin) and grouped
+by address through group_offsets: the coins of group i are the slice
+[group_offsets[i], group_offsets[i + 1]). Per-group aggregates are kept in
+their own arrays so the selection algorithms never have to touch a Python
+object for a group they don't select. OutputGroup objects are only built
+(see output_group) for the groups that end up in a CoinSelection.
+"""
+
+# (tx_hash, vout, value, input_bytes)
+UtxoRecord = Tuple[str, int, int, int]
+# (tx_hash, vout, value, input_bytes, address)
+AddressedUtxoRecord = Tuple[str, int, int, int, str]
+
+
+class UtxoPool():
+    tx_hashes: List[str]
+    vouts: array
+    values: array
+    input_bytes: array
+    fees: array
+    long_term_fees: array
+    effective_values: array
+    group_offsets: array
+    addresses: List[str]
+    group_values: array
+    group_fees: array
+    group_long_term_fees: array
+    group_effective_values: array
+    short_term_fee_per_byte: int
+    long_term_fee_per_byte: int
+
+    def __init__(self):
+        self.tx_hashes = []
+        self.vouts = array("q")
+        self.values = array("q")
+        self.input_bytes = array("q")
+        self.fees = array("q")
+        self.long_term_fees = array("q")
+        self.effective_values = array("q")
+        self.group_offsets = array("q", [0])
+        self.addresses = []
+        self.group_values = array("q")
+        self.group_fees = array("q")
+        self.group_long_term_fees = array("q")
+        self.group_effective_values = array("q")
+        self.short_term_fee_per_byte = 0
+        self.long_term_fee_per_byte = 0
+        # Whether coins were appended since the last set_fee
+        self._fees_stale = True
+        # Cached sorted_by_effective_value, only good for the current fee rate
+        self._sorted_by_effective_value: Optional[Tuple[int, ...]] = None
+        self._fingerprint: Optional[int] = None
+        # Original objects when the pool was built from a List[OutputGroup],
+        # so selections hand back the caller's own OutputGroup/InputCoin instances
+        self._output_groups: Optional[List[OutputGroup]] = None
+
+    @classmethod
+    def from_output_groups(cls, output_groups: List[OutputGroup], keep_objects: bool = True):
+        # With keep_objects=False selections get new OutputGroup/InputCoin
+        # instances rather than the ones passed in
+        pool = cls()
+        for output_group in output_groups:
+            pool.append(
+                output_group.address,
+                (
+                    (output.tx_hash, output.vout, output.value, output.input_bytes)
+                    for output in output_group.outputs
+                )
+            )
+            # OutputGroup.value keeps counting outputs set_fee dropped as uneconomical
+            pool.group_values[-1] = int(output_group.value)
+        if keep_objects:
+            pool._output_groups = list(output_groups)
+        return pool
+
+    @classmethod
+    def from_records(cls, records: Iterable[AddressedUtxoRecord]):
+        # Builds the pool in a single pass over records in any order (e.g. a
+        # streamed wallet export). Coins are appended to the columns as they
+        # come, each address gets a group through a hash index, and the columns
+        # are put in group order once at the end
+        pool = cls()
+        slots = {}
+        coin_slots = array("q")
+        tx_hashes = pool.tx_hashes
+        for tx_hash, vout, value, input_bytes, address in records:
+            slot = slots.get(address)
+            if slot is None:
+                slot = slots[address] = len(pool.addresses)
+                pool.addresses.append(sys.intern(address))
+            coin_slots.append(slot)
+            tx_hashes.append(tx_hash)
+            pool.vouts.append(int(vout))
+            pool.values.append(int(value))
+            pool.input_bytes.append(int(input_bytes))
+
+        # Stable, so coins keep their order within a group
+        order = sorted(range(len(coin_slots)), key=coin_slots.__getitem__)
+        pool.tx_hashes = list(map(tx_hashes.__getitem__, order))
+        pool.vouts = array("q", map(pool.vouts.__getitem__, order))
+        pool.values = array("q", map(pool.values.__getitem__, order))
+        pool.input_bytes = array("q", map(pool.input_bytes.__getitem__, order))
+        coin_counts = Counter(coin_slots)
+        pool.group_offsets.extend(
+            accumulate(map(coin_counts.__getitem__, range(len(pool.addresses))))
+        )
+        pool.group_values = pool._sum_by_group(pool.values)
+        return pool
+
+    def __len__(self):
+        return len(self.addresses)
+
+    def append(self, address: str, utxos: Iterable[UtxoRecord]):
+        group_value = 0
+        for tx_hash, vout, value, input_bytes in utxos:
+            self.tx_hashes.append(tx_hash)
+            self.vouts.append(vout)
+            self.values.append(int(value))
+            self.input_bytes.append(input_bytes)
+            group_value += int(value)
+        self.group_offsets.append(len(self.values))
+        self.addresses.append(sys.intern(address))
+        self.group_values.append(group_value)
+        self._fees_stale = True
+        self._sorted_by_effective_value = None
+        self._fingerprint = None
+        # A pool built from objects is no longer a mirror of them once it grows
+        self._output_groups = None
+
+    def set_fee(self, short_term_fee_per_byte: int, long_term_fee_per_byte: int):
+        # Pools reused across selections at the same fee rate are only priced once
+        if (
+            not self._fees_stale
+            and short_term_fee_per_byte == self.short_term_fee_per_byte
+            and long_term_fee_per_byte == self.long_term_fee_per_byte
+        ):
+            return
+        # Coins are priced per input size class rather than one by one: every
+        # coin of a given input size pays the same fee, so each distinct size is
+        # priced once and the per-coin columns are filled through C-level map()
+        fee_by_size = {}
+        long_term_fee_by_size = {}
+        for size in set(self.input_bytes):
+            fee_by_size[size] = size * short_term_fee_per_byte
+            long_term_fee_by_size[size] = size * long_term_fee_per_byte
+        self.short_term_fee_per_byte = short_term_fee_per_byte
+        self.long_term_fee_per_byte = long_term_fee_per_byte
+        self.fees = array("q", map(fee_by_size.__getitem__, self.input_bytes))
+        self.long_term_fees = array(
+            "q", map(long_term_fee_by_size.__getitem__, self.input_bytes)
+        )
+        self.effective_values = array(
+            "q", map(operator.sub, self.values, self.fees)
+        )
+        self._set_group_fees()
+        self._fees_stale = False
+        self._sorted_by_effective_value = None
+
+    def _set_group_fees(self):
+        # Outputs with negative effective values are left out of their group,
+        # mirroring OutputGroup.set_fee
+        is_spendable = array("q", map((0).__lt__, self.effective_values))
+        fees = array("q", map(operator.mul, self.fees, is_spendable))
+        long_term_fees = array(
+            "q", map(operator.mul, self.long_term_fees, is_spendable)
+        )
+        effective_values = array(
+            "q", map(operator.mul, self.effective_values, is_spendable)
+        )
+        if len(self.values) == len(self):
+            # One coin per group, group aggregates are the coin columns themselves
+            self.group_fees = fees
+            self.group_long_term_fees = long_term_fees
+            self.group_effective_values = effective_values
+        else:
+            self.group_fees = self._sum_by_group(fees)
+            self.group_long_term_fees = self._sum_by_group(long_term_fees)
+            self.group_effective_values = self._sum_by_group(effective_values)
+
+    def _sum_by_group(self, column: array) -> array:
+        prefix_sums = array("q", [0])
+        prefix_sums.extend(accumulate(column))
+        ends = map(prefix_sums.__getitem__, self.group_offsets[1:])
+        starts = map(prefix_sums.__getitem__, self.group_offsets[:-1])
+        return array("q", map(operator.sub, ends, starts))
+
+    @property
+    def fingerprint(self) -> int:
+        # Hash of the pool's coins and groups, for caching selections. Computed
+        # on first use and kept until the pool grows; fee rates aren't part of it
+        if self._fingerprint is None:
+            self._fingerprint = hash((
+                tuple(self.tx_hashes),
+                tuple(self.addresses),
+                bytes(self.vouts),
+                bytes(self.values),
+                bytes(self.input_bytes),
+                bytes(self.group_offsets),
+                bytes(self.group_values),
+            ))
+        return self._fingerprint
+
+    @property
+    def total_value(self):
+        return sum(self.group_values)
+
+    @property
+    def total_effective_value(self):
+        return sum(self.group_effective_values)
+
+    def sorted_by_effective_value(self) -> Sequence[int]:
+        # Group indices by descending effective value. The order is computed once
+        # per fee rate and shared between selections, hence read-only
+        if self._sorted_by_effective_value is None:
+            self._sorted_by_effective_value = tuple(sorted(
+                range(len(self)), key=self.group_effective_values.__getitem__, reverse=True
+            ))
+        return self._sorted_by_effective_value
+
+    def output_group(
+        self,
+        i: int,
+        short_term_fee_per_byte: Optional[int] = None,
+        long_term_fee_per_byte: Optional[int] = None
+    ) -> OutputGroup:
+        # Priced at the pool's fee rates unless given others. Pricing drops
+        # the coins that are uneconomic at that rate from the group, so at
+        # other rates the group is built anew from the coin columns rather
+        # than taken from (and repricing) the caller's objects
+        if short_term_fee_per_byte is None:
+            short_term_fee_per_byte = self.short_term_fee_per_byte
+            long_term_fee_per_byte = self.long_term_fee_per_byte
+        if self._output_groups is not None and (short_term_fee_per_byte, long_term_fee_per_byte) == (
+            self.short_term_fee_per_byte, self.long_term_fee_per_byte
+        ):
+            output_group = self._output_groups[i]
+        else:
+            output_group = OutputGroup(
+                self.addresses[i],
+                [
+                    InputCoin(
+                        self.tx_hashes[j],
+                        self.vouts[j],
+                        self.values[j],
+                        self.input_bytes[j]
+                    )
+                    for j in range(self.group_offsets[i], self.group_offsets[i + 1])
+                ]
+            )
+        # Only the groups that are actually handed out get priced as objects
+        output_group.set_fee(short_term_fee_per_byte, long_term_fee_per_byte)
+        return output_group
+
+    def output_groups(
+        self,
+        indices: Iterable[int],
+        short_term_fee_per_byte: Optional[int] = None,
+        long_term_fee_per_byte: Optional[int] = None
+    ) -> List[OutputGroup]:
+        return [self.output_group(i, short_term_fee_per_byte, long_term_fee_per_byte) for i in indices]
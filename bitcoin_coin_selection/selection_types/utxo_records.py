@@ -0,0 +1,98 @@
+import csv
+import json
+import sys
+
+from contextlib import contextmanager
+from typing import IO, Dict, Iterable, Iterator, List, Union
+
+from bitcoin_coin_selection.selection_types.input_coin import InputCoin
+from bitcoin_coin_selection.selection_types.output_group import OutputGroup
+from bitcoin_coin_selection.selection_types.utxo_pool import AddressedUtxoRecord, UtxoPool
+from bitcoin_coin_selection.selection_types.wallet_pool import WalletPool
+
+"""
+Streaming utxo ingestion
+
+Utxo records (tx_hash, vout, value, input_bytes, address) are read lazily from
+CSV or JSONL files, one record at a time, and grouped by address in a single
+pass into whichever representation the caller selects from:
+
+    load_utxo_pool(read_utxo_records("wallet.csv"))
+
+CSV files need a header naming at least the five fields, JSONL files hold one
+object with those keys per line; other columns/keys are ignored. The load_*
+functions take any iterable of records, so an app can feed them its own
+objects through a generator instead of building OutputGroups itself.
+"""
+
+Source = Union[str, IO[str]]
+
+
+def read_csv_records(source: Source) -> Iterator[AddressedUtxoRecord]:
+    with _open(source) as file:
+        for row in csv.DictReader(file):
+            yield _to_record(row)
+
+
+def read_jsonl_records(source: Source) -> Iterator[AddressedUtxoRecord]:
+    with _open(source) as file:
+        for line in file:
+            if line.strip():
+                yield _to_record(json.loads(line))
+
+
+def read_utxo_records(path: str) -> Iterator[AddressedUtxoRecord]:
+    # Picks the reader from the file extension
+    if path.endswith(".csv"):
+        return read_csv_records(path)
+    if path.endswith(".jsonl") or path.endswith(".ndjson"):
+        return read_jsonl_records(path)
+    raise ValueError("Unknown utxo record file type: {}".format(path))
+
+
+def load_utxo_pool(records: Iterable[AddressedUtxoRecord]) -> UtxoPool:
+    return UtxoPool.from_records(records)
+
+
+def load_wallet_pool(
+    records: Iterable[AddressedUtxoRecord],
+    short_term_fee_per_byte: int = 0,
+    long_term_fee_per_byte: int = 0
+) -> WalletPool:
+    wallet_pool = WalletPool(short_term_fee_per_byte, long_term_fee_per_byte)
+    wallet_pool.apply_block_delta(created=records)
+    return wallet_pool
+
+
+def load_output_groups(records: Iterable[AddressedUtxoRecord]) -> List[OutputGroup]:
+    # Groups in order of their address' first record
+    output_groups: Dict[str, OutputGroup] = {}
+    for tx_hash, vout, value, input_bytes, address in records:
+        output_group = output_groups.get(address)
+        if output_group is None:
+            output_group = output_groups[address] = OutputGroup(address, [])
+        output_group.insert(InputCoin(tx_hash, vout, value, input_bytes))
+    return list(output_groups.values())
+
+
+def _to_record(row: dict) -> AddressedUtxoRecord:
+    try:
+        return (
+            row["tx_hash"],
+            int(row["vout"]),
+            int(row["value"]),
+            int(row["input_bytes"]),
+            sys.intern(row["address"]),
+        )
+    except KeyError as error:
+        raise ValueError("Utxo record is missing {}".format(error)) from None
+
+
+@contextmanager
+def _open(source: Source) -> Iterator[IO[str]]:
+    # Paths are opened (and closed) here, file objects are left to the caller
+    if isinstance(source, str):
+        with open(source, newline="") as file:
+            yield file
+    else:
+        yield source
@@ -0,0 +1,245 @@
+import sys
+
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from bitcoin_coin_selection.selection_types.input_coin import InputCoin
+from bitcoin_coin_selection.selection_types.output_group import OutputGroup
+
+"""
+Long-lived, mutable utxo pool for a wallet
+
+Where UtxoPool is built once and repriced as a whole, a WalletPool follows the
+wallet as coins are received and spent. Group aggregates and the pool totals
+are kept up to date on every change, so a selection never has to re-scan the
+wallet to learn them, and ingesting a block costs time proportional to the
+coins it touches. The order of the groups by effective value is only sorted
+again when a selection asks for it after a change, once however many changes
+came before.
+
+Groups live in dense slots (0 .. len(pool) - 1) exposing the same group_*
+columns as UtxoPool, so the selection algorithms can run against either.
+"""
+
+# (tx_hash, vout)
+Outpoint = Tuple[str, int]
+# (tx_hash, vout, value, input_bytes, address)
+WalletUtxo = Tuple[str, int, int, int, str]
+
+
+class WalletPool():
+    group_values: array
+    group_fees: array
+    group_long_term_fees: array
+    group_effective_values: array
+    addresses: List[str]
+    short_term_fee_per_byte: int
+    long_term_fee_per_byte: int
+    total_value: int
+    total_effective_value: int
+
+    def __init__(self, short_term_fee_per_byte: int = 0, long_term_fee_per_byte: int = 0):
+        self.group_values = array("q")
+        self.group_fees = array("q")
+        self.group_long_term_fees = array("q")
+        self.group_effective_values = array("q")
+        self.addresses = []
+        self.short_term_fee_per_byte = short_term_fee_per_byte
+        self.long_term_fee_per_byte = long_term_fee_per_byte
+        self.total_value = 0
+        self.total_effective_value = 0
+        # outpoint -> (value, input_bytes, address)
+        self._utxos: Dict[Outpoint, Tuple[int, int, str]] = {}
+        self._slots: Dict[str, int] = {}
+        self._group_outpoints: List[List[Outpoint]] = []
+        # Xor of the hashes of every utxo, kept up to date on add and remove
+        self._utxo_hashes = 0
+        # Slots by descending group effective value, None once a group changes
+        self._sorted_by_effective_value: Optional[Tuple[int, ...]] = None
+
+    def __len__(self):
+        return len(self.addresses)
+
+    def __contains__(self, outpoint: Outpoint):
+        return outpoint in self._utxos
+
+    @property
+    def utxo_count(self):
+        return len(self._utxos)
+
+    @property
+    def fingerprint(self) -> int:
+        # Hash of the utxos in the pool, for caching selections; O(1) as it is
+        # maintained incrementally. Fee rates aren't part of it
+        return hash((self._utxo_hashes, len(self._utxos)))
+
+    def add(self, tx_hash: str, vout: int, value: int, input_bytes: int, address: str):
+        outpoint = (tx_hash, vout)
+        if outpoint in self._utxos:
+            raise ValueError("Utxo {}:{} is already in the pool".format(tx_hash, vout))
+        value = int(value)
+        address = sys.intern(address)
+        self._utxos[outpoint] = (value, input_bytes, address)
+        self._utxo_hashes ^= hash((outpoint, value, input_bytes, address))
+        slot = self._slots.get(address)
+        if slot is None:
+            slot = self._new_slot(address)
+        self._group_outpoints[slot].append(outpoint)
+        self._add_to_group(slot, value, input_bytes, 1)
+
+    def remove(self, tx_hash: str, vout: int):
+        outpoint = (tx_hash, vout)
+        value, input_bytes, address = self._utxos.pop(outpoint)
+        self._utxo_hashes ^= hash((outpoint, value, input_bytes, address))
+        slot = self._slots[address]
+        self._group_outpoints[slot].remove(outpoint)
+        self._add_to_group(slot, value, input_bytes, -1)
+        if not self._group_outpoints[slot]:
+            self._free_slot(slot)
+
+    def apply_block_delta(
+        self,
+        created: Iterable[WalletUtxo] = (),
+        spent: Iterable[Outpoint] = ()
+    ):
+        # Coins created and spent within the same block are added, then removed
+        for tx_hash, vout, value, input_bytes, address in created:
+            self.add(tx_hash, vout, value, input_bytes, address)
+        for tx_hash, vout in spent:
+            # Blocks spend plenty of coins that aren't ours
+            if (tx_hash, vout) in self._utxos:
+                self.remove(tx_hash, vout)
+
+    def set_fee(self, short_term_fee_per_byte: int, long_term_fee_per_byte: int):
+        if (
+            short_term_fee_per_byte == self.short_term_fee_per_byte
+            and long_term_fee_per_byte == self.long_term_fee_per_byte
+        ):
+            return
+        self.short_term_fee_per_byte = short_term_fee_per_byte
+        self.long_term_fee_per_byte = long_term_fee_per_byte
+        self.group_values, self.group_fees, self.group_long_term_fees, self.group_effective_values = (
+            self.group_columns(short_term_fee_per_byte, long_term_fee_per_byte)
+        )
+        self.total_value = sum(self.group_values)
+        self.total_effective_value = sum(self.group_effective_values)
+        self._sorted_by_effective_value = None
+
+    def group_columns(
+        self,
+        short_term_fee_per_byte: int,
+        long_term_fee_per_byte: int
+    ) -> Tuple[array, array, array, array]:
+        # (group_values, group_fees, group_long_term_fees, group_effective_values)
+        # by slot at the given fee rates, leaving the pool's own as they are
+        group_values = array("q")
+        group_fees = array("q")
+        group_long_term_fees = array("q")
+        group_effective_values = array("q")
+        utxos = self._utxos
+        for outpoints in self._group_outpoints:
+            value_sum = fee_sum = long_term_fee_sum = effective_value_sum = 0
+            for outpoint in outpoints:
+                value, input_bytes, _ = utxos[outpoint]
+                fee = input_bytes * short_term_fee_per_byte
+                value_sum += value
+                # As in _add_to_group
+                if value > fee:
+                    fee_sum += fee
+                    long_term_fee_sum += input_bytes * long_term_fee_per_byte
+                    effective_value_sum += value - fee
+            group_values.append(value_sum)
+            group_fees.append(fee_sum)
+            group_long_term_fees.append(long_term_fee_sum)
+            group_effective_values.append(effective_value_sum)
+        return group_values, group_fees, group_long_term_fees, group_effective_values
+
+    def sorted_by_effective_value(self) -> Sequence[int]:
+        # Ties in slot order. Sorted anew on the first call after a change
+        if self._sorted_by_effective_value is None:
+            self._sorted_by_effective_value = tuple(sorted(
+                range(len(self)), key=self.group_effective_values.__getitem__, reverse=True
+            ))
+        return self._sorted_by_effective_value
+
+    def output_group(
+        self,
+        i: int,
+        short_term_fee_per_byte: Optional[int] = None,
+        long_term_fee_per_byte: Optional[int] = None
+    ) -> OutputGroup:
+        # Priced at the pool's fee rates unless given others
+        if short_term_fee_per_byte is None:
+            short_term_fee_per_byte = self.short_term_fee_per_byte
+            long_term_fee_per_byte = self.long_term_fee_per_byte
+        input_coins = []
+        for tx_hash, vout in self._group_outpoints[i]:
+            value, input_bytes, address = self._utxos[(tx_hash, vout)]
+            input_coins.append(InputCoin(tx_hash, vout, value, input_bytes))
+        output_group = OutputGroup(self.addresses[i], input_coins)
+        output_group.set_fee(short_term_fee_per_byte, long_term_fee_per_byte)
+        return output_group
+
+    def output_groups(
+        self,
+        indices: Iterable[int],
+        short_term_fee_per_byte: Optional[int] = None,
+        long_term_fee_per_byte: Optional[int] = None
+    ) -> List[OutputGroup]:
+        return [self.output_group(i, short_term_fee_per_byte, long_term_fee_per_byte) for i in indices]
+
+    def slot_of(self, address: str) -> Optional[int]:
+        # Slot of the address' group, None if it has no coins. Slots move as
+        # groups come and go
+        return self._slots.get(address)
+
+    def utxo_records(self) -> Iterator[WalletUtxo]:
+        # Every utxo in the pool, group by group
+        for outpoints in self._group_outpoints:
+            for tx_hash, vout in outpoints:
+                value, input_bytes, address = self._utxos[(tx_hash, vout)]
+                yield (tx_hash, vout, value, input_bytes, address)
+
+    def _add_to_group(self, slot: int, value: int, input_bytes: int, sign: int):
+        self._sorted_by_effective_value = None
+        fee = input_bytes * self.short_term_fee_per_byte
+        effective_value = value - fee
+        self.group_values[slot] += sign * value
+        self.total_value += sign * value
+        # Outputs with negative effective values are left out of the group,
+        # mirroring OutputGroup.set_fee
+        if effective_value > 0:
+            self.group_fees[slot] += sign * fee
+            self.group_long_term_fees[slot] += sign * input_bytes * self.long_term_fee_per_byte
+            self.group_effective_values[slot] += sign * effective_value
+            self.total_effective_value += sign * effective_value
+
+    def _new_slot(self, address: str) -> int:
+        slot = len(self)
+        self._slots[address] = slot
+        self.addresses.append(address)
+        self._group_outpoints.append([])
+        self.group_values.append(0)
+        self.group_fees.append(0)
+        self.group_long_term_fees.append(0)
+        self.group_effective_values.append(0)
+        return slot
+
+    def _free_slot(self, slot: int):
+        # Keep slots dense by moving the last group into the freed slot
+        last = len(self) - 1
+        del self._slots[self.addresses[slot]]
+        if slot != last:
+            self.addresses[slot] = self.addresses[last]
+            self._group_outpoints[slot] = self._group_outpoints[last]
+            self.group_values[slot] = self.group_values[last]
+            self.group_fees[slot] = self.group_fees[last]
+            self.group_long_term_fees[slot] = self.group_long_term_fees[last]
+            self.group_effective_values[slot] = self.group_effective_values[last]
+            self._slots[self.addresses[slot]] = slot
+        self.addresses.pop()
+        self._group_outpoints.pop()
+        self.group_values.pop()
+        self.group_fees.pop()
+        self.group_long_term_fees.pop()
+        self.group_effective_values.pop()
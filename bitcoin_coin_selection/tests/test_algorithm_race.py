@@ -0,0 +1,73 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+
+from bitcoin_coin_selection.selection_algorithms import algorithm_race
+from bitcoin_coin_selection.selection_algorithms.algorithm_race import select_coins_race
+from bitcoin_coin_selection.selection_algorithms.branch_and_bound import select_coins_branch_and_bound
+from bitcoin_coin_selection.selection_types.change_constants import CENT, COIN
+from bitcoin_coin_selection.selection_types.coin_selection import CoinSelection
+from bitcoin_coin_selection.selection_types.coin_selection_params import CoinSelectionParams
+from bitcoin_coin_selection.tests.fixtures import generate_utxo_pool
+from bitcoin_coin_selection.tests.coin_selection_params import TestParams
+
+
+def test_selection_waste(generate_utxo_pool):
+    utxo_pool = generate_utxo_pool([1 * CENT, 2 * CENT, 3 * CENT, 4 * CENT])
+    params = CoinSelectionParams(utxo_pool, 3 * CENT - 5000, 20, 10, 100, 100, 100)
+    selection = select_coins_branch_and_bound(params)
+
+    assert selection.outcome == CoinSelection.Outcome.SUCCESS
+    # The 3 CENT input costs 1000 more to spend now than at the long term fee
+    # rate, and the 1000 it is over the target goes to the fee too
+    assert selection.effective_value == 3 * CENT - 2000
+    assert selection.long_term_fee == 1000
+    assert selection.change_value == 0
+    assert selection.waste == 2000
+
+
+def test_race_exact_match(generate_utxo_pool):
+    utxo_pool = generate_utxo_pool([1 * CENT, 2 * CENT, 3 * CENT, 4 * CENT, 5 * CENT])
+    selection = select_coins_race(TestParams(utxo_pool, 10 * CENT, cost_of_change=0.5 * CENT))
+
+    assert selection.outcome == CoinSelection.Outcome.SUCCESS
+    assert selection.effective_value == 10 * CENT
+    assert selection.waste == 0
+
+
+@pytest.mark.parametrize("executor_class", [ProcessPoolExecutor, ThreadPoolExecutor])
+def test_race_least_waste(generate_utxo_pool, executor_class):
+    utxo_pool = generate_utxo_pool(
+        [5 * CENT, 6 * CENT, 7 * CENT, 8 * CENT, 18 * CENT, 20 * CENT, 30 * CENT, 1 * COIN]
+    )
+    params = CoinSelectionParams(utxo_pool, 95 * CENT, 10, 10, 100, 100, 100)
+
+    with executor_class(max_workers=3) as executor:
+        selection = select_coins_race(params, executor=executor, cancel_on_exact_match=False)
+        assert selection.outcome == CoinSelection.Outcome.SUCCESS
+        assert selection.effective_value >= params.target_value + params.fixed_fee
+
+    bnb_selection = select_coins_branch_and_bound(params)
+    if bnb_selection.outcome == CoinSelection.Outcome.SUCCESS:
+        assert selection.waste <= bnb_selection.waste
+
+
+def test_race_invalid_spend(generate_utxo_pool):
+    utxo_pool = generate_utxo_pool([1 * CENT])
+    selection = select_coins_race(TestParams(utxo_pool, 2 * CENT))
+
+    assert selection.outcome == CoinSelection.Outcome.INSUFFICIENT_FUNDS
+
+
+def test_race_default_executor_shutdown(generate_utxo_pool):
+    utxo_pool = generate_utxo_pool([1 * CENT, 2 * CENT, 3 * CENT])
+    executor = algorithm_race.get_default_executor()
+    algorithm_race.shutdown_default_executor()
+
+    with pytest.raises(RuntimeError):
+        executor.submit(int)
+    # The next race starts a new one
+    selection = select_coins_race(TestParams(utxo_pool, 3 * CENT))
+    assert selection.outcome == CoinSelection.Outcome.SUCCESS
+    assert algorithm_race.get_default_executor() is not executor
+    algorithm_race.shutdown_default_executor()
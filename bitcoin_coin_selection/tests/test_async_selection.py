@@ -0,0 +1,140 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from bitcoin_coin_selection.selection_algorithms import async_selection
+from bitcoin_coin_selection.selection_algorithms.async_selection import AsyncCoinSelector, async_select_coins
+from bitcoin_coin_selection.selection_types.change_constants import CENT
+from bitcoin_coin_selection.selection_types.coin_selection import CoinSelection
+from bitcoin_coin_selection.selection_types.coin_selection_params import CoinSelectionParams
+from bitcoin_coin_selection.tests.fixtures import generate_utxo_pool, make_hard_case
+from bitcoin_coin_selection.tests.coin_selection_params import TestParams
+
+
+def test_async_select_coins(generate_utxo_pool):
+    utxo_pool = generate_utxo_pool([1 * CENT, 2 * CENT, 3 * CENT, 4 * CENT])
+
+    selection = asyncio.run(async_select_coins(TestParams(utxo_pool, 5 * CENT)))
+
+    assert selection.outcome == CoinSelection.Outcome.SUCCESS
+    assert selection.algorithm == "branch_and_bound"
+    assert selection.effective_value == 5 * CENT
+
+
+def test_async_coin_selector_max_concurrency(generate_utxo_pool, monkeypatch):
+    running = []
+    most_running = []
+    lock = threading.Lock()
+
+    def slow_select_coins(params, deadline=None):
+        with lock:
+            running.append(params)
+            most_running.append(len(running))
+        time.sleep(0.02)
+        with lock:
+            running.remove(params)
+        return CoinSelection.algorithm_failure(params)
+
+    monkeypatch.setattr(async_selection, "select_coins", slow_select_coins)
+    utxo_pool = generate_utxo_pool([1 * CENT, 2 * CENT])
+    selector = AsyncCoinSelector(max_concurrency=2)
+
+    async def select_all():
+        return await asyncio.gather(*[
+            selector.select_coins(TestParams(utxo_pool, 1 * CENT)) for _ in range(8)
+        ])
+
+    try:
+        selections = asyncio.run(select_all())
+    finally:
+        selector.shutdown()
+    assert len(selections) == 8
+    assert max(most_running) == 2
+    assert selector.running == 0
+
+
+def test_async_coin_selector_timeout(make_hard_case):
+    target_value, utxo_pool = make_hard_case(20)
+    params = CoinSelectionParams(utxo_pool, target_value, 0, 0, 0, 0, 0)
+    selector = AsyncCoinSelector(timeout=0.01)
+
+    start = time.monotonic()
+    try:
+        selection = asyncio.run(selector.select_coins(params))
+    finally:
+        selector.shutdown()
+
+    assert time.monotonic() - start < 1
+    # Out of time is a result, as for select_coins
+    assert selection.budget_exhausted
+    assert selection.outcome == CoinSelection.Outcome.SUCCESS
+
+
+def test_async_coin_selector_cancel(generate_utxo_pool, monkeypatch):
+    started = threading.Event()
+
+    def slow_select_coins(params, deadline=None):
+        started.set()
+        time.sleep(0.05)
+        return CoinSelection.algorithm_failure(params)
+
+    monkeypatch.setattr(async_selection, "select_coins", slow_select_coins)
+    utxo_pool = generate_utxo_pool([1 * CENT, 2 * CENT])
+    selector = AsyncCoinSelector(max_concurrency=1)
+
+    async def cancel():
+        task = asyncio.ensure_future(selector.select_coins(TestParams(utxo_pool, 1 * CENT)))
+        while not started.is_set():
+            await asyncio.sleep(0.001)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # The running selection keeps its slot until it is done
+        assert selector.running == 1
+        selection = await selector.select_coins(TestParams(utxo_pool, 1 * CENT))
+        assert selector.running == 0
+        return selection
+
+    try:
+        assert asyncio.run(cancel()).outcome == CoinSelection.Outcome.ALGORITHM_FAILURE
+    finally:
+        selector.shutdown()
+
+
+def test_async_coin_selector_timeout_while_queued(generate_utxo_pool, monkeypatch):
+    release_worker = threading.Event()
+    started = []
+
+    def blocking_select_coins(params, deadline=None):
+        started.append(params)
+        release_worker.wait(1)
+        return CoinSelection.algorithm_failure(params)
+
+    monkeypatch.setattr(async_selection, "select_coins", blocking_select_coins)
+    utxo_pool = generate_utxo_pool([1 * CENT, 2 * CENT])
+    selector = AsyncCoinSelector(max_concurrency=1)
+
+    async def saturate():
+        blocker = asyncio.ensure_future(selector.select_coins(TestParams(utxo_pool, 1 * CENT)))
+        while not started:
+            await asyncio.sleep(0.001)
+        # The only slot is taken for longer than the queued selection's timeout
+        start = time.monotonic()
+        queued = await selector.select_coins(TestParams(utxo_pool, 1 * CENT), timeout=0.02)
+        waited = time.monotonic() - start
+        release_worker.set()
+        await blocker
+        return queued, waited
+
+    try:
+        queued, waited = asyncio.run(saturate())
+    finally:
+        release_worker.set()
+        selector.shutdown()
+    assert waited < 0.5
+    assert len(started) == 1
+    assert queued.outcome == CoinSelection.Outcome.ALGORITHM_FAILURE
+    assert queued.budget_exhausted
+    assert selector.running == 0
@@ -0,0 +1,63 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from bitcoin_coin_selection.selection_algorithms.batch_selection import (
+    SelectionJob, select_coins_batch, select_coins_batch_as_completed
+)
+from bitcoin_coin_selection.selection_algorithms.select_coins import select_coins
+from bitcoin_coin_selection.selection_types.change_constants import CENT
+from bitcoin_coin_selection.selection_types.coin_selection import CoinSelection
+from bitcoin_coin_selection.selection_types.coin_selection_params import CoinSelectionParams
+from bitcoin_coin_selection.selection_types.utxo_pool import UtxoPool
+from bitcoin_coin_selection.tests.fixtures import generate_utxo_pool
+
+
+def test_select_coins_batch(generate_utxo_pool):
+    wallet_a = generate_utxo_pool([1 * CENT, 2 * CENT, 3 * CENT, 4 * CENT, 5 * CENT])
+    wallet_b = UtxoPool.from_output_groups(generate_utxo_pool([6 * CENT, 7 * CENT, 8 * CENT]))
+    jobs = []
+    for target in range(1, 16):
+        jobs.append(SelectionJob(wallet_a, target * CENT, 0, 0, 0, 0, 0))
+        jobs.append((wallet_b, target * CENT + 3000, 10, 10, 0, 0, 100))
+    # Same wallet at another fee rate
+    jobs.append((wallet_a, 10 * CENT + 2000, 10, 10, 0, 0, 100))
+    # More than it holds
+    jobs.append((wallet_a, 16 * CENT, 0, 0, 0, 0, 0))
+
+    selections = select_coins_batch(jobs, chunk_size=4)
+    assert len(selections) == len(jobs)
+    for job, selection in zip(jobs, selections):
+        expected_selection = select_coins(CoinSelectionParams(*job))
+        assert selection.outcome == expected_selection.outcome
+        if selection.outcome == CoinSelection.Outcome.SUCCESS:
+            assert selection.effective_value >= job[1]
+    # Wallet a only has exact matches at no fee
+    for selection in selections[:30:2]:
+        assert selection.outcome == CoinSelection.Outcome.SUCCESS
+        assert selection.change_value == 0
+    assert selections[-2].outcome == CoinSelection.Outcome.SUCCESS
+    assert selections[-1].outcome == CoinSelection.Outcome.INSUFFICIENT_FUNDS
+
+
+def test_select_coins_batch_as_completed(generate_utxo_pool):
+    wallet = generate_utxo_pool([1 * CENT, 2 * CENT, 3 * CENT, 4 * CENT, 5 * CENT])
+    jobs = [(wallet, target * CENT, 0, 0, 0, 0, 0) for target in range(1, 16)]
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(select_coins_batch_as_completed(jobs, executor=executor, chunk_size=2))
+    assert sorted(index for index, _ in results) == list(range(len(jobs)))
+    for index, selection in results:
+        assert selection.outcome == CoinSelection.Outcome.SUCCESS
+        assert selection.effective_value == jobs[index][1]
+
+
+def test_select_coins_batch_fresh_lists(generate_utxo_pool):
+    # Lists made per job and dropped as soon as they are converted: their
+    # ids mustn't be mistaken for an earlier job's pool
+    def jobs():
+        for k in range(1, 9):
+            yield (generate_utxo_pool([k * CENT, k * CENT]), 2 * k * CENT, 0, 0, 0, 0, 0)
+
+    selections = select_coins_batch(jobs(), chunk_size=1)
+    for k, selection in enumerate(selections, 1):
+        assert selection.outcome == CoinSelection.Outcome.SUCCESS
+        assert [output.value for output in selection.outputs] == [k * CENT, k * CENT]
@@ -1,12 +1,15 @@
+import itertools
 from typing import List
 
 import pytest
 
-from bitcoin_coin_selection.selection_algorithms.branch_and_bound import select_coins_branch_and_bound
+from bitcoin_coin_selection.selection_algorithms.branch_and_bound import BranchAndBoundSession, select_coins_branch_and_bound
 from bitcoin_coin_selection.selection_types.change_constants import CENT
 from bitcoin_coin_selection.selection_types.coin_selection import CoinSelection
+from bitcoin_coin_selection.selection_types.coin_selection_params import CoinSelectionParams
 from bitcoin_coin_selection.selection_types.input_coin import InputCoin
 from bitcoin_coin_selection.selection_types.output_group import OutputGroup
+from bitcoin_coin_selection.selection_types.wallet_pool import WalletPool
 from bitcoin_coin_selection.tests.fixtures import generate_utxo_pool, make_hard_case
 from bitcoin_coin_selection.tests.coin_selection_params import TestParams
 
@@ -179,3 +182,100 @@ def test_branch_and_bound_consistently_fails_impossible_case(generate_utxo_pool)
         assert len(selection.outputs) == 0
         assert selection.effective_value == 0
         assert selection.change_value == 0
+
+
+def test_branch_and_bound_total_tries(make_hard_case):
+    target_value, utxo_pool = make_hard_case(14)
+    selection = select_coins_branch_and_bound(
+        TestParams(utxo_pool, target_value), total_tries=1000
+    )
+    assert selection.outcome == CoinSelection.Outcome.ALGORITHM_FAILURE
+
+    target_value, utxo_pool = make_hard_case(17)
+    selection = select_coins_branch_and_bound(
+        TestParams(utxo_pool, target_value), total_tries=1000000
+    )
+    assert selection.outcome == CoinSelection.Outcome.SUCCESS
+    assert selection.effective_value == target_value
+
+
+@pytest.mark.parametrize("short_term_fee_per_byte, long_term_fee_per_byte", [(10, 5), (5, 10)])
+def test_branch_and_bound_least_waste(generate_utxo_pool, short_term_fee_per_byte, long_term_fee_per_byte):
+    amounts = [3 * CENT, 1 * CENT, 2 * CENT, 1 * CENT, 5 * CENT, 4 * CENT, 2 * CENT, 7 * CENT]
+    params = CoinSelectionParams(
+        generate_utxo_pool(amounts),
+        target_value=9 * CENT - 3000,
+        short_term_fee_per_byte=short_term_fee_per_byte,
+        long_term_fee_per_byte=long_term_fee_per_byte,
+        change_output_size_in_bytes=100,
+        change_spend_size_in_bytes=100,
+        not_input_size_in_bytes=100
+    )
+    target_after_fixed_fees = params.target_value + params.fixed_fee
+    # Every input costs 100 bytes, so the waste of a selection only depends on
+    # its size and its effective value
+    input_waste = 100 * (short_term_fee_per_byte - long_term_fee_per_byte)
+    effective_values = [amount - 100 * short_term_fee_per_byte for amount in amounts]
+    least_waste = min(
+        len(combination) * input_waste + sum(combination) - target_after_fixed_fees
+        for size in range(1, len(amounts) + 1)
+        for combination in itertools.combinations(effective_values, size)
+        if target_after_fixed_fees <= sum(combination) <= target_after_fixed_fees + params.cost_of_change
+    )
+
+    selection = select_coins_branch_and_bound(params)
+    assert selection.outcome == CoinSelection.Outcome.SUCCESS
+    waste = len(selection.outputs) * input_waste + selection.effective_value - target_after_fixed_fees
+    assert waste == least_waste
+
+
+def test_branch_and_bound_warm_start(generate_utxo_pool):
+    utxo_pool = generate_utxo_pool([1 * CENT, 2 * CENT, 3 * CENT, 4 * CENT, 5 * CENT])
+    params = TestParams(utxo_pool, 10 * CENT, cost_of_change=0.5 * CENT)
+    # Pool indices of 1, 4 and 5 CENT, a selection with no waste
+    selection = select_coins_branch_and_bound(params, total_tries=1, warm_start=[0, 3, 4])
+    assert selection.outcome == CoinSelection.Outcome.SUCCESS
+    assert sorted(selection.pool_indices) == [0, 3, 4]
+
+    # Out of range warm starts are ignored
+    selection = select_coins_branch_and_bound(params, warm_start=[4])
+    assert selection.outcome == CoinSelection.Outcome.SUCCESS
+    assert selection.effective_value == 10 * CENT
+
+
+def test_branch_and_bound_session(generate_utxo_pool):
+    utxo_pool = generate_utxo_pool([1 * CENT, 2 * CENT, 3 * CENT, 4 * CENT, 5 * CENT, 7 * CENT])
+    session = BranchAndBoundSession()
+
+    # Same waste as a cold search, whatever the session has seen before
+    for target_value in [5 * CENT, 9 * CENT - 100, 9 * CENT, 11 * CENT + 100, 30 * CENT]:
+        params = TestParams(utxo_pool, target_value, cost_of_change=0.5 * CENT)
+        selection = session.select_coins(params)
+        cold_selection = select_coins_branch_and_bound(params)
+        assert selection.outcome == cold_selection.outcome
+        assert selection.waste == cold_selection.waste
+        assert selection.algorithm == "branch_and_bound"
+
+    # A past selection still in range is the starting point, so one try is enough
+    session.select_coins(TestParams(utxo_pool, 8 * CENT, cost_of_change=0.5 * CENT))
+    params = TestParams(utxo_pool, 8 * CENT - 1000, cost_of_change=0.5 * CENT)
+    assert select_coins_branch_and_bound(params, total_tries=1).outcome == CoinSelection.Outcome.ALGORITHM_FAILURE
+    selection = session.select_coins(params, total_tries=1)
+    assert selection.outcome == CoinSelection.Outcome.SUCCESS
+    assert selection.effective_value == 8 * CENT
+
+
+def test_branch_and_bound_session_pool_changes():
+    wallet_pool = WalletPool()
+    for i, amount in enumerate([1 * CENT, 2 * CENT, 3 * CENT]):
+        wallet_pool.add("tx_{}".format(i), 0, amount, 100, "address_{}".format(i))
+    session = BranchAndBoundSession()
+
+    selection = session.select_coins(TestParams(wallet_pool, 3 * CENT, cost_of_change=5000))
+    assert selection.effective_value == 3 * CENT
+    # Slots move as the pool changes, the session doesn't reuse stale indices
+    wallet_pool.remove("tx_0", 0)
+    wallet_pool.add("tx_3", 0, 4 * CENT, 100, "address_3")
+    selection = session.select_coins(TestParams(wallet_pool, 6 * CENT, cost_of_change=5000))
+    assert selection.outcome == CoinSelection.Outcome.SUCCESS
+    assert sorted(output.value for output in selection.outputs) == [2 * CENT, 4 * CENT]
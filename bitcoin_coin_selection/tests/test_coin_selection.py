@@ -1,11 +1,15 @@
 from typing import List, Tuple
+import pickle
+import time
 import pytest
 
 from bitcoin_coin_selection.selection_algorithms.select_coins import select_coins
-from bitcoin_coin_selection.tests.fixtures import generate_utxo_pool
+from bitcoin_coin_selection.tests.fixtures import generate_utxo_pool, make_hard_case
 from bitcoin_coin_selection.selection_types.coin_selection import CoinSelection
 from bitcoin_coin_selection.selection_types.coin_selection_params import CoinSelectionParams
 from bitcoin_coin_selection.selection_types.change_constants import CENT, COIN, MIN_CHANGE
+from bitcoin_coin_selection.selection_types.utxo_pool import UtxoPool
+from bitcoin_coin_selection.selection_types.wallet_pool import WalletPool
 
 
 def test_insufficient_funds_1(generate_utxo_pool):
@@ -155,3 +159,83 @@ def test_makes_slightly_larger_than_dust_change(generate_utxo_pool):
     assert selection.outcome == CoinSelection.Outcome.SUCCESS
     assert selection.change_value == params.cost_of_change + params.fixed_fee + 1
 
+
+
+def test_no_time_budget_is_not_exhausted(generate_utxo_pool):
+    utxo_pool = generate_utxo_pool([1 * CENT, 2 * CENT, 3 * CENT, 4 * CENT])
+    selection = select_coins(CoinSelectionParams(utxo_pool, 5 * CENT, 0, 0, 0, 0, 0), time_budget=10)
+
+    assert selection.outcome == CoinSelection.Outcome.SUCCESS
+    assert not selection.budget_exhausted
+
+
+def test_time_budget_exhausted(make_hard_case):
+    target_value, utxo_pool = make_hard_case(20)
+    params = CoinSelectionParams(utxo_pool, target_value, 0, 0, 0, 0, 0)
+
+    start = time.monotonic()
+    selection = select_coins(params, time_budget=0.01)
+    assert time.monotonic() - start < 1
+    assert selection.budget_exhausted
+    # Whichever step ran out of time, the cascade still returns a valid selection
+    assert selection.outcome == CoinSelection.Outcome.SUCCESS
+    assert selection.effective_value >= target_value
+
+    selection = select_coins(params, deadline=time.monotonic() - 1)
+    assert selection.budget_exhausted
+    assert selection.outcome == CoinSelection.Outcome.SUCCESS
+
+
+def test_from_pool_indices_is_lazy():
+    utxo_pool = UtxoPool()
+    # The dust coin costs more to spend than it is worth and is left out
+    utxo_pool.append("address_0", [("tx_0", 0, 1 * CENT, 100), ("tx_0", 1, 500, 100)])
+    utxo_pool.append("address_1", [("tx_1", 0, 2 * CENT, 100)])
+    utxo_pool.append("address_2", [("tx_2", 0, 3 * CENT, 100)])
+    params = CoinSelectionParams(utxo_pool, 3 * CENT - 2000, 10, 5, 31, 68, 10)
+
+    selection = CoinSelection.from_pool_indices(params, [0, 1])
+    eager_selection = CoinSelection(params, utxo_pool.output_groups([0, 1]))
+    for name in ["value", "effective_value", "fee", "long_term_fee", "change_value", "waste"]:
+        assert getattr(selection, name) == getattr(eager_selection, name)
+    assert selection._outputs is None
+
+    # Repriced for another selection before the outputs are read
+    CoinSelectionParams(utxo_pool, 1 * CENT, 50, 5, 31, 68, 10)
+    assert [(output.tx_hash, output.vout, output.fee) for output in selection.outputs] == [
+        ("tx_0", 0, 1000), ("tx_1", 0, 1000)
+    ]
+
+    unpickled_selection = pickle.loads(pickle.dumps(CoinSelection.from_pool_indices(params, [2])))
+    assert [output.value for output in unpickled_selection.outputs] == [3 * CENT]
+    assert unpickled_selection._pool is None
+
+
+@pytest.mark.parametrize("pool_class", [UtxoPool, WalletPool])
+def test_from_pool_indices_coin_uneconomic_after_selection(pool_class):
+    # A coin worth spending at the selection's fee rate is still part of its
+    # outputs after the pool is repriced to a rate where it is dust
+    if pool_class is UtxoPool:
+        utxo_pool = UtxoPool()
+        utxo_pool.append("address_0", [("tx_0", 0, 1000000, 68), ("tx_0", 1, 8000, 68)])
+    else:
+        utxo_pool = WalletPool()
+        utxo_pool.add("tx_0", 0, 1000000, 68, "address_0")
+        utxo_pool.add("tx_0", 1, 8000, 68, "address_0")
+    selection = CoinSelection.from_pool_indices(CoinSelectionParams(utxo_pool, 900000, 1, 1, 31, 68, 10), [0])
+
+    CoinSelectionParams(utxo_pool, 900000, 200, 1, 31, 68, 10)
+    assert selection.value == 1008000
+    assert sum(output.value for output in selection.outputs) == selection.value
+    assert sum(output.fee for output in selection.outputs) == 136
+
+
+def test_from_pool_indices_wallet_pool_changed():
+    wallet_pool = WalletPool()
+    wallet_pool.add("tx_0", 0, 1 * CENT, 100, "address_0")
+    wallet_pool.add("tx_1", 0, 2 * CENT, 100, "address_1")
+    selection = CoinSelection.from_pool_indices(CoinSelectionParams(wallet_pool, 1 * CENT, 0, 0, 0, 0, 0), [1])
+
+    wallet_pool.remove("tx_0", 0)
+    with pytest.raises(ValueError):
+        selection.outputs
@@ -0,0 +1,42 @@
+from bitcoin_coin_selection.selection_algorithms.branch_and_bound import select_coins_branch_and_bound
+from bitcoin_coin_selection.selection_algorithms.fee_sweep import select_coins_fee_sweep
+from bitcoin_coin_selection.selection_types.change_constants import CENT
+from bitcoin_coin_selection.selection_types.coin_selection import CoinSelection
+from bitcoin_coin_selection.selection_types.coin_selection_params import CoinSelectionParams
+from bitcoin_coin_selection.selection_types.input_coin import InputCoin
+from bitcoin_coin_selection.selection_types.output_group import OutputGroup
+from bitcoin_coin_selection.tests.fixtures import generate_utxo_pool
+
+
+def test_select_coins_fee_sweep(generate_utxo_pool):
+    utxo_pool = generate_utxo_pool([1 * CENT, 2 * CENT, 3 * CENT, 5 * CENT, 8 * CENT, 13 * CENT, 21 * CENT])
+    fee_rates = [50, 1, 10, 5, 20, 10]
+    selections = select_coins_fee_sweep(utxo_pool, 16 * CENT, fee_rates, 5, 31, 68, 41)
+
+    assert sorted(selections) == [1, 5, 10, 20, 50]
+    for fee_rate, selection in selections.items():
+        params = CoinSelectionParams(utxo_pool, 16 * CENT, fee_rate, 5, 31, 68, 41)
+        assert selection.outcome == CoinSelection.Outcome.SUCCESS
+        assert selection.effective_value >= params.target_value + params.fixed_fee
+        bnb_selection = select_coins_branch_and_bound(params)
+        if bnb_selection.outcome == CoinSelection.Outcome.SUCCESS:
+            assert selection.waste <= bnb_selection.waste
+
+
+def test_select_coins_fee_sweep_insufficient_funds(generate_utxo_pool):
+    utxo_pool = generate_utxo_pool([1 * CENT, 2 * CENT])
+    selections = select_coins_fee_sweep(utxo_pool, 3 * CENT - 10000, [1, 100], 1, 31, 68, 41)
+
+    assert selections[1].outcome == CoinSelection.Outcome.SUCCESS
+    assert selections[100].outcome == CoinSelection.Outcome.INSUFFICIENT_FUNDS_AFTER_FEES
+
+
+def test_select_coins_fee_sweep_coin_uneconomic_at_higher_rate():
+    # The 8000 coin is worth spending at rate 1 but not at rate 200
+    utxo_pool = [OutputGroup("address_0", [InputCoin("tx_0", 0, 1000000, 68), InputCoin("tx_0", 1, 8000, 68)])]
+    selections = select_coins_fee_sweep(utxo_pool, 900000, [1, 200], 1, 31, 68, 10)
+
+    assert selections[1].value == 1008000
+    assert selections[200].value == 1000000
+    for selection in selections.values():
+        assert sum(output.value for output in selection.outputs) == selection.value
@@ -0,0 +1,71 @@
+import pytest
+
+from bitcoin_coin_selection.selection_algorithms import instrumentation
+from bitcoin_coin_selection.selection_algorithms.branch_and_bound import select_coins_branch_and_bound
+from bitcoin_coin_selection.selection_algorithms.knapsack_solver import select_coins_knapsack_solver
+from bitcoin_coin_selection.selection_algorithms.select_coins import select_coins
+from bitcoin_coin_selection.selection_types.change_constants import CENT
+from bitcoin_coin_selection.selection_types.coin_selection import CoinSelection
+from bitcoin_coin_selection.tests.fixtures import generate_utxo_pool, make_hard_case
+from bitcoin_coin_selection.tests.coin_selection_params import TestParams
+
+
+@pytest.fixture
+def collecting_stats():
+    instrumentation.collect_stats(True)
+    yield
+    instrumentation.collect_stats(False)
+
+
+def test_no_stats_by_default(generate_utxo_pool):
+    utxo_pool = generate_utxo_pool([1 * CENT, 2 * CENT, 3 * CENT])
+    selection = select_coins(TestParams(utxo_pool, 3 * CENT))
+
+    assert selection.outcome == CoinSelection.Outcome.SUCCESS
+    assert selection.stats is None
+
+
+def test_branch_and_bound_stats(make_hard_case, generate_utxo_pool, collecting_stats):
+    target_value, utxo_pool = make_hard_case(17)
+    selection = select_coins_branch_and_bound(TestParams(utxo_pool, target_value), total_tries=1000)
+    assert selection.stats.algorithm == "branch_and_bound"
+    assert selection.stats.iterations == 1000
+    assert selection.stats.tries_exhausted
+    assert selection.stats.backtracks > 0
+    assert selection.stats.wall_time > 0
+
+    # Unreachable within the tries, but every run of equal utxos is skipped
+    utxo_pool = generate_utxo_pool([5 * CENT] * 10 + [2 * CENT] * 10)
+    selection = select_coins_branch_and_bound(TestParams(utxo_pool, 1 * CENT + 1, cost_of_change=0.5 * CENT))
+    assert selection.outcome == CoinSelection.Outcome.ALGORITHM_FAILURE
+    assert not selection.stats.tries_exhausted
+    assert selection.stats.equal_value_skips > 0
+
+
+def test_select_coins_cascade_stats(generate_utxo_pool, collecting_stats):
+    utxo_pool = generate_utxo_pool([1 * CENT, 2 * CENT, 3 * CENT, 4 * CENT])
+    # Nothing matches exactly, so branch and bound fails and knapsack picks
+    selection = select_coins(TestParams(utxo_pool, 3 * CENT + 1))
+
+    assert selection.outcome == CoinSelection.Outcome.SUCCESS
+    assert selection.stats.algorithm == "select_coins"
+    assert selection.stats.selected_by == "knapsack_solver"
+    assert [stats.algorithm for stats in selection.stats.cascade] == ["branch_and_bound", "knapsack_solver"]
+    assert selection.stats.wall_time >= sum(stats.wall_time for stats in selection.stats.cascade)
+
+    knapsack_selection = select_coins_knapsack_solver(TestParams(utxo_pool, 6 * CENT + 1))
+    assert knapsack_selection.stats.iterations > 0
+
+
+def test_stats_hooks(generate_utxo_pool):
+    utxo_pool = generate_utxo_pool([1 * CENT, 2 * CENT, 3 * CENT])
+    reported = []
+    hook = instrumentation.register_hook(lambda stats, selection: reported.append((stats.algorithm, selection)))
+    try:
+        selection = select_coins(TestParams(utxo_pool, 3 * CENT))
+    finally:
+        instrumentation.unregister_hook(hook)
+
+    assert [algorithm for algorithm, _ in reported] == ["branch_and_bound", "select_coins"]
+    assert reported[-1][1] is selection
+    assert select_coins(TestParams(utxo_pool, 3 * CENT)).stats is None
@@ -1,8 +1,12 @@
 from typing import List, Tuple
 import math
+import random
 import pytest
 
-from bitcoin_coin_selection.selection_algorithms.knapsack_solver import select_coins_knapsack_solver
+from itertools import compress
+
+from bitcoin_coin_selection.selection_algorithms import knapsack_solver
+from bitcoin_coin_selection.selection_algorithms.knapsack_solver import approximate_best_subset, select_coins_knapsack_solver
 from bitcoin_coin_selection.tests.fixtures import generate_utxo_pool
 from bitcoin_coin_selection.tests.coin_selection_params import TestParams
 from bitcoin_coin_selection.selection_types.change_constants import CENT, COIN, MIN_CHANGE
@@ -333,3 +337,118 @@ def test_knapsack_solver_randomness_2(generate_utxo_pool):
         assert selection_1.outcome == selection_2.outcome == CoinSelection.Outcome.SUCCESS
         assert selection_1.effective_value == selection_1.effective_value == COIN
         assert set(selection_1.outputs) != set(selection_2.outputs)
+
+
+def test_knapsack_solver_approximate_best_subset_bounds(generate_utxo_pool):
+    random.seed(0)
+    for i in range(RUN_TESTS):
+        amounts = [random.randint(1, 50) * int(CENT) for i in range(random.randint(2, 40))]
+        target_value = random.randint(1, sum(amounts) // int(CENT) - 1) * int(CENT)
+        params = TestParams(generate_utxo_pool(amounts), target_value)
+
+        selection = approximate_best_subset(params, list(range(len(amounts))), sum(amounts), 100)
+        assert selection.outcome == CoinSelection.Outcome.SUCCESS
+        assert target_value <= selection.effective_value <= sum(amounts)
+        assert selection.effective_value == sum(output.effective_value for output in selection.outputs)
+
+
+def reference_approximate_best_subset(effective_values: List[int],
+                                      target_value: int,
+                                      iterations: int,
+                                      passes_reached: List[int]) -> Tuple[List[bool], int]:
+    # The classic loop, one coin at a time, fed the same coin flips as the solver
+    inclusion_masks = knapsack_solver._random_inclusion_masks(len(effective_values), iterations)
+    best_selection = [True] * len(effective_values)
+    best_value = sum(effective_values)
+    for _ in range(iterations):
+        if best_value == target_value:
+            break
+        flips = next(inclusion_masks)
+        included = [False] * len(effective_values)
+        total_value = 0
+        reached_target = False
+        for pass_number in range(2):
+            if reached_target:
+                break
+            for i, effective_value in enumerate(effective_values):
+                if flips[i] if pass_number == 0 else not included[i]:
+                    total_value += effective_value
+                    included[i] = True
+                    if total_value >= target_value:
+                        reached_target = True
+                        passes_reached[pass_number] += 1
+                        if total_value < best_value:
+                            best_value = total_value
+                            best_selection = list(included)
+                        total_value -= effective_value
+                        included[i] = False
+    return best_selection, best_value
+
+
+def reference_knapsack_solver(params: TestParams,
+                              iterations: int,
+                              passes_reached: List[int],
+                              branches: List[int]) -> List[int]:
+    effective_values = params.pool.group_effective_values
+    target_value = params.target_value + params.fixed_fee
+    utxo_pool = list(range(len(params.pool)))
+    random.shuffle(utxo_pool)
+    lowest_larger = None
+    applicable_groups = []
+    for i in utxo_pool:
+        if effective_values[i] == target_value:
+            return [i]
+        elif effective_values[i] < target_value + MIN_CHANGE:
+            applicable_groups.append(i)
+        elif lowest_larger is None or effective_values[i] < effective_values[lowest_larger]:
+            lowest_larger = i
+    applicable_values = [effective_values[i] for i in applicable_groups]
+    total_lower = sum(applicable_values)
+    if total_lower == target_value:
+        return sorted(applicable_groups)
+    if total_lower < target_value:
+        return [] if lowest_larger is None else [lowest_larger]
+
+    best_selection, best_value = reference_approximate_best_subset(
+        applicable_values, target_value, iterations, passes_reached
+    )
+    if best_value != target_value and total_lower >= target_value + MIN_CHANGE:
+        branches[0] += 1
+        best_selection, best_value = reference_approximate_best_subset(
+            applicable_values, target_value + MIN_CHANGE, iterations, passes_reached
+        )
+    if lowest_larger is not None and (
+        (best_value != target_value and best_value < target_value + MIN_CHANGE)
+        or effective_values[lowest_larger] <= best_value
+    ):
+        return [lowest_larger]
+    return sorted(compress(applicable_groups, best_selection))
+
+
+def test_knapsack_solver_matches_reference_per_coin_loop(generate_utxo_pool):
+    rng = random.Random(0)
+    passes_reached = [0, 0]
+    branches = [0]
+    for i in range(RUN_TESTS):
+        # Whole cents make for ties between candidates, arbitrary amounts for misses
+        unit = int(CENT) if i % 2 else 1
+        amounts = [rng.randint(1, 30 * int(CENT) // unit) * unit for _ in range(rng.randint(1, 30))]
+        target_value = rng.randint(1, sum(amounts) + 2 * int(CENT))
+        params = TestParams(generate_utxo_pool(amounts), target_value)
+        iterations = rng.randint(1, 100)
+
+        random.seed(i)
+        selection = select_coins_knapsack_solver(params, iterations)
+        random.seed(i)
+        expected = reference_knapsack_solver(params, iterations, passes_reached, branches)
+
+        if expected:
+            assert selection.outcome == CoinSelection.Outcome.SUCCESS
+            assert sorted(selection.pool_indices) == expected
+            assert selection.effective_value == sum(params.pool.group_effective_values[i] for i in expected)
+        else:
+            assert selection.outcome != CoinSelection.Outcome.SUCCESS
+
+    # Both passes found candidates, and the retry at target + MIN_CHANGE ran
+    assert passes_reached[0] > 0 and passes_reached[1] > 0
+    assert branches[0] > 0
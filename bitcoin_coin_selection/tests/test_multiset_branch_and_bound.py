@@ -0,0 +1,80 @@
+import random
+
+from bitcoin_coin_selection.selection_algorithms.branch_and_bound import select_coins_branch_and_bound
+from bitcoin_coin_selection.selection_algorithms.instrumentation import collect_stats
+from bitcoin_coin_selection.selection_algorithms.multiset_branch_and_bound import select_coins_multiset_branch_and_bound
+from bitcoin_coin_selection.selection_types.change_constants import CENT
+from bitcoin_coin_selection.selection_types.coin_selection import CoinSelection
+from bitcoin_coin_selection.selection_types.coin_selection_params import CoinSelectionParams
+from bitcoin_coin_selection.selection_types.utxo_pool import UtxoPool
+from bitcoin_coin_selection.tests.fixtures import generate_utxo_pool
+from bitcoin_coin_selection.tests.coin_selection_params import TestParams
+
+
+RUN_TESTS = 100
+
+
+def test_multiset_branch_and_bound_exact_match(generate_utxo_pool):
+    utxo_pool = generate_utxo_pool([1 * CENT] * 5 + [2 * CENT] * 5 + [5 * CENT] * 5)
+
+    selection = select_coins_multiset_branch_and_bound(
+        TestParams(utxo_pool, 14 * CENT, cost_of_change=0.5 * CENT)
+    )
+
+    assert selection.outcome == CoinSelection.Outcome.SUCCESS
+    assert selection.algorithm == "multiset_branch_and_bound"
+    assert selection.effective_value == 14 * CENT
+    assert sorted(output_group.effective_value for output_group in selection.outputs) == [
+        2 * CENT, 2 * CENT, 5 * CENT, 5 * CENT
+    ]
+
+
+def test_multiset_branch_and_bound_no_match(generate_utxo_pool):
+    utxo_pool = generate_utxo_pool([2 * CENT] * 10)
+
+    selection = select_coins_multiset_branch_and_bound(
+        TestParams(utxo_pool, 3 * CENT, cost_of_change=0.5 * CENT)
+    )
+
+    assert selection.outcome == CoinSelection.Outcome.ALGORITHM_FAILURE
+
+
+def test_multiset_branch_and_bound_waste_against_branch_and_bound(generate_utxo_pool):
+    rng = random.Random(1)
+    for _ in range(RUN_TESTS):
+        amounts = [rng.choice([1 * CENT, 2 * CENT, 5 * CENT, 12345678]) for _ in range(rng.randint(1, 12))]
+        utxo_pool = generate_utxo_pool(amounts)
+        short_term_fee_per_byte = rng.choice([1, 5, 20])
+        params = CoinSelectionParams(utxo_pool, rng.randint(1, int(sum(amounts))), short_term_fee_per_byte, 10, 31, 68, 41)
+
+        selection = select_coins_branch_and_bound(params)
+        multiset_selection = select_coins_multiset_branch_and_bound(params)
+
+        assert multiset_selection.outcome == selection.outcome
+        if selection.outcome == CoinSelection.Outcome.SUCCESS:
+            if short_term_fee_per_byte >= 10:
+                assert multiset_selection.waste == selection.waste
+            else:
+                # Waste can go below zero, where branch and bound stops at
+                # the first selection with no waste
+                assert multiset_selection.waste <= selection.waste
+
+
+def test_multiset_branch_and_bound_duplicate_heavy_pool(generate_utxo_pool):
+    utxo_pool = UtxoPool.from_output_groups(
+        generate_utxo_pool([100000] * 3000 + [50000] * 2000 + [20000] * 1000 + [7777] * 50)
+    )
+    params = CoinSelectionParams(utxo_pool, 1234567, 5, 10, 31, 68, 41)
+
+    collect_stats(True)
+    try:
+        selection = select_coins_branch_and_bound(params)
+        multiset_selection = select_coins_multiset_branch_and_bound(params)
+    finally:
+        collect_stats(False)
+
+    # Branch and bound runs out of tries, the multiset search finishes
+    assert selection.stats.tries_exhausted
+    assert multiset_selection.outcome == CoinSelection.Outcome.SUCCESS
+    assert not multiset_selection.stats.tries_exhausted
+    assert multiset_selection.waste <= selection.waste
@@ -0,0 +1,33 @@
+import pickle
+
+from bitcoin_coin_selection.selection_types.input_coin import InputCoin
+from bitcoin_coin_selection.selection_types.output_group import OutputGroup
+
+
+TX_HASH = "340ad7bcf7dfc408fda32e2251fcb7fcbcf022b24daa6cbf11f202170f7748c2"
+
+
+def test_input_coin_tx_hash():
+    input_coin = InputCoin(TX_HASH, 0, 100000, 100)
+    assert input_coin.tx_hash == TX_HASH
+    assert input_coin._tx_hash == bytes.fromhex(TX_HASH)
+
+    # Anything that wouldn't read back the same stays a string
+    for tx_hash in ["", "tx_0", TX_HASH.upper()]:
+        assert InputCoin(tx_hash, 0, 100000, 100).tx_hash == tx_hash
+
+
+def test_output_group_is_compact():
+    address = "".join(["n4VQ5YdHf7hLQ2gWQYYrcxoE5B7nWuDFNF"])
+    output_group = OutputGroup(address, [InputCoin(TX_HASH, 0, 100000, 100), InputCoin(TX_HASH, 1, 200000, 100)])
+    other_output_group = OutputGroup("".join(["n4VQ5YdHf7hLQ2gWQYYrcxoE5B7nWuDFNF"]), [])
+    output_group.set_fee(10, 5)
+
+    assert not hasattr(output_group, "__dict__")
+    assert not hasattr(output_group.outputs[0], "__dict__")
+    assert output_group.outputs[0].address is output_group.address is other_output_group.address
+    assert output_group.effective_value == 298000
+
+    copied_output_group = pickle.loads(pickle.dumps(output_group))
+    assert copied_output_group.effective_value == 298000
+    assert [output.tx_hash for output in copied_output_group.outputs] == [TX_HASH, TX_HASH]
@@ -0,0 +1,112 @@
+import random
+
+import pytest
+
+from bitcoin_coin_selection.selection_algorithms.branch_and_bound import _SortedPool, select_coins_branch_and_bound
+from bitcoin_coin_selection.selection_algorithms.parallel_branch_and_bound import (
+    BranchAndBoundExecutor,
+    _subtrees,
+    select_coins_parallel_branch_and_bound,
+)
+from bitcoin_coin_selection.selection_types.change_constants import CENT
+from bitcoin_coin_selection.selection_types.coin_selection import CoinSelection
+from bitcoin_coin_selection.selection_types.coin_selection_params import CoinSelectionParams
+from bitcoin_coin_selection.selection_types.utxo_pool import UtxoPool
+from bitcoin_coin_selection.tests.fixtures import generate_utxo_pool
+from bitcoin_coin_selection.tests.coin_selection_params import TestParams
+
+
+@pytest.fixture(scope="module")
+def executor():
+    executor = BranchAndBoundExecutor(max_workers=2)
+    yield executor
+    executor.shutdown()
+
+
+def random_pool(rng: random.Random, size: int) -> UtxoPool:
+    # Repeated values make the equal value skips matter
+    return UtxoPool.from_records([
+        ("{:064x}".format(i), 0, rng.choice([rng.randint(1000, 100000), 20000, 50000]), rng.choice([68, 100]), str(i))
+        for i in range(size)
+    ])
+
+
+def test_parallel_branch_and_bound_exact_match(generate_utxo_pool, executor):
+    utxo_pool = generate_utxo_pool([1 * CENT, 2 * CENT, 3 * CENT, 4 * CENT, 5 * CENT])
+    selection = select_coins_parallel_branch_and_bound(TestParams(utxo_pool, 10 * CENT, cost_of_change=0.5 * CENT), executor)
+
+    assert selection.outcome == CoinSelection.Outcome.SUCCESS
+    assert selection.algorithm == "parallel_branch_and_bound"
+    assert selection.effective_value == 10 * CENT
+    assert selection.waste == 0
+    assert not selection.search_incomplete
+
+
+@pytest.mark.parametrize("split_depth", [None, 0, 1, 4, 64])
+def test_parallel_branch_and_bound_matches_serial_search(executor, split_depth):
+    rng = random.Random(split_depth)
+    for _ in range(20):
+        utxo_pool = random_pool(rng, rng.randint(1, 18))
+        target_value = rng.randint(1000, int(utxo_pool.total_value))
+        short_term_fee_per_byte, long_term_fee_per_byte = rng.choice([(1, 1), (2, 1), (0, 0)])
+        params = CoinSelectionParams(utxo_pool, target_value, short_term_fee_per_byte, long_term_fee_per_byte, 31, 68, 10)
+
+        serial_selection = select_coins_branch_and_bound(params, total_tries=10 ** 9)
+        selection = select_coins_parallel_branch_and_bound(params, executor, split_depth, total_tries=10 ** 9)
+
+        assert selection.outcome == serial_selection.outcome
+        assert selection.pool_indices == serial_selection.pool_indices
+        assert selection.waste == serial_selection.waste
+        assert not selection.search_incomplete
+
+
+def test_parallel_branch_and_bound_subtrees_grow_one_level_at_a_time():
+    # Splitting one level further from the previous split finds the same
+    # subtrees as splitting from the root
+    rng = random.Random(7)
+    for _ in range(20):
+        utxo_pool = random_pool(rng, rng.randint(1, 18))
+        utxo_pool.set_fee(1, 1)
+        sorted_pool = _SortedPool(utxo_pool)
+        target_value = rng.randint(1000, int(utxo_pool.total_value))
+        subtrees = _subtrees(sorted_pool, target_value, target_value + 100, 0)
+        for split_depth in range(1, len(utxo_pool) + 1):
+            subtrees = _subtrees(sorted_pool, target_value, target_value + 100, split_depth, subtrees)
+            assert subtrees == _subtrees(sorted_pool, target_value, target_value + 100, split_depth)
+
+
+def test_parallel_branch_and_bound_negative_waste(executor):
+    # With the long term fee rate the higher one, the search goes past
+    # selections with no waste and is never worse than the serial search
+    rng = random.Random(3)
+    for _ in range(20):
+        utxo_pool = random_pool(rng, rng.randint(1, 18))
+        params = CoinSelectionParams(utxo_pool, rng.randint(1000, int(utxo_pool.total_value)), 1, 3, 31, 68, 10)
+
+        serial_selection = select_coins_branch_and_bound(params, total_tries=10 ** 9)
+        selection = select_coins_parallel_branch_and_bound(params, executor, total_tries=10 ** 9)
+
+        assert selection.outcome == serial_selection.outcome
+        if selection.outcome == CoinSelection.Outcome.SUCCESS:
+            assert selection.waste <= serial_selection.waste
+
+
+def test_parallel_branch_and_bound_out_of_tries(executor):
+    rng = random.Random(1)
+    utxo_pool = UtxoPool.from_records([
+        ("{:064x}".format(i), 0, rng.randint(10000, 10 ** 7), 68, str(i)) for i in range(500)
+    ])
+    params = CoinSelectionParams(utxo_pool, 12345678, 10, 5, 31, 68, 50)
+
+    selection = select_coins_parallel_branch_and_bound(params, executor, total_tries=1000)
+
+    assert selection.search_incomplete
+    assert not selection.budget_exhausted
+
+
+def test_parallel_branch_and_bound_no_solution(generate_utxo_pool, executor):
+    utxo_pool = generate_utxo_pool([1 * CENT, 2 * CENT, 3 * CENT])
+    selection = select_coins_parallel_branch_and_bound(TestParams(utxo_pool, 5 * CENT + 1), executor)
+
+    assert selection.outcome == CoinSelection.Outcome.ALGORITHM_FAILURE
+    assert not selection.search_incomplete
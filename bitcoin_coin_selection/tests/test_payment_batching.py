@@ -0,0 +1,122 @@
+from bitcoin_coin_selection.selection_algorithms.payment_batching import Payout, select_coins_for_payouts
+from bitcoin_coin_selection.selection_algorithms.select_coins import select_coins
+from bitcoin_coin_selection.selection_types.change_constants import CENT
+from bitcoin_coin_selection.selection_types.coin_selection import CoinSelection
+from bitcoin_coin_selection.selection_types.coin_selection_params import CoinSelectionParams
+from bitcoin_coin_selection.selection_types.pool_snapshot import open_pool_snapshot, write_pool_snapshot
+from bitcoin_coin_selection.selection_types.utxo_pool import UtxoPool
+from bitcoin_coin_selection.selection_types.wallet_pool import WalletPool
+from bitcoin_coin_selection.tests.fixtures import generate_utxo_pool
+
+
+def test_select_coins_for_payouts(generate_utxo_pool):
+    utxo_pool = generate_utxo_pool([i * CENT for i in range(1, 30)])
+    payouts = [Payout("withdrawal_{}".format(k), (k % 7 + 1) * CENT) for k in range(25)]
+
+    payout_batches = select_coins_for_payouts(utxo_pool, payouts, 10, 5, 31, 68, 11, max_payouts_per_batch=10)
+
+    assert [payout for payout_batch in payout_batches for payout in payout_batch.payouts] == payouts
+    assert [len(payout_batch.payouts) for payout_batch in payout_batches] == [10, 10, 5]
+    spent = []
+    for payout_batch in payout_batches:
+        selection = payout_batch.selection
+        assert selection.outcome == CoinSelection.Outcome.SUCCESS
+        assert selection.target_value == sum(payout.value for payout in payout_batch.payouts)
+        # The payouts' outputs are paid for with the transaction
+        assert selection.fee >= 10 * (11 + 31 * len(payout_batch.payouts))
+        spent.extend(output.value for output in selection.outputs)
+        # pool_indices are into the caller's pool, not the groups left over
+        assert sorted(output.value for i in selection.pool_indices for output in utxo_pool[i].outputs) == sorted(
+            output.value for output in selection.outputs
+        )
+    # No coin is spent by two batches
+    assert len(spent) == len(set(spent))
+
+    # One transaction per payout pays the overhead and a change output every time
+    unbatched_fees = 0
+    for payout in payouts:
+        selection = select_coins(CoinSelectionParams(
+            generate_utxo_pool([i * CENT for i in range(1, 30)]), payout.value, 10, 5, 31, 68, 11 + 31
+        ))
+        unbatched_fees += selection.fee + (10 * 31 if selection.change_value else 0)
+    batched_fees = sum(
+        payout_batch.selection.fee + (10 * 31 if payout_batch.selection.change_value else 0)
+        for payout_batch in payout_batches
+    )
+    assert batched_fees < unbatched_fees
+
+
+def test_select_coins_for_payouts_output_bytes_and_funds():
+    wallet_pool = WalletPool()
+    for i, amount in enumerate([1 * CENT, 2 * CENT, 3 * CENT]):
+        wallet_pool.add("{:064x}".format(i), 0, amount, 100, "address_{}".format(i))
+    fingerprint = wallet_pool.fingerprint
+    payouts = [Payout(1, 2 * CENT, 43), Payout(2, 1 * CENT, 43), Payout(3, 10 * CENT, 31), Payout(4, 1 * CENT)]
+
+    payout_batches = select_coins_for_payouts(wallet_pool, payouts, 1, 1, 31, 68, 11, max_output_bytes=86)
+
+    assert [[payout.payout_id for payout in payout_batch.payouts] for payout_batch in payout_batches] == [[1, 2], [3, 4]]
+    assert payout_batches[0].selection.outcome == CoinSelection.Outcome.SUCCESS
+    # More than the wallet holds, the first batch is still paid
+    assert payout_batches[1].selection.outcome == CoinSelection.Outcome.INSUFFICIENT_FUNDS
+    assert wallet_pool.fingerprint == fingerprint
+
+
+def test_select_coins_for_payouts_max_input_bytes():
+    wallet_pool = WalletPool()
+    for i in range(20):
+        wallet_pool.add("{:064x}".format(i), 0, 1 * CENT, 100, "address_{}".format(i))
+    # The second payout needs at least seven inputs
+    payouts = [Payout(1, 2 * CENT), Payout(2, 6 * CENT), Payout(3, 1 * CENT)]
+
+    payout_batches = select_coins_for_payouts(
+        wallet_pool, payouts, 1, 1, 31, 68, 11, max_payouts_per_batch=1, max_input_bytes=400
+    )
+
+    selections = [payout_batch.selection for payout_batch in payout_batches]
+    assert [selection.outcome for selection in selections] == [
+        CoinSelection.Outcome.SUCCESS, CoinSelection.Outcome.ALGORITHM_FAILURE, CoinSelection.Outcome.SUCCESS
+    ]
+    for selection in [selections[0], selections[2]]:
+        assert sum(output.input_bytes for output in selection.outputs) <= 400
+        assert {wallet_pool.addresses[i] for i in selection.pool_indices} == {
+            output.address for output in selection.outputs
+        }
+    assert set(selections[0].pool_indices).isdisjoint(selections[2].pool_indices)
+
+
+def test_select_coins_for_payouts_leaves_utxo_pool_as_it_was(generate_utxo_pool):
+    output_groups = generate_utxo_pool([i * CENT for i in range(1, 30)], 1, 1)
+    utxo_pool = UtxoPool.from_output_groups(output_groups)
+    utxo_pool.set_fee(1, 1)
+    group_effective_values = list(utxo_pool.group_effective_values)
+    payouts = [Payout(k, (k % 7 + 1) * CENT) for k in range(25)]
+
+    payout_batches = select_coins_for_payouts(utxo_pool, payouts, 10, 5, 31, 68, 11, max_payouts_per_batch=10)
+
+    assert all(payout_batch.selection.outcome == CoinSelection.Outcome.SUCCESS for payout_batch in payout_batches)
+    assert (utxo_pool.short_term_fee_per_byte, utxo_pool.long_term_fee_per_byte) == (1, 1)
+    assert list(utxo_pool.group_effective_values) == group_effective_values
+    # Nor were the caller's objects repriced
+    assert all(output_group.effective_value == output_group.value - 100 for output_group in output_groups)
+
+
+def test_select_coins_for_payouts_pool_snapshot(tmp_path):
+    path = str(tmp_path / "pool.snapshot")
+    records = [("{:064x}".format(i), 0, (i % 10 + 1) * CENT, 68, "address_{}".format(i % 12)) for i in range(40)]
+    write_pool_snapshot(UtxoPool.from_records(records), path)
+    snapshot_pool = open_pool_snapshot(path)
+    payouts = [Payout(k, (k % 5 + 1) * CENT) for k in range(12)]
+
+    payout_batches = select_coins_for_payouts(snapshot_pool, payouts, 10, 5, 31, 68, 11, max_payouts_per_batch=4)
+
+    assert len(payout_batches) == 3
+    spent = []
+    for payout_batch in payout_batches:
+        selection = payout_batch.selection
+        assert selection.outcome == CoinSelection.Outcome.SUCCESS
+        assert {output.address for output in selection.outputs} == {
+            snapshot_pool.addresses[i] for i in selection.pool_indices
+        }
+        spent.extend((output.tx_hash, output.vout) for output in selection.outputs)
+    assert len(spent) == len(set(spent))
@@ -0,0 +1,123 @@
+import pickle
+
+import pytest
+
+from bitcoin_coin_selection.selection_algorithms.branch_and_bound import select_coins_branch_and_bound
+from bitcoin_coin_selection.selection_algorithms.select_coins import select_coins
+from bitcoin_coin_selection.selection_types.change_constants import CENT
+from bitcoin_coin_selection.selection_types.coin_selection import CoinSelection
+from bitcoin_coin_selection.selection_types.coin_selection_params import CoinSelectionParams
+from bitcoin_coin_selection.selection_types import pool_snapshot
+from bitcoin_coin_selection.selection_types.pool_snapshot import open_pool_snapshot, write_pool_snapshot
+from bitcoin_coin_selection.selection_types.utxo_pool import UtxoPool
+from bitcoin_coin_selection.selection_types.wallet_pool import WalletPool
+from bitcoin_coin_selection.tests.coin_selection_params import TestParams
+
+
+def make_records(count):
+    return [
+        ("{:064x}".format(i), i % 3, int((i + 1) * CENT), 68 + i % 2, "address_{}".format(i % 4))
+        for i in range(count)
+    ]
+
+
+def test_pool_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / "pool.snapshot")
+    utxo_pool = UtxoPool.from_records(make_records(10))
+    write_pool_snapshot(utxo_pool, path)
+    snapshot_pool = open_pool_snapshot(path)
+
+    assert len(snapshot_pool) == len(utxo_pool) == 4
+    assert list(snapshot_pool.tx_hashes) == utxo_pool.tx_hashes
+    assert list(snapshot_pool.addresses) == utxo_pool.addresses
+    for column in ["values", "vouts", "input_bytes", "group_offsets", "group_values"]:
+        assert list(getattr(snapshot_pool, column)) == list(getattr(utxo_pool, column))
+
+    snapshot_pool.set_fee(10, 5)
+    utxo_pool.set_fee(10, 5)
+    assert list(snapshot_pool.group_effective_values) == list(utxo_pool.group_effective_values)
+
+    # address_1 holds the 2nd, 6th and 10th coins
+    selection = select_coins_branch_and_bound(TestParams(snapshot_pool, 18 * CENT))
+    assert selection.outcome == CoinSelection.Outcome.SUCCESS
+    assert [output.tx_hash for output in selection.outputs] == ["{:064x}".format(i) for i in [1, 5, 9]]
+    assert {output.address for output in selection.outputs} == {"address_1"}
+
+
+def test_wallet_pool_snapshot(tmp_path):
+    path = str(tmp_path / "wallet.snapshot")
+    wallet_pool = WalletPool(10, 5)
+    wallet_pool.apply_block_delta(created=make_records(20))
+    write_pool_snapshot(wallet_pool, path)
+    snapshot_pool = open_pool_snapshot(path)
+
+    assert snapshot_pool.total_value == wallet_pool.total_value
+    selection = select_coins(CoinSelectionParams(snapshot_pool, 30 * CENT, 10, 5, 31, 68, 41))
+    assert selection.outcome == CoinSelection.Outcome.SUCCESS
+    for output in selection.outputs:
+        assert (output.tx_hash, output.vout) in wallet_pool
+
+
+def test_pool_snapshot_errors(tmp_path):
+    path = str(tmp_path / "pool.snapshot")
+    with pytest.raises(ValueError):
+        write_pool_snapshot(UtxoPool.from_records([("tx_0", 0, 1000, 68, "address")]), path)
+
+    write_pool_snapshot(UtxoPool.from_records(make_records(3)), path)
+    with open(path, "rb") as file:
+        data = file.read()
+    with open(path, "wb") as file:
+        file.write(data[:-1])
+    with pytest.raises(ValueError):
+        open_pool_snapshot(path)
+
+
+def test_pool_snapshot_slices(tmp_path):
+    path = str(tmp_path / "pool.snapshot")
+    utxo_pool = UtxoPool.from_records(make_records(10))
+    write_pool_snapshot(utxo_pool, path)
+    snapshot_pool = open_pool_snapshot(path)
+
+    for column in ["tx_hashes", "addresses", "values", "vouts", "input_bytes", "group_offsets", "group_values"]:
+        for start, end, step in [(None, None, None), (1, 3, None), (-3, None, None), (None, None, -2), (5, 100, 2)]:
+            snapshot_slice = getattr(snapshot_pool, column)[start:end:step]
+            assert list(snapshot_slice) == list(getattr(utxo_pool, column)[start:end:step])
+
+
+def test_pool_snapshot_pickle(tmp_path):
+    path = str(tmp_path / "pool.snapshot")
+    write_pool_snapshot(UtxoPool.from_records(make_records(10)), path)
+    snapshot_pool = open_pool_snapshot(path)
+    snapshot_pool.set_fee(10, 5)
+
+    unpickled_pool = pickle.loads(pickle.dumps(snapshot_pool))
+    assert list(unpickled_pool.tx_hashes) == list(snapshot_pool.tx_hashes)
+    assert list(unpickled_pool.addresses) == list(snapshot_pool.addresses)
+    assert (unpickled_pool.short_term_fee_per_byte, unpickled_pool.long_term_fee_per_byte) == (10, 5)
+    assert list(unpickled_pool.group_effective_values) == list(snapshot_pool.group_effective_values)
+    with pytest.raises(ValueError):
+        unpickled_pool.append("address", [])
+
+    # The file was replaced since
+    pickled_pool = pickle.dumps(snapshot_pool)
+    write_pool_snapshot(UtxoPool.from_records(make_records(20)), path)
+    with pytest.raises(ValueError):
+        pickle.loads(pickled_pool)
+
+
+def test_pool_snapshot_fingerprint(tmp_path, monkeypatch):
+    path = str(tmp_path / "pool.snapshot")
+    write_pool_snapshot(UtxoPool.from_records(make_records(10)), path)
+    other_path = str(tmp_path / "other.snapshot")
+    write_pool_snapshot(UtxoPool.from_records(make_records(11)), other_path)
+
+    def no_decoding(self, i):
+        raise AssertionError("tx hashes decoded for the fingerprint")
+
+    monkeypatch.setattr(pool_snapshot._TxHashColumn, "__getitem__", no_decoding)
+    snapshot_pool = open_pool_snapshot(path)
+    fingerprint = snapshot_pool.fingerprint
+    snapshot_pool.set_fee(10, 5)
+    assert snapshot_pool.fingerprint == fingerprint
+    assert open_pool_snapshot(path).fingerprint == fingerprint
+    assert open_pool_snapshot(other_path).fingerprint != fingerprint
@@ -0,0 +1,78 @@
+from bitcoin_coin_selection.selection_algorithms.selection_cache import SelectionCache
+from bitcoin_coin_selection.selection_types.change_constants import CENT
+from bitcoin_coin_selection.selection_types.coin_selection import CoinSelection
+from bitcoin_coin_selection.selection_types.coin_selection_params import CoinSelectionParams
+from bitcoin_coin_selection.selection_types.utxo_pool import UtxoPool
+from bitcoin_coin_selection.selection_types.wallet_pool import WalletPool
+from bitcoin_coin_selection.tests.fixtures import generate_utxo_pool
+from bitcoin_coin_selection.tests.coin_selection_params import TestParams
+
+
+class FakeClock():
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_selection_cache_reuses_deterministic_selections(generate_utxo_pool):
+    utxo_pool = UtxoPool.from_output_groups(generate_utxo_pool([1 * CENT, 2 * CENT, 3 * CENT, 4 * CENT]))
+    cache = SelectionCache()
+
+    # Branch and bound exact match
+    selection = cache.select_coins(TestParams(utxo_pool, 5 * CENT))
+    assert selection.algorithm == "branch_and_bound"
+    assert cache.select_coins(TestParams(utxo_pool, 5 * CENT)) is selection
+    # Failed parameter checks
+    assert cache.select_coins(TestParams(utxo_pool, 20 * CENT)).outcome == CoinSelection.Outcome.INSUFFICIENT_FUNDS
+    cache.select_coins(TestParams(utxo_pool, 20 * CENT))
+    # Knapsack, random so not kept
+    assert cache.select_coins(TestParams(utxo_pool, 5 * CENT + 1)).algorithm == "knapsack_solver"
+    cache.select_coins(TestParams(utxo_pool, 5 * CENT + 1))
+    assert (cache.hits, cache.misses, len(cache)) == (2, 4, 2)
+
+    # A list of OutputGroups is the same pool each time
+    output_groups = generate_utxo_pool([1 * CENT, 2 * CENT, 3 * CENT, 4 * CENT])
+    selection = cache.select_coins(TestParams(output_groups, 5 * CENT))
+    assert cache.select_coins(TestParams(output_groups, 5 * CENT)) is selection
+    cache.invalidate(output_groups)
+    assert cache.select_coins(TestParams(output_groups, 5 * CENT)) is not selection
+
+
+def test_selection_cache_eviction(generate_utxo_pool):
+    clock = FakeClock()
+    utxo_pool = UtxoPool.from_output_groups(generate_utxo_pool([1 * CENT, 2 * CENT, 3 * CENT, 4 * CENT]))
+    cache = SelectionCache(max_size=2, ttl=10, reuse_randomized=True, clock=clock)
+
+    first_selection = cache.select_coins(TestParams(utxo_pool, 5 * CENT + 1))
+    cache.select_coins(TestParams(utxo_pool, 6 * CENT + 1))
+    assert cache.select_coins(TestParams(utxo_pool, 5 * CENT + 1)) is first_selection
+    # Evicts the least recently used, 6 CENT
+    cache.select_coins(TestParams(utxo_pool, 7 * CENT + 1))
+    assert len(cache) == 2
+    assert cache.select_coins(TestParams(utxo_pool, 5 * CENT + 1)) is first_selection
+    assert cache.misses == 3
+    cache.select_coins(TestParams(utxo_pool, 6 * CENT + 1))
+    assert cache.misses == 4
+
+    clock.now = 10
+    assert cache.select_coins(TestParams(utxo_pool, 5 * CENT + 1)) is not first_selection
+
+
+def test_selection_cache_wallet_pool_changes():
+    wallet_pool = WalletPool()
+    for i, amount in enumerate([1 * CENT, 2 * CENT, 3 * CENT]):
+        wallet_pool.add("tx_{}".format(i), 0, amount, 100, "address_{}".format(i))
+    cache = SelectionCache()
+    params = CoinSelectionParams(wallet_pool, 3 * CENT - 2000, 10, 10, 0, 0, 100)
+
+    selection = cache.select_coins(params)
+    assert selection.algorithm == "branch_and_bound"
+    fingerprint = wallet_pool.fingerprint
+    wallet_pool.add("tx_3", 0, 3 * CENT, 100, "address_3")
+    assert wallet_pool.fingerprint != fingerprint
+    assert cache.select_coins(params) is not selection
+    wallet_pool.remove("tx_3", 0)
+    assert wallet_pool.fingerprint == fingerprint
+    assert cache.select_coins(params) is selection
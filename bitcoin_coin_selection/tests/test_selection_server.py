@@ -0,0 +1,113 @@
+import asyncio
+import json
+
+from bitcoin_coin_selection.selection_algorithms.selection_server import SelectionServer
+from bitcoin_coin_selection.selection_types.change_constants import CENT
+
+
+RECORDS = [
+    ["{:064x}".format(i), 0, amount, 100, "address_{}".format(i)]
+    for i, amount in enumerate([1 * CENT, 2 * CENT, 3 * CENT, 4 * CENT, 5 * CENT])
+]
+
+
+def select_request(target_value, **fields):
+    request = {
+        "method": "select",
+        "wallet": "hot",
+        "target_value": target_value,
+        "short_term_fee_per_byte": 0,
+        "long_term_fee_per_byte": 0,
+        "change_output_size_in_bytes": 0,
+        "change_spend_size_in_bytes": 0,
+        "not_input_size_in_bytes": 0,
+    }
+    request.update(fields)
+    return request
+
+
+def test_selection_server_requests():
+    async def run():
+        server = SelectionServer()
+        try:
+            response = await server.handle_request({"id": 1, "method": "load_wallet", "wallet": "hot", "records": RECORDS})
+            assert response == {"id": 1, "result": {"utxo_count": 5}}
+
+            response = await server.handle_request(select_request(int(4 * CENT), id=2))
+            assert response["id"] == 2
+            assert response["result"]["outcome"] == "SUCCESS"
+            assert response["result"]["effective_value"] == 4 * CENT
+            assert all(len(output["tx_hash"]) == 64 for output in response["result"]["outputs"])
+
+            response = await server.handle_request({
+                "method": "update_wallet", "wallet": "hot", "spent": [[RECORDS[0][0], 0]]
+            })
+            assert response["result"] == {"utxo_count": 4}
+
+            assert "Unknown wallet" in (await server.handle_request(select_request(1, wallet="cold")))["error"]
+            assert "missing 'target_value'" in (await server.handle_request({"method": "select", "wallet": "hot"}))["error"]
+            assert "Unknown method" in (await server.handle_request({"method": "pay"}))["error"]
+
+            stats = (await server.handle_request({"method": "stats"}))["result"]
+            assert (stats["requests"], stats["selections"], stats["errors"]) == (7, 1, 3)
+            assert stats["latency_p99"] > 0
+        finally:
+            await server.close()
+
+    asyncio.run(run())
+
+
+def test_selection_server_batches():
+    async def run():
+        server = SelectionServer(batch_window=0.05, max_batch_size=4)
+        try:
+            server.load_wallet("hot", [tuple(record) for record in RECORDS])
+            responses = await asyncio.gather(*[
+                server.handle_request(select_request(int((i % 5 + 1) * CENT), short_term_fee_per_byte=i % 2))
+                for i in range(10)
+            ])
+        finally:
+            await server.close()
+        return responses, server.stats
+
+    responses, stats = asyncio.run(run())
+    # Each caller gets its own selection back
+    assert [response["result"]["target_value"] for response in responses] == [(i % 5 + 1) * CENT for i in range(10)]
+    assert stats.selections == 10
+    assert stats.batches == 3
+
+
+def test_selection_server_unix_socket(tmp_path):
+    async def run():
+        server = SelectionServer()
+        path = str(tmp_path / "selection.sock")
+        listener = await server.start_unix_server(path)
+        try:
+            reader, writer = await asyncio.open_unix_connection(path)
+            requests = [
+                {"id": 1, "method": "load_wallet", "wallet": "hot", "records": RECORDS},
+                select_request(int(3 * CENT), id=2),
+                select_request(int(100 * CENT), id=3),
+            ]
+            # One at a time, as the selections need the wallet loaded
+            responses = {}
+            for request in requests:
+                writer.write(json.dumps(request).encode("utf-8") + b"\n")
+                await writer.drain()
+                response = json.loads(await reader.readline())
+                responses[response["id"]] = response
+            writer.write(b"not json\n")
+            await writer.drain()
+            responses["invalid"] = json.loads(await reader.readline())
+            writer.close()
+        finally:
+            listener.close()
+            await listener.wait_closed()
+            await server.close()
+        return responses
+
+    responses = asyncio.run(run())
+    assert responses[1]["result"] == {"utxo_count": 5}
+    assert responses[2]["result"]["effective_value"] == 3 * CENT
+    assert responses[3]["result"]["outcome"] == "INSUFFICIENT_FUNDS"
+    assert "error" in responses["invalid"]
@@ -0,0 +1,81 @@
+import functools
+import itertools
+import random
+
+from bitcoin_coin_selection.selection_algorithms import select_coins as select_coins_module
+from bitcoin_coin_selection.selection_algorithms.branch_and_bound import select_coins_branch_and_bound
+from bitcoin_coin_selection.selection_algorithms.select_coins import select_coins
+from bitcoin_coin_selection.selection_algorithms.subset_sum import select_coins_subset_sum
+from bitcoin_coin_selection.selection_types.change_constants import CENT
+from bitcoin_coin_selection.selection_types.coin_selection import CoinSelection
+from bitcoin_coin_selection.tests.fixtures import generate_utxo_pool, make_hard_case
+from bitcoin_coin_selection.tests.coin_selection_params import TestParams
+
+
+RUN_TESTS = 100
+
+
+def test_subset_sum_exact_match(generate_utxo_pool):
+    utxo_pool = generate_utxo_pool([1 * CENT, 2 * CENT, 3 * CENT, 5 * CENT, 8 * CENT])
+
+    selection = select_coins_subset_sum(TestParams(utxo_pool, 12 * CENT, cost_of_change=5000))
+
+    assert selection.outcome == CoinSelection.Outcome.SUCCESS
+    assert selection.algorithm == "subset_sum"
+    assert selection.effective_value == 12 * CENT
+    assert selection.change_value == 0
+
+
+def test_subset_sum_smallest_sum_in_range(generate_utxo_pool):
+    utxo_pool = generate_utxo_pool([3 * CENT, 5 * CENT, 7 * CENT])
+
+    # 9 CENT can't be made, 10 CENT is the least in range
+    selection = select_coins_subset_sum(TestParams(utxo_pool, 9 * CENT, cost_of_change=2 * CENT))
+
+    assert selection.outcome == CoinSelection.Outcome.SUCCESS
+    assert selection.effective_value == 10 * CENT
+
+
+def test_subset_sum_finds_every_changeless_selection(generate_utxo_pool):
+    for _ in range(RUN_TESTS):
+        amounts = [random.randint(1, 40) * 1000 for _ in range(random.randint(1, 10))]
+        utxo_pool = generate_utxo_pool(amounts)
+        target_value = random.randint(1, sum(amounts))
+        cost_of_change = random.randint(1, 5000)
+
+        selection = select_coins_subset_sum(TestParams(utxo_pool, target_value, cost_of_change=cost_of_change))
+
+        sums = {sum(subset) for r in range(len(amounts) + 1) for subset in itertools.combinations(amounts, r)}
+        in_range = [s for s in sums if target_value <= s <= target_value + cost_of_change]
+        if in_range:
+            assert selection.outcome == CoinSelection.Outcome.SUCCESS
+            assert selection.effective_value == min(in_range)
+        else:
+            assert selection.outcome == CoinSelection.Outcome.ALGORITHM_FAILURE
+
+
+def test_subset_sum_hard_case(make_hard_case):
+    target_value, utxo_pool = make_hard_case(10)
+    params = TestParams(utxo_pool, target_value)
+
+    assert select_coins_branch_and_bound(params, total_tries=1000).outcome == CoinSelection.Outcome.ALGORITHM_FAILURE
+    selection = select_coins_subset_sum(params)
+    assert selection.outcome == CoinSelection.Outcome.SUCCESS
+    assert selection.effective_value == target_value
+
+    # Over the size limit
+    assert select_coins_subset_sum(params, max_bits=1000).outcome == CoinSelection.Outcome.ALGORITHM_FAILURE
+
+
+def test_select_coins_uses_subset_sum(make_hard_case, monkeypatch):
+    monkeypatch.setattr(
+        select_coins_module,
+        "select_coins_branch_and_bound",
+        functools.partial(select_coins_branch_and_bound, total_tries=1000)
+    )
+    target_value, utxo_pool = make_hard_case(10)
+
+    selection = select_coins(TestParams(utxo_pool, target_value))
+
+    assert selection.algorithm == "subset_sum"
+    assert selection.effective_value == target_value
@@ -0,0 +1,151 @@
+import pytest
+
+from bitcoin_coin_selection.selection_algorithms.branch_and_bound import select_coins_branch_and_bound
+from bitcoin_coin_selection.selection_algorithms.knapsack_solver import select_coins_knapsack_solver
+from bitcoin_coin_selection.selection_algorithms.select_coins import select_coins
+from bitcoin_coin_selection.selection_algorithms.single_random_draw import select_coins_single_random_draw
+from bitcoin_coin_selection.selection_types.change_constants import CENT
+from bitcoin_coin_selection.selection_types.coin_selection import CoinSelection
+from bitcoin_coin_selection.selection_types.coin_selection_params import CoinSelectionParams
+from bitcoin_coin_selection.selection_types.utxo_pool import UtxoPool
+from bitcoin_coin_selection.tests.fixtures import generate_utxo_pool
+from bitcoin_coin_selection.tests.coin_selection_params import TestParams
+
+
+def make_utxo_pool(amounts):
+    utxo_pool = UtxoPool()
+    for i, amount in enumerate(amounts):
+        utxo_pool.append("address_{}".format(i), [("tx_{}".format(i), 0, int(amount), 100)])
+    return utxo_pool
+
+
+def test_utxo_pool_from_output_groups(generate_utxo_pool):
+    output_groups = generate_utxo_pool([1 * CENT, 2 * CENT, 3 * CENT])
+    utxo_pool = UtxoPool.from_output_groups(output_groups)
+    utxo_pool.set_fee(10, 5)
+
+    assert len(utxo_pool) == 3
+    assert list(utxo_pool.group_offsets) == [0, 1, 2, 3]
+    assert list(utxo_pool.values) == [1 * CENT, 2 * CENT, 3 * CENT]
+    assert list(utxo_pool.fees) == [1000, 1000, 1000]
+    assert list(utxo_pool.long_term_fees) == [500, 500, 500]
+    assert list(utxo_pool.group_effective_values) == [1 * CENT - 1000, 2 * CENT - 1000, 3 * CENT - 1000]
+    assert utxo_pool.total_value == 6 * CENT
+    assert utxo_pool.output_group(1) is output_groups[1]
+
+
+def test_utxo_pool_groups_match_output_groups():
+    utxo_pool = UtxoPool()
+    utxo_pool.append("address", [("tx_0", 0, 5000, 100), ("tx_1", 1, 50, 100), ("tx_2", 0, 3000, 50)])
+    utxo_pool.set_fee(10, 1)
+
+    output_group = utxo_pool.output_group(0)
+    # The 50 satoshi output costs more to spend than it is worth and is dropped
+    assert [output.tx_hash for output in output_group.outputs] == ["tx_0", "tx_2"]
+    assert output_group.value == utxo_pool.group_values[0] == 8050
+    assert output_group.effective_value == utxo_pool.group_effective_values[0] == 6500
+    assert output_group.fee == utxo_pool.group_fees[0] == 1500
+    assert output_group.long_term_fee == utxo_pool.group_long_term_fees[0] == 150
+
+
+def test_utxo_pool_branch_and_bound():
+    utxo_pool = make_utxo_pool([1 * CENT, 2 * CENT, 3 * CENT, 4 * CENT, 5 * CENT])
+    selection = select_coins_branch_and_bound(
+        TestParams(utxo_pool, 10 * CENT, cost_of_change=0.5 * CENT)
+    )
+    assert selection.outcome == CoinSelection.Outcome.SUCCESS
+    assert sorted(output.value for output in selection.outputs) == [1 * CENT, 4 * CENT, 5 * CENT]
+
+
+def test_utxo_pool_knapsack_solver():
+    utxo_pool = make_utxo_pool([6 * CENT, 7 * CENT, 8 * CENT, 20 * CENT, 30 * CENT])
+    selection = select_coins_knapsack_solver(TestParams(utxo_pool, 16 * CENT))
+    assert selection.outcome == CoinSelection.Outcome.SUCCESS
+    assert len(selection.outputs) == 1
+    assert selection.effective_value == 20 * CENT
+
+
+def test_utxo_pool_single_random_draw():
+    utxo_pool = make_utxo_pool([i * CENT for i in range(100)])
+    selection = select_coins_single_random_draw(TestParams(utxo_pool, 150 * CENT))
+    assert selection.outcome == CoinSelection.Outcome.SUCCESS
+    assert selection.effective_value >= 150 * CENT
+
+
+def test_utxo_pool_select_coins():
+    utxo_pool = make_utxo_pool([1 * CENT, 2 * CENT, 3 * CENT, 4 * CENT])
+    selection = select_coins(CoinSelectionParams(utxo_pool, 5 * CENT, 100, 100, 100, 100, 100))
+    assert selection.outcome == CoinSelection.Outcome.SUCCESS
+    assert selection.effective_value >= 5 * CENT
+    assert {output.tx_hash for output in selection.outputs} <= set(utxo_pool.tx_hashes)
+
+    selection = select_coins(CoinSelectionParams(utxo_pool, 11 * CENT, 0, 0, 0, 0, 0))
+    assert selection.outcome == CoinSelection.Outcome.INSUFFICIENT_FUNDS
+
+
+@pytest.mark.parametrize("short_term_fee_per_byte, long_term_fee_per_byte", [(0, 0), (1, 3), (20, 5), (400, 10)])
+def test_utxo_pool_set_fee_matches_output_groups(short_term_fee_per_byte, long_term_fee_per_byte):
+    utxo_pool = UtxoPool()
+    for i in range(50):
+        utxo_pool.append(
+            "address_{}".format(i),
+            [("tx_{}_{}".format(i, j), j, 1000 * (i + 1) * (j + 1), (68, 91, 148)[(i + j) % 3]) for j in range(i % 4 + 1)]
+        )
+    # Reprice more than once to make sure nothing stale carries over
+    utxo_pool.set_fee(short_term_fee_per_byte + 7, long_term_fee_per_byte + 7)
+    utxo_pool.set_fee(short_term_fee_per_byte, long_term_fee_per_byte)
+
+    for i in range(len(utxo_pool)):
+        output_group = utxo_pool.output_group(i)
+        assert utxo_pool.group_fees[i] == output_group.fee
+        assert utxo_pool.group_long_term_fees[i] == output_group.long_term_fee
+        assert utxo_pool.group_effective_values[i] == output_group.effective_value
+
+
+def test_utxo_pool_set_fee_after_append():
+    utxo_pool = make_utxo_pool([1 * CENT, 2 * CENT])
+    utxo_pool.set_fee(10, 5)
+    utxo_pool.append("address_2", [("tx_2", 0, 3 * CENT, 100)])
+    # Same fee rate, but the new coin still has to be priced
+    utxo_pool.set_fee(10, 5)
+
+    assert list(utxo_pool.group_effective_values) == [1 * CENT - 1000, 2 * CENT - 1000, 3 * CENT - 1000]
+    assert utxo_pool.total_effective_value == 6 * CENT - 3000
+
+
+def test_utxo_pool_sorted_view_is_cached():
+    utxo_pool = make_utxo_pool([2 * CENT, 5 * CENT, 1 * CENT])
+    utxo_pool.set_fee(10, 5)
+    sorted_view = utxo_pool.sorted_by_effective_value()
+    assert list(sorted_view) == [1, 0, 2]
+
+    # Reused across selections at the same fee rate
+    select_coins_branch_and_bound(CoinSelectionParams(utxo_pool, 1 * CENT, 10, 5, 0, 0, 0))
+    assert utxo_pool.sorted_by_effective_value() is sorted_view
+    utxo_pool.set_fee(20, 5)
+    assert utxo_pool.sorted_by_effective_value() is not sorted_view
+    utxo_pool.append("address_3", [("tx_3", 0, 3 * CENT, 100)])
+    utxo_pool.set_fee(20, 5)
+    assert list(utxo_pool.sorted_by_effective_value()) == [1, 3, 0, 2]
+
+
+def test_utxo_pool_fingerprint_is_cached():
+    utxo_pool = make_utxo_pool([2 * CENT, 5 * CENT, 1 * CENT])
+    fingerprint = utxo_pool.fingerprint
+    assert utxo_pool._fingerprint == fingerprint
+
+    # Kept across fee rates, rehashed once after the pool grows
+    utxo_pool.set_fee(10, 5)
+    assert utxo_pool.fingerprint == fingerprint
+    utxo_pool.append("address_3", [("tx_3", 0, 3 * CENT, 100)])
+    assert utxo_pool._fingerprint is None
+    assert utxo_pool.fingerprint != fingerprint
+    assert utxo_pool.fingerprint == make_utxo_pool([2 * CENT, 5 * CENT, 1 * CENT, 3 * CENT]).fingerprint
+
+
+def test_selection_leaves_output_groups_in_place(generate_utxo_pool):
+    output_groups = generate_utxo_pool([1 * CENT, 2 * CENT, 3 * CENT, 4 * CENT, 5 * CENT, 6 * CENT])
+    original_order = list(output_groups)
+    for algorithm in [select_coins_branch_and_bound, select_coins_knapsack_solver, select_coins_single_random_draw]:
+        algorithm(TestParams(output_groups, 7 * CENT + 1))
+        assert output_groups == original_order
@@ -0,0 +1,66 @@
+import io
+import json
+
+import pytest
+
+from bitcoin_coin_selection.selection_algorithms.branch_and_bound import select_coins_branch_and_bound
+from bitcoin_coin_selection.selection_types.change_constants import CENT
+from bitcoin_coin_selection.selection_types.coin_selection import CoinSelection
+from bitcoin_coin_selection.selection_types.utxo_pool import UtxoPool
+from bitcoin_coin_selection.selection_types.utxo_records import (
+    load_output_groups, load_utxo_pool, load_wallet_pool, read_csv_records,
+    read_jsonl_records, read_utxo_records
+)
+from bitcoin_coin_selection.tests.coin_selection_params import TestParams
+
+
+# Two addresses with interleaved coins
+RECORDS = [
+    ("tx_0", 0, int(1 * CENT), 100, "address_0"),
+    ("tx_0", 1, int(2 * CENT), 100, "address_1"),
+    ("tx_1", 0, int(3 * CENT), 68, "address_0"),
+    ("tx_2", 3, int(4 * CENT), 100, "address_2"),
+    ("tx_3", 0, int(5 * CENT), 148, "address_1"),
+]
+
+
+def test_read_records(tmp_path):
+    csv_path = tmp_path / "wallet.csv"
+    csv_path.write_text(
+        "address,tx_hash,vout,value,input_bytes,label\n"
+        + "".join("{4},{0},{1},{2},{3},x\n".format(*record) for record in RECORDS)
+    )
+    jsonl_path = tmp_path / "wallet.jsonl"
+    jsonl_path.write_text("".join(
+        json.dumps(dict(zip(["tx_hash", "vout", "value", "input_bytes", "address"], record))) + "\n\n"
+        for record in RECORDS
+    ))
+
+    assert list(read_utxo_records(str(csv_path))) == RECORDS
+    assert list(read_utxo_records(str(jsonl_path))) == RECORDS
+    with open(str(jsonl_path)) as jsonl_file:
+        assert list(read_jsonl_records(jsonl_file)) == RECORDS
+    with pytest.raises(ValueError):
+        list(read_csv_records(io.StringIO("tx_hash,vout\ntx_0,0\n")))
+
+
+def test_load_records():
+    utxo_pool = load_utxo_pool(iter(RECORDS))
+    output_groups = load_output_groups(iter(RECORDS))
+    expected_pool = UtxoPool.from_output_groups(output_groups)
+
+    assert utxo_pool.addresses == expected_pool.addresses == ["address_0", "address_1", "address_2"]
+    assert list(utxo_pool.group_offsets) == list(expected_pool.group_offsets) == [0, 2, 4, 5]
+    assert utxo_pool.tx_hashes == expected_pool.tx_hashes == ["tx_0", "tx_1", "tx_0", "tx_3", "tx_2"]
+    assert list(utxo_pool.vouts) == list(expected_pool.vouts)
+    assert list(utxo_pool.input_bytes) == list(expected_pool.input_bytes)
+    assert list(utxo_pool.group_values) == list(expected_pool.group_values)
+
+    wallet_pool = load_wallet_pool(iter(RECORDS), 10, 5)
+    utxo_pool.set_fee(10, 5)
+    assert sorted(wallet_pool.group_effective_values) == sorted(utxo_pool.group_effective_values)
+
+    # Only address_1 holds exactly 7 CENT
+    selection = select_coins_branch_and_bound(TestParams(utxo_pool, 7 * CENT))
+    assert selection.outcome == CoinSelection.Outcome.SUCCESS
+    assert [(output.tx_hash, output.vout) for output in selection.outputs] == [("tx_0", 1), ("tx_3", 0)]
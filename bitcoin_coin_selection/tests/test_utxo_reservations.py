@@ -0,0 +1,177 @@
+import threading
+
+import pytest
+
+from bitcoin_coin_selection.selection_algorithms import utxo_reservations
+from bitcoin_coin_selection.selection_algorithms.select_coins import select_coins
+from bitcoin_coin_selection.selection_algorithms.utxo_reservations import UtxoReservations
+from bitcoin_coin_selection.selection_types.change_constants import CENT
+from bitcoin_coin_selection.selection_types.coin_selection import CoinSelection
+from bitcoin_coin_selection.selection_types.wallet_pool import WalletPool
+
+
+def make_wallet_pool(values):
+    wallet_pool = WalletPool()
+    for i, value in enumerate(values):
+        wallet_pool.add("{:064x}".format(i), 0, int(value), 68, "address_{}".format(i))
+    return wallet_pool
+
+
+def select(reservations, target_value, **kwargs):
+    return reservations.select_coins(target_value, 0, 0, 0, 0, 0, **kwargs)
+
+
+def test_reservations_lease_selected_coins():
+    reservations = UtxoReservations(make_wallet_pool([1 * CENT, 2 * CENT, 3 * CENT, 4 * CENT]))
+
+    selection, lease = select(reservations, 5 * CENT)
+
+    assert selection.outcome == CoinSelection.Outcome.SUCCESS
+    assert lease.outpoints == {(output.tx_hash, output.vout) for output in selection.outputs}
+    assert reservations.reserved == lease.outpoints
+
+    # The leased coins can't be selected again
+    second_selection, second_lease = select(reservations, 5 * CENT)
+    assert second_selection.outcome == CoinSelection.Outcome.SUCCESS
+    assert lease.outpoints.isdisjoint(second_lease.outpoints)
+
+    failed_selection, failed_lease = select(reservations, 1 * CENT)
+    assert failed_selection.outcome == CoinSelection.Outcome.INSUFFICIENT_FUNDS
+    assert failed_lease is None
+
+
+def test_reservations_release_and_commit():
+    wallet_pool = make_wallet_pool([1 * CENT, 2 * CENT, 3 * CENT, 4 * CENT])
+    reservations = UtxoReservations(wallet_pool)
+
+    _, lease = select(reservations, 5 * CENT)
+    reservations.release(lease)
+    assert reservations.reserved == frozenset()
+
+    selection, lease = select(reservations, 5 * CENT)
+    reservations.commit(lease)
+    assert reservations.reserved == frozenset()
+    assert wallet_pool.utxo_count == 4 - len(selection.outputs)
+    assert all(outpoint not in wallet_pool for outpoint in lease.outpoints)
+
+    with pytest.raises(ValueError):
+        reservations.commit(lease)
+
+
+def test_reservations_lease_expiry():
+    now = [0.0]
+    reservations = UtxoReservations(make_wallet_pool([1 * CENT, 2 * CENT]), ttl=10, clock=lambda: now[0])
+
+    _, lease = select(reservations, 3 * CENT)
+    _, long_lease = select(reservations, 3 * CENT)
+    assert long_lease is None
+
+    now[0] = 10
+    assert reservations.reserved == frozenset()
+    with pytest.raises(ValueError):
+        reservations.commit(lease)
+
+    _, long_lease = select(reservations, 3 * CENT, ttl=100)
+    now[0] = 50
+    assert reservations.reserved == long_lease.outpoints
+    # Releasing a lease that already lapsed is a no-op
+    reservations.release(lease)
+    assert reservations.reserved == long_lease.outpoints
+
+
+def test_reservations_apply_block_delta():
+    wallet_pool = make_wallet_pool([1 * CENT, 2 * CENT])
+    reservations = UtxoReservations(wallet_pool)
+
+    _, lease = select(reservations, 3 * CENT)
+    reservations.apply_block_delta(
+        created=[("{:064x}".format(100), 0, int(5 * CENT), 68, "address_100")],
+        spent=lease.outpoints
+    )
+
+    assert reservations.reserved == frozenset()
+    assert lease.outpoints == frozenset()
+    assert wallet_pool.utxo_count == 1
+    # The transaction confirmed before it was committed
+    reservations.commit(lease)
+    selection, _ = select(reservations, 5 * CENT)
+    assert [output.tx_hash for output in selection.outputs] == ["{:064x}".format(100)]
+
+
+def test_reservations_concurrent_selections_are_disjoint():
+    reservations = UtxoReservations(make_wallet_pool([(i % 50 + 1) * CENT for i in range(400)]))
+    leases = []
+    lock = threading.Lock()
+
+    def run(seed):
+        for i in range(10):
+            selection, lease = select(reservations, ((seed * 10 + i) % 40 + 1) * CENT)
+            assert selection.outcome == CoinSelection.Outcome.SUCCESS
+            with lock:
+                leases.append(lease)
+
+    threads = [threading.Thread(target=run, args=(seed,)) for seed in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(leases) == 80
+    outpoints = [outpoint for lease in leases for outpoint in lease.outpoints]
+    assert len(outpoints) == len(set(outpoints))
+    assert reservations.reserved == frozenset(outpoints)
+
+
+def test_reservations_block_spends_part_of_a_lease():
+    wallet_pool = make_wallet_pool([1 * CENT, 2 * CENT, 4 * CENT])
+    reservations = UtxoReservations(wallet_pool)
+
+    _, lease = select(reservations, 3 * CENT)
+    spent, kept = sorted(lease.outpoints)
+    reservations.apply_block_delta(spent=[spent])
+    assert lease.outpoints == {kept}
+    assert reservations.reserved == {kept}
+
+    reservations.commit(lease)
+    assert reservations.reserved == frozenset()
+    assert wallet_pool.utxo_count == 1
+
+
+def test_reservations_out_of_retries(monkeypatch):
+    wallet_pool = make_wallet_pool([1 * CENT, 2 * CENT, 3 * CENT, 4 * CENT])
+    reservations = UtxoReservations(wallet_pool, max_retries=0)
+
+    def select_coins_then_block(params, **kwargs):
+        selection = select_coins(params, **kwargs)
+        # A block spends every coin while the selection runs
+        reservations.apply_block_delta(spent=[(tx_hash, vout) for tx_hash, vout, _, _, _ in wallet_pool.utxo_records()])
+        return selection
+
+    monkeypatch.setattr(utxo_reservations, "select_coins", select_coins_then_block)
+    selection, lease = select(reservations, 5 * CENT)
+
+    assert selection.outcome == CoinSelection.Outcome.ALGORITHM_FAILURE
+    assert lease is None
+    assert reservations.reserved == frozenset()
+
+
+def test_reservations_snapshots_per_fee_rate():
+    wallet_pool = make_wallet_pool([(i % 20 + 1) * CENT for i in range(100)])
+    reservations = UtxoReservations(wallet_pool)
+
+    _, lease = reservations.select_coins(5 * CENT, 10, 5, 31, 68, 41)
+    snapshot = reservations._snapshots[(10, 5)]
+    _, other_lease = reservations.select_coins(5 * CENT, 20, 5, 31, 68, 41)
+    reservations.release(lease)
+    # Neither other fee rates nor leases reprice the wallet or retake snapshots
+    assert (wallet_pool.short_term_fee_per_byte, wallet_pool.long_term_fee_per_byte) == (0, 0)
+    selection, lease = reservations.select_coins(5 * CENT, 10, 5, 31, 68, 41)
+    assert reservations._snapshots[(10, 5)] is snapshot
+    assert lease.outpoints.isdisjoint(other_lease.outpoints)
+    assert sum(output.value for output in selection.outputs) == selection.value
+
+    # Changes to the wallet do
+    reservations.commit(lease)
+    reservations.select_coins(5 * CENT, 10, 5, 31, 68, 41)
+    assert reservations._snapshots[(10, 5)] is not snapshot
+    assert list(reservations._snapshots) == [(10, 5)]
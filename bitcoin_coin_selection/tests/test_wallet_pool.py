@@ -0,0 +1,103 @@
+import random
+
+import pytest
+
+from bitcoin_coin_selection.selection_algorithms.branch_and_bound import select_coins_branch_and_bound
+from bitcoin_coin_selection.selection_algorithms.select_coins import select_coins
+from bitcoin_coin_selection.selection_types.change_constants import CENT
+from bitcoin_coin_selection.selection_types.coin_selection import CoinSelection
+from bitcoin_coin_selection.selection_types.coin_selection_params import CoinSelectionParams
+from bitcoin_coin_selection.selection_types.utxo_pool import UtxoPool
+from bitcoin_coin_selection.selection_types.wallet_pool import WalletPool
+from bitcoin_coin_selection.tests.coin_selection_params import TestParams
+
+
+def assert_matches_rebuilt_pool(wallet_pool: WalletPool):
+    # Every running aggregate should match a pool rebuilt from scratch
+    utxo_pool = UtxoPool.from_output_groups(wallet_pool.output_groups(range(len(wallet_pool))))
+    utxo_pool.set_fee(wallet_pool.short_term_fee_per_byte, wallet_pool.long_term_fee_per_byte)
+    assert wallet_pool.total_value == utxo_pool.total_value
+    assert wallet_pool.total_effective_value == utxo_pool.total_effective_value
+    assert list(wallet_pool.group_values) == list(utxo_pool.group_values)
+    assert list(wallet_pool.group_fees) == list(utxo_pool.group_fees)
+    assert list(wallet_pool.group_long_term_fees) == list(utxo_pool.group_long_term_fees)
+    assert list(wallet_pool.group_effective_values) == list(utxo_pool.group_effective_values)
+    effective_values = [wallet_pool.group_effective_values[i] for i in wallet_pool.sorted_by_effective_value()]
+    assert effective_values == sorted(wallet_pool.group_effective_values, reverse=True)
+    # Ties in slot order, as in UtxoPool
+    assert tuple(wallet_pool.sorted_by_effective_value()) == tuple(utxo_pool.sorted_by_effective_value())
+
+
+def test_wallet_pool_add_and_remove():
+    wallet_pool = WalletPool(10, 5)
+    wallet_pool.add("tx_0", 0, 1 * CENT, 100, "address_0")
+    wallet_pool.add("tx_0", 1, 2 * CENT, 100, "address_1")
+    wallet_pool.add("tx_1", 0, 3 * CENT, 100, "address_0")
+    # Worth less than it costs to spend, counts towards value but not effective value
+    wallet_pool.add("tx_1", 1, 500, 100, "address_1")
+
+    assert len(wallet_pool) == 2
+    assert wallet_pool.utxo_count == 4
+    assert wallet_pool.total_value == 6 * CENT + 500
+    assert wallet_pool.total_effective_value == 6 * CENT - 3000
+    assert_matches_rebuilt_pool(wallet_pool)
+
+    wallet_pool.remove("tx_0", 0)
+    wallet_pool.remove("tx_1", 0)
+    assert len(wallet_pool) == 1
+    assert ("tx_0", 0) not in wallet_pool
+    assert wallet_pool.addresses == ["address_1"]
+    assert wallet_pool.total_value == 2 * CENT + 500
+    assert_matches_rebuilt_pool(wallet_pool)
+
+    with pytest.raises(ValueError):
+        wallet_pool.add("tx_0", 1, 2 * CENT, 100, "address_1")
+    with pytest.raises(KeyError):
+        wallet_pool.remove("tx_0", 0)
+
+
+def test_wallet_pool_apply_block_delta():
+    random.seed(0)
+    wallet_pool = WalletPool(20, 10)
+    utxos = []
+    for block in range(30):
+        created = [
+            ("tx_{}_{}".format(block, i), i, random.randint(1000, int(10 * CENT)), random.choice([68, 91, 148]), "address_{}".format(random.randint(0, 40)))
+            for i in range(random.randint(0, 20))
+        ]
+        spent = random.sample(utxos, min(len(utxos), random.randint(0, 15)))
+        # Spends of coins that belong to somebody else are ignored
+        spent.append(("not_ours", 0))
+        wallet_pool.apply_block_delta(created, spent)
+        utxos = [utxo for utxo in utxos if utxo not in spent] + [(tx_hash, vout) for tx_hash, vout, _, _, _ in created]
+        assert wallet_pool.utxo_count == len(utxos)
+        assert_matches_rebuilt_pool(wallet_pool)
+
+    wallet_pool.set_fee(50, 10)
+    assert_matches_rebuilt_pool(wallet_pool)
+
+    # The sorted view is shared until the pool changes
+    sorted_view = wallet_pool.sorted_by_effective_value()
+    assert wallet_pool.sorted_by_effective_value() is sorted_view
+    wallet_pool.add("tx_new", 0, 1 * CENT, 68, "address_0")
+    assert wallet_pool.sorted_by_effective_value() is not sorted_view
+    assert_matches_rebuilt_pool(wallet_pool)
+
+
+def test_wallet_pool_selection():
+    wallet_pool = WalletPool()
+    for i, amount in enumerate([1 * CENT, 2 * CENT, 3 * CENT, 4 * CENT, 5 * CENT]):
+        wallet_pool.add("tx_{}".format(i), 0, amount, 100, "address_{}".format(i))
+
+    selection = select_coins_branch_and_bound(
+        TestParams(wallet_pool, 10 * CENT, cost_of_change=0.5 * CENT)
+    )
+    assert selection.outcome == CoinSelection.Outcome.SUCCESS
+    assert sorted(output.value for output in selection.outputs) == [1 * CENT, 4 * CENT, 5 * CENT]
+
+    for output in selection.outputs:
+        wallet_pool.remove(output.tx_hash, output.vout)
+    selection = select_coins(CoinSelectionParams(wallet_pool, 4 * CENT, 10, 10, 100, 100, 100))
+    assert selection.outcome == CoinSelection.Outcome.SUCCESS
+    assert {output.tx_hash for output in selection.outputs} <= {"tx_1", "tx_2"}
+    assert wallet_pool.short_term_fee_per_byte == 10